@@ -0,0 +1,366 @@
+"""
+Batch queries
+-------------
+Answer a file of queries without the interactive menus. Each line of the
+query file is a JSON object; each answer is written as one JSON line:
+
+    {"dataset": "nsw", "op": "top", "month": "Dec-24", "min_total": 200, "n": 10}
+    {"op": "outliers", "month": "Jan-25"}
+    {"op": "busiest", "month": "Jan-25", "min_total": 0}
+    {"op": "save", "month": "Dec-24", "sort": "asc", "path": "dec24.csv"}
+
+Fields (all optional except ``op``): ``dataset`` (nsw | vic, default nsw),
+``month`` (default Dec-24), ``min_total`` (default 200), ``sort`` (desc | asc,
+default desc), ``n`` (default 10). Ops: table, top, bottom, outliers, busiest,
+count, save. For the published VIC file (Pax_* columns per financial year)
+``month`` is the financial year (default: the latest) and ``min_total`` the
+minimum Pax_annual the stops are ranked by.
+
+Each dataset is loaded and processed once; every month is ranked once and
+each min_total is a binary search into that ranking, and identical queries
+are answered from a bounded LRU result cache.
+
+    python batch.py run queries.jsonl -o answers.jsonl
+    python batch.py generate 10000 queries.jsonl      # throughput test input
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import nsw
+import vic
+from cache import LRUCache
+from cube import PatronageCube, _month_order
+from pax import PaxAggregate, is_pax_frame
+from ranking import NO_THRESHOLD, Ranking
+
+OPS = ("table", "top", "bottom", "outliers", "busiest", "count", "save")
+DEFAULTS = {"dataset": "nsw", "month": "Dec-24", "min_total": 200, "sort": "desc", "n": 10}
+
+
+def _records(df: pd.DataFrame) -> list:
+    """JSON-ready rows; Int64 / numpy scalars become plain ints, <NA> becomes None."""
+    return [
+        {k: (None if v is pd.NA else v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+        for row in df.to_dict("records")
+    ]
+
+
+def _json_rows(df: pd.DataFrame) -> list:
+    """Rows as plain dicts with NaN as null, so the body is strict JSON."""
+    return _records(df.astype(object).where(df.notna(), None))
+
+
+def _ranked_records(ranking: Ranking) -> list:
+    """Every row of ``ranking`` as a plain dict, in ascending order."""
+    order = ranking.order
+    return [
+        {"Station": s, "Entry": e, "Exit": x, "Total": t}
+        for s, e, x, t in zip(ranking.stations[order].tolist(), ranking.entry[order].tolist(),
+                              ranking.exit[order].tolist(), ranking.total[order].tolist())
+    ]
+
+
+def _with_defaults(query: dict) -> dict:
+    """
+    ``query`` with every default filled in. A VIC query without a month keeps
+    month None: the latest financial year of a Pax_* file, the default month otherwise.
+    """
+    q = {**DEFAULTS, **query}
+    if q["dataset"] == "vic" and "month" not in query:
+        q["month"] = None
+    return q
+
+
+def _answer_key(query):
+    """Cache key for a query's answer; None for queries with side effects or bad input."""
+    if not isinstance(query, dict) or query.get("op") == "save":
+        return None
+    q = _with_defaults(query)
+    key = (q.get("op"), q["dataset"], q["month"], q["min_total"], q["sort"], q["n"])
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class BatchSession:
+    """Loaded datasets plus every intermediate the queries so far have needed."""
+
+    def __init__(self, csv_paths=None, frames=None, report=False, store=None, cache_size=1024):
+        self.csv_paths = {"nsw": nsw.CSV_PATH, "vic": vic.CSV_PATH, **(csv_paths or {})}
+        self.frames = dict(frames or {})
+        self.report = report
+        self.store = store  # optional PatronageStore: queries are answered by SQL, no frame is loaded
+        self._cubes = {}
+        self._pax = {}
+        self._rankings = {}
+        # per-threshold results are bounded: min_total comes from the query (or an HTTP client)
+        self._records = LRUCache(cache_size)
+        self._outliers = LRUCache(cache_size)
+        self._answers = LRUCache(cache_size)
+
+    # ---------- Shared intermediates ----------
+    def frame(self, dataset) -> pd.DataFrame:
+        if dataset not in self.frames:
+            loader = {"nsw": nsw.load, "vic": vic.load}.get(dataset)
+            if loader is None:
+                raise ValueError(f"Unknown dataset '{dataset}'. Use nsw or vic.")
+            self.frames[dataset] = loader(self.csv_paths[dataset], report=self.report)
+        return self.frames[dataset]
+
+    def cube(self, dataset="nsw") -> PatronageCube:
+        # one cube answers every month of the NSW file
+        if dataset not in self._cubes:
+            self._cubes[dataset] = PatronageCube.from_frame(self.frame(dataset))
+        return self._cubes[dataset]
+
+    def pax(self, dataset) -> PaxAggregate:
+        """The ``PaxAggregate`` of a wide Pax_* VIC file (financial years, no months), else None."""
+        if dataset != "vic":
+            return None
+        if dataset not in self._pax:
+            df = self.frame(dataset)
+            self._pax[dataset] = PaxAggregate.from_frame(df) if is_pax_frame(df) else None
+        return self._pax[dataset]
+
+    def months(self, dataset) -> list:
+        """Month labels present in a dataset, in calendar order (financial years for a Pax_* file)."""
+        if self.store is not None:
+            return self.store.months(dataset)
+        if dataset == "nsw":
+            return self.cube(dataset).months
+        if self.pax(dataset) is not None:
+            return self.pax(dataset).years
+        df = self.frame(dataset)
+        month_col = vic.column_map(df)[vic.detect_schema(df)["month"]]
+        return _month_order([str(m) for m in df[month_col].dropna().unique()])
+
+    def ranking(self, dataset, month, min_total) -> Ranking:
+        # each month is ranked once; a min_total is a binary search into it
+        key = (dataset, month)
+        if key not in self._rankings:
+            if self.store is not None:
+                table = self.store.table(dataset, month, min_total=NO_THRESHOLD)
+            elif dataset == "nsw":
+                table = self.cube(dataset).month_table(month, min_total=NO_THRESHOLD)
+            else:
+                table = vic.process_patronage(self.frame(dataset), month=month, min_total=NO_THRESHOLD)
+            self._rankings[key] = Ranking.from_table(table)
+        return self._rankings[key].above(min_total)
+
+    def records(self, dataset, month, min_total) -> list:
+        """Ascending rows of a ranking; both sort orders and every top/bottom N slice it."""
+        key = (dataset, month, min_total)
+        rows = self._records.get(key)
+        if rows is None:
+            rows = _ranked_records(self.ranking(dataset, month, min_total))
+            self._records.put(key, rows)
+        return rows
+
+    def outliers(self, dataset, month, min_total):
+        key = (dataset, month, min_total)
+        found = self._outliers.get(key)
+        if found is None:
+            list_outliers = nsw.list_outliers if dataset == "nsw" else vic.list_outliers
+            found = list_outliers(self.ranking(dataset, month, min_total).table())
+            self._outliers.put(key, found)
+        return found
+
+    # ---------- Queries ----------
+    def answer(self, query: dict) -> dict:
+        """Result for one query; errors are reported in the result, not raised."""
+        q = _with_defaults(query)
+        op = q.get("op")
+        if op not in OPS:
+            return {"ok": False, "error": f"Unknown op {op!r}. Use one of: {', '.join(OPS)}"}
+        key = _answer_key(q)
+        cached = self._answers.get(key) if key is not None else None
+        if cached is not None:
+            return cached
+        try:
+            if q["sort"] not in ("desc", "asc"):
+                raise ValueError("sort must be 'desc' or 'asc'")
+            result = self._run(op, q)
+            out = {"ok": True, "result": result}
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            out = {"ok": False, "error": str(e)}
+        if key is not None:
+            self._answers.put(key, out)
+        return out
+
+    def _run(self, op, q):
+        ascending = q["sort"] == "asc"
+        n = max(0, int(q["n"]))
+        agg = self.pax(q["dataset"]) if self.store is None else None
+        if agg is not None:
+            return self._run_pax(agg, op, q, ascending, n)
+        where = (q["dataset"], q["month"] or DEFAULTS["month"], int(q["min_total"]))
+        if op == "save":
+            path = q.get("path")
+            if not path:
+                raise ValueError("save needs a 'path'")
+            self.ranking(*where).table(ascending).to_csv(path, index=False)
+            return path
+        if self.store is not None:
+            return self._run_sql(op, where, ascending, n)
+        if op == "outliers":
+            low, high = self.outliers(*where)
+            return {"high": _records(high.sort_values("Total", ascending=False)),
+                    "low": _records(low.sort_values("Total"))}
+        return self._slice(op, self.records(*where), ascending, n)
+
+    def _run_pax(self, agg, op, q, ascending, n):
+        """
+        The ops on a Pax_* file: ``month`` is the financial year, ``min_total``
+        the minimum of the default metric (Pax_annual), which ranks the stops.
+        """
+        fin_year, metric, min_value = q["month"], agg.default_metric, float(q["min_total"])
+        if op == "save":
+            path = q.get("path")
+            if not path:
+                raise ValueError("save needs a 'path'")
+            agg.table(fin_year, metric, min_value, ascending).to_csv(path, index=False)
+            return path
+        if op == "outliers":
+            low, high = agg.outliers(metric, fin_year, min_value=min_value)
+            return {"high": _json_rows(high), "low": _json_rows(low)}
+        return self._slice(op, _json_rows(agg.table(fin_year, metric, min_value, ascending=True)), ascending, n)
+
+    @staticmethod
+    def _slice(op, rows, ascending, n):
+        """``op`` over ascending ``rows``: descending is their exact reverse (see Ranking)."""
+        if op == "table":
+            return rows if ascending else rows[::-1]
+        if op == "top":
+            return rows[:n] if ascending else rows[len(rows) - n:][::-1]
+        if op == "bottom":
+            return rows[len(rows) - n:] if ascending else rows[:n][::-1]
+        if op == "busiest":
+            return rows[-1] if rows else None
+        return len(rows)
+
+    def _run_sql(self, op, where, ascending, n):
+        """The same answers as ``_run``, each from one indexed query (LIMIT for top/bottom) on the store."""
+        dataset, month, min_total = where
+        if op == "outliers":
+            low, high = self.store.outliers(dataset, month, min_total)
+            return {"high": _records(high), "low": _records(low)}
+        if op == "table":
+            return _records(self.store.table(dataset, month, min_total, ascending))
+        if op == "count":
+            return self.store.count(dataset, month, min_total)
+        if op == "busiest":
+            rows = _records(self.store.top(dataset, month, 1, min_total))
+            return rows[0] if rows else None
+        # "top" is the head of the table in the chosen order and "bottom" its tail
+        quietest = (op == "top") == ascending
+        picked = (self.store.bottom if quietest else self.store.top)(dataset, month, n, min_total)
+        rows = _records(picked)
+        return rows if op == "top" else rows[::-1]
+
+    def run(self, lines, out):
+        """Answer every JSON line in ``lines``, writing JSON lines to ``out``; returns the count."""
+        count = 0
+        encoded = {}  # cached answers are the same object, so serialise each once
+        for i, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                query = json.loads(line)
+                answer = self.answer(query) if isinstance(query, dict) else \
+                    {"ok": False, "error": "query must be a JSON object"}
+            except json.JSONDecodeError as e:
+                query, answer = None, {"ok": False, "error": f"invalid JSON: {e}"}
+            body = encoded.get(id(answer))
+            if body is None:
+                body = json.dumps(answer)[1:]
+                if answer is self._answers.get(_answer_key(query)):
+                    encoded[id(answer)] = body
+            out.write(f'{{"line": {i}, "query": {json.dumps(query)}, {body}\n')
+            count += 1
+        return count
+
+
+def make_queries(n, months, seed=0, dataset="nsw") -> list:
+    """A realistic mix of ``n`` report queries over ``months``."""
+    rng = random.Random(seed)
+    ops = ["top"] * 4 + ["bottom"] * 2 + ["busiest", "count", "outliers", "table"]
+    thresholds = [0, 50, 200, 1000, 5000]
+    queries = []
+    for _ in range(n):
+        queries.append({
+            "dataset": dataset,
+            "op": rng.choice(ops),
+            "month": rng.choice(months),
+            "min_total": rng.choice(thresholds),
+            "sort": rng.choice(["desc", "asc"]),
+            "n": rng.choice([1, 5, 10, 20]),
+        })
+    return queries
+
+
+def _cmd_run(args):
+    store = None
+    if args.db:
+        from store import PatronageStore
+
+        store = PatronageStore(args.db)
+    session = BatchSession({k: v for k, v in (("nsw", args.nsw), ("vic", args.vic)) if v}, store=store)
+    out = open(args.output, "w", encoding="utf-8") if args.output != "-" else sys.stdout
+    try:
+        with open(args.queries, encoding="utf-8") as f:
+            start = time.perf_counter()
+            count = session.run(f, out)
+            seconds = time.perf_counter() - start
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    qps = count / seconds if seconds > 0 else math.inf
+    print(f"{count} queries in {seconds:.2f} s ({qps:,.0f} queries/s)", file=sys.stderr)
+    return 0
+
+
+def _cmd_generate(args):
+    months = PatronageCube.from_frame(nsw.load(args.nsw or nsw.CSV_PATH, report=False)).months
+    with open(args.out, "w", encoding="utf-8") as f:
+        for q in make_queries(args.count, months, seed=args.seed):
+            f.write(json.dumps(q) + "\n")
+    print("Wrote", args.out)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer patronage queries from a JSON Lines file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="answer every query in a file")
+    p.add_argument("queries")
+    p.add_argument("-o", "--output", default="-", help="JSON Lines output (default stdout)")
+    p.add_argument("--nsw", help="NSW CSV (default: the shipped file)")
+    p.add_argument("--vic", help="VIC CSV (default: the shipped file)")
+    p.add_argument("--db", help="answer from a SQLite store built with store.py instead of the CSVs")
+    p.set_defaults(func=_cmd_run)
+
+    p = sub.add_parser("generate", help="write a random NSW query file for throughput tests")
+    p.add_argument("count", type=int)
+    p.add_argument("out")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--nsw", help="NSW CSV to take month labels from")
+    p.set_defaults(func=_cmd_generate)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
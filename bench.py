@@ -0,0 +1,180 @@
+"""
+Pipeline benchmarks
+-------------------
+Times each stage of the NSW and VIC pipelines on synthetic data and records
+peak traced memory, then compares runs against a saved JSON baseline.
+
+    python bench.py run --sizes 10k,1M --out bench_baseline.json
+    python bench.py run --sizes 10k,1M --out bench_current.json
+    python bench.py compare bench_baseline.json bench_current.json --threshold 0.2
+
+``compare`` exits with status 1 when any stage got slower (or, with
+``--memory``, used more memory) by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import nsw
+import synthetic
+import vic
+from aggregate import pivot_sum
+from cube import PatronageCube
+from trips import clean_trip_column, clean_trip_value_nsw
+
+# Row-wise apply is only timed up to this size; it is the slow path being replaced.
+SCALAR_LIMIT = 1_000_000
+
+
+def _measure(fn, repeat):
+    """(median seconds over ``repeat`` runs, peak traced bytes of one extra run)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def nsw_stages(n_rows, workdir):
+    df = synthetic.nsw_frame(n_rows)
+    month = df["MonthYear"].iloc[len(df) // 2]
+    path = os.path.join(workdir, f"nsw_{n_rows}.csv")
+    df.to_csv(path, index=False)
+    processed = nsw.process_patronage(df, month=month, min_total=0)
+    keyed = pd.DataFrame({"Station": df["Station"], "Entry_Exit": df["Entry_Exit"],
+                          "Trip_num": clean_trip_column(df["Trip"], "nsw")})
+    stages = {
+        "read_csv": lambda: pd.read_csv(path),
+        "clean_trip_column": lambda: clean_trip_column(df["Trip"], "nsw"),
+        "process_patronage": lambda: nsw.process_patronage(df, month=month),
+        "list_outliers": lambda: nsw.list_outliers(processed),
+        "cube_build": lambda: PatronageCube.from_frame(df),
+        # aggregation step alone: pandas pivot_table vs the integer-code kernel
+        "aggregate_pivot_table": lambda: keyed.pivot_table(index="Station", columns="Entry_Exit", values="Trip_num",
+                                                           aggfunc="sum", fill_value=0),
+        "aggregate_pivot_sum": lambda: pivot_sum(keyed["Station"], keyed["Entry_Exit"], keyed["Trip_num"].to_numpy()),
+    }
+    if n_rows <= SCALAR_LIMIT:
+        stages["clean_trip_value_apply"] = lambda: df["Trip"].apply(clean_trip_value_nsw)
+    return stages
+
+
+def vic_stages(n_rows, workdir):
+    long = synthetic.vic_long_frame(n_rows)
+    month = long["Month"].iloc[len(long) // 2]
+    return {
+        "detect_schema": lambda: vic.detect_schema(long),
+        "process_patronage": lambda: vic.process_patronage(long, month=month),
+        # what one victoria() menu action pays before touching the data
+        "add_row_schema": lambda: (vic.column_map(long), vic.detect_schema(long)),
+    }
+
+
+SUITES = {"nsw": nsw_stages, "vic": vic_stages}
+
+
+def run(sizes, repeat=3, suites=tuple(SUITES), log=print) -> dict:
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            for suite in suites:
+                stages = SUITES[suite](n, workdir)
+                for stage, fn in stages.items():
+                    seconds, peak = _measure(fn, repeat)
+                    key = f"{suite}/{stage}/{n}"
+                    results["results"][key] = {"seconds": seconds, "peak_bytes": peak, "rows": n}
+                    log(f"{key:40s} {seconds * 1000:10.1f} ms  {peak / 2**20:9.1f} MiB")
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold=0.2, memory=False) -> list:
+    """Rows of (key, metric, baseline, current, ratio, regressed) for every shared stage."""
+    rows = []
+    metrics = ["seconds"] + (["peak_bytes"] if memory else [])
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        for metric in metrics:
+            b, c = base[metric], cur[metric]
+            ratio = c / b if b else float("inf") if c else 1.0
+            rows.append((key, metric, b, c, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _cmd_run(args):
+    sizes = [synthetic.parse_size(s) for s in args.sizes.split(",")]
+    suites = args.suites.split(",")
+    results = run(sizes, repeat=args.repeat, suites=suites)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print("Wrote", args.out)
+    return 0
+
+
+def _cmd_compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, threshold=args.threshold, memory=args.memory)
+    regressions = 0
+    for key, metric, b, c, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{key:40s} {metric:10s} {b:14.6g} → {c:14.6g}  x{ratio:5.2f}  {flag}")
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%} in {len(rows)} comparisons")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the patronage pipelines.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="time every stage and write a JSON result file")
+    p.add_argument("--sizes", default="10k,1M", help="comma separated row counts, e.g. 10k,1M,10M")
+    p.add_argument("--suites", default=",".join(SUITES))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", default="bench_results.json")
+    p.set_defaults(func=_cmd_run)
+
+    p = sub.add_parser("compare", help="flag stages that regressed against a baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    p.add_argument("--memory", action="store_true", help="also compare peak memory")
+    p.set_defaults(func=_cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Start-up benchmark
+------------------
+Measures, in fresh interpreters:
+
+- cold ``import main`` (and checks it pulls in neither pandas nor any dataset)
+- time until the first menu prompt of ``python main.py``
+- time until the NSW menu after choosing dataset 1 (this is where pandas and
+  the data are loaded).
+
+    python bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _time_python(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True)
+    return time.perf_counter() - start
+
+
+def _time_until(prompt: bytes, keys: bytes = b"") -> float:
+    """Seconds from launching ``main.py`` until ``prompt`` has been printed."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "main.py"], cwd=HERE, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        if keys:
+            proc.stdin.write(keys)
+            proc.stdin.flush()
+        seen = b""
+        while prompt not in seen:
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError(f"main.py exited before printing {prompt!r}")
+            seen += chunk
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def run(repeat=5) -> dict:
+    check = subprocess.run(
+        [sys.executable, "-c", "import sys, main; print('pandas' in sys.modules)"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    results = {
+        "pandas_imported_by_import_main": check.stdout.strip() == "True",
+        "python_startup_s": [_time_python("pass") for _ in range(repeat)],
+        "import_main_s": [_time_python("import main") for _ in range(repeat)],
+        "first_menu_s": [_time_until(b"Choose between") for _ in range(repeat)],
+        "nsw_menu_s": [_time_until(b"Choose an option", b"1\n") for _ in range(repeat)],
+    }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure main.py import and menu latency.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print("pandas imported by 'import main':", results.pop("pandas_imported_by_import_main"))
+    for name, samples in results.items():
+        print(f"{name:18s} median {statistics.median(samples) * 1000:8.1f} ms   "
+              f"min {min(samples) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Bounded caches
+--------------
+A small least-recently-used mapping shared by the modules that keep derived
+results in memory (rankings per threshold, batch answers, prompt answers,
+HTTP responses). Where a key can come from user input, a bounded cache stops
+memory from growing with every distinct key:
+
+    cache = LRUCache(maxsize=256)
+    value = cache.get(key)
+    if value is None:
+        value = compute(key)
+        cache.put(key, value)
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
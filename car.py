@@ -0,0 +1,258 @@
+"""
+Car ownership vs patronage
+--------------------------
+The ABS car ownership table (``CarOwnership_AllTimePeriod_DataType_EN_For_10_20.csv``)
+is wide: one row per (Area, "Data label") with a count column and a "%" column
+for every census from 1991 to 2021. ``CarOwnership`` melts it once, without a
+Python loop, into dense (area, census year, vehicles bucket) arrays of counts
+and percentages. The arrays are cached next to the CSV in ``<csv>.long.npz``
+and are rebuilt only when the CSV changes (the same check as the dataset
+cache).
+
+``AreaIndex`` is the area → station mapping, precomputed against the station
+axis of a ``PatronageCube``. ``compare`` sums every month's patronage per
+area and attaches each month's latest census in a single gather, so it
+returns every area and month as one frame:
+
+    car = CarOwnership.load()
+    car.frame()                                      # Area, Year, Vehicles, Count, Pct
+    compare(car, PatronageCube.from_frame(nsw_df))   # Area, Month, Census_year, Stations, Total, ...
+
+    python car.py                                    # the comparison for the shipped files
+
+Station membership follows the ABS 2021 boundaries. City of Sydney lists its
+stations. Greater Sydney is every station except the Hunter, Illawarra,
+South Coast, Southern Highlands and Central West stations. Edit the sets
+below to add an area.
+"""
+
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from aggregate import scatter_sum
+from datacache import CACHE_VERSION, _file_hash, _is_fresh, _save_npz, _source_info
+
+CAR_CSV_PATH = os.path.join(os.path.dirname(__file__), "CarOwnership_AllTimePeriod_DataType_EN_For_10_20.csv")
+LONG_SUFFIX = ".long.npz"
+
+NO_VEHICLES = "No motor vehicles"
+HOUSEHOLDS = "Total households"
+
+CITY_OF_SYDNEY = {
+    "Barangaroo", "Central", "Circular Quay", "Erskineville", "Gadigal", "Green Square", "Kings Cross",
+    "Macdonaldtown", "Martin Place", "Museum", "Newtown", "Redfern", "St James", "St Peters", "Town Hall",
+    "Waterloo", "Wynyard",
+}
+OUTSIDE_GREATER_SYDNEY = {
+    # Hunter and Lake Macquarie
+    "Aberdeen", "Adamstown", "Awaba", "Beresfield", "Booragul", "Branxton", "Broadmeadow", "Cardiff",
+    "Cockle Creek", "Dora Creek", "Dungog", "East Maitland", "Fassifern", "Greta", "Hamilton", "Hexham",
+    "High Street", "Hilldale", "Kotara", "Lochinvar", "Maitland", "Martins Creek", "Metford", "Mindaribba",
+    "Morisset", "Muswellbrook", "Newcastle Interchange", "Paterson", "Sandgate", "Scone", "Singleton", "Tarro",
+    "Telarah", "Teralba", "Thornton", "Victoria Street", "Wallarobba", "Warabrook", "Waratah", "Wirragulla",
+    "Wyee",
+    # Illawarra and South Coast
+    "Albion Park", "Austinmer", "Bellambi", "Berry", "Bomaderry", "Bombo", "Bulli", "Coalcliff", "Coledale",
+    "Coniston", "Corrimal", "Cringila", "Dapto", "Fairy Meadow", "Gerringong", "Helensburgh", "Kembla Grange",
+    "Kiama", "Lysaghts", "Minnamurra", "North Wollongong", "Oak Flats", "Otford", "Port Kembla",
+    "Port Kembla North", "Scarborough", "Shellharbour Junction", "Stanwell Park", "Thirroul", "Towradgi",
+    "Unanderra", "Wollongong", "Wombarra", "Woonona",
+    # Southern Highlands, Southern Tablelands and Central West
+    "Bathurst", "Bell", "Bowral", "Bundanoon", "Burradoo", "Exeter", "Goulburn", "Lithgow", "Marulan",
+    "Mittagong", "Moss Vale", "Rydal", "Tallong", "Tarana", "Wingello", "Yerrinbool", "Zig Zag",
+}
+NOT_STATIONS = {"UNKNOWN", "Domestic Bus", "International Bus"}
+AREAS = {"City of Sydney": (CITY_OF_SYDNEY, None), "Greater Sydney": (None, OUTSIDE_GREATER_SYDNEY)}
+
+
+def _station_key(name) -> str:
+    """'Central  Station' → 'Central' (whitespace collapsed, trailing 'Station' dropped)."""
+    name = " ".join(str(name).split())
+    return name[:-len(" Station")] if name.endswith(" Station") else name
+
+
+class CarOwnership:
+    """Car ownership as dense ``(area, census year, vehicles bucket)`` arrays of counts and percentages."""
+
+    def __init__(self, areas, years, buckets, counts, pct):
+        self.areas = list(areas)
+        self.years = np.asarray(years, dtype=np.int64)  # ascending
+        self.buckets = list(buckets)
+        self.counts = counts  # int64, -1 where the table has no value
+        self.pct = pct        # float64, NaN where the table has no value
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CarOwnership":
+        """Melt the wide table: every '<year>' column is a count, its '<year>%' partner the percentage."""
+        years = sorted(int(c) for c in df.columns if re.fullmatch(r"\d{4}", str(c).strip()))
+        if not years:
+            raise ValueError("No census year columns found in the car ownership table.")
+        area_codes, areas = pd.factorize(df["Area"])
+        bucket_codes, buckets = pd.factorize(df["Data label"])
+        keep = (area_codes >= 0) & (bucket_codes >= 0)
+        a, b = area_codes[keep], bucket_codes[keep]
+
+        def block(suffix):
+            cols = [f"{y}{suffix}" for y in years]
+            missing = [c for c in cols if c not in df.columns]
+            if missing:
+                raise ValueError(f"Missing car ownership column(s): {', '.join(missing)}")
+            return df.loc[keep, cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+        shape = (len(areas), len(years), len(buckets))
+        counts = np.full(shape, np.nan)
+        pct = np.full(shape, np.nan)
+        counts[a[:, None], np.arange(len(years)), b[:, None]] = block("")
+        pct[a[:, None], np.arange(len(years)), b[:, None]] = block("%")
+        counts = np.where(np.isnan(counts), -1, counts).astype(np.int64)
+        return cls(list(areas), years, list(buckets), counts, pct)
+
+    # ---------- Disk cache ----------
+    @classmethod
+    def load(cls, csv_path=CAR_CSV_PATH) -> "CarOwnership":
+        """The melted table from ``<csv>.long.npz`` if it still matches the CSV, else melted and cached."""
+        cached = cls.read_cache(csv_path)
+        if cached is not None:
+            return cached
+        car = cls.from_frame(pd.read_csv(csv_path))
+        try:
+            car.write_cache(csv_path)
+        except OSError:
+            pass
+        return car
+
+    def write_cache(self, csv_path) -> str:
+        meta = dict(_source_info(csv_path), sha1=_file_hash(csv_path), version=CACHE_VERSION, trip_style="car")
+        path = csv_path + LONG_SUFFIX
+        _save_npz(path, dict(areas=np.asarray(self.areas, dtype=str), years=self.years,
+                             buckets=np.asarray(self.buckets, dtype=str), counts=self.counts, pct=self.pct,
+                             __meta__=np.array(json.dumps(meta))))
+        return path
+
+    @classmethod
+    def read_cache(cls, csv_path):
+        try:
+            with np.load(csv_path + LONG_SUFFIX, allow_pickle=False) as z:
+                if not _is_fresh(json.loads(str(z["__meta__"])), csv_path, "car"):
+                    return None
+                return cls(z["areas"].tolist(), z["years"], z["buckets"].tolist(), z["counts"], z["pct"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # ---------- Lookups ----------
+    def _bucket(self, bucket) -> int:
+        try:
+            return self.buckets.index(bucket)
+        except ValueError:
+            raise KeyError(f"Unknown vehicles bucket '{bucket}'. Use one of: {', '.join(self.buckets)}") from None
+
+    def frame(self) -> pd.DataFrame:
+        """Long form: one row per (Area, Year, Vehicles)."""
+        a, y, b = np.indices(self.counts.shape).reshape(3, -1)
+        return pd.DataFrame({
+            "Area": np.asarray(self.areas, dtype=object)[a],
+            "Year": self.years[y],
+            "Vehicles": np.asarray(self.buckets, dtype=object)[b],
+            "Count": self.counts.ravel(),
+            "Pct": self.pct.ravel(),
+        })
+
+    def census_for(self, years) -> np.ndarray:
+        """Position of the latest census at or before each year (the first census for earlier years)."""
+        pos = np.searchsorted(self.years, np.asarray(years, dtype=np.int64), side="right") - 1
+        return np.clip(pos, 0, len(self.years) - 1)
+
+
+class AreaIndex:
+    """(area, station) membership pairs against one cube's station axis, sorted by area."""
+
+    def __init__(self, areas, area_codes, station_codes):
+        self.areas = list(areas)
+        self.area_codes = area_codes
+        self.station_codes = station_codes
+
+    @classmethod
+    def from_stations(cls, stations, areas=None) -> "AreaIndex":
+        """``areas`` maps a name to (stations in it, or None for all; stations left out, or None)."""
+        areas = AREAS if areas is None else areas
+        keys = pd.Index([_station_key(s) for s in stations])
+        real = ~keys.isin(NOT_STATIONS)
+        area_codes, station_codes = [], []
+        for code, (inside, outside) in enumerate(areas.values()):
+            member = real & (keys.isin(inside) if inside is not None else True)
+            if outside is not None:
+                member &= ~keys.isin(outside)
+            rows = np.flatnonzero(member)
+            area_codes.append(np.full(len(rows), code, dtype=np.intp))
+            station_codes.append(rows)
+        return cls(list(areas), np.concatenate(area_codes), np.concatenate(station_codes))
+
+    def __len__(self):
+        return len(self.area_codes)
+
+    def stations(self, area, names) -> list:
+        """Station names (from ``names``, the indexed station axis) mapped to ``area``."""
+        code = self.areas.index(area)
+        return [names[s] for s in self.station_codes[self.area_codes == code]]
+
+    def totals(self, cube) -> tuple:
+        """(Entry+Exit totals, stations with rows) per (area, month), each of shape (areas, months)."""
+        n_a, n_m = len(self.areas), len(cube.months)
+        flat = (self.area_codes[:, None] * n_m + np.arange(n_m)).ravel()
+        trips = cube.values.sum(axis=2)[self.station_codes].ravel()
+        seen = cube.present[self.station_codes].ravel().astype(np.int64)
+        return (scatter_sum(flat, trips, n_a * n_m).reshape(n_a, n_m),
+                scatter_sum(flat, seen, n_a * n_m).reshape(n_a, n_m))
+
+
+def compare(car: CarOwnership, cube, index: AreaIndex = None) -> pd.DataFrame:
+    """
+    Patronage per area and month next to the area's latest census: households,
+    share without a car, and trips per household. Areas missing from either
+    side are left out.
+    """
+    index = AreaIndex.from_stations(cube.stations) if index is None else index
+    totals, stations = index.totals(cube)
+    area_pos = pd.Index(car.areas).get_indexer(index.areas)
+    kept = np.flatnonzero(area_pos >= 0)
+    month_years = pd.to_datetime(pd.Series(cube.months, dtype=object), format="%b-%y", errors="coerce").dt.year
+    census = car.census_for(month_years.fillna(car.years[-1]).to_numpy(dtype=np.int64))
+
+    a, m = np.meshgrid(kept, np.arange(len(cube.months)), indexing="ij")
+    a, m = a.ravel(), m.ravel()
+    c, y = area_pos[a], census[m]
+    households = car.counts[c, y, car._bucket(HOUSEHOLDS)]
+    total = totals[a, m]
+    return pd.DataFrame({
+        "Area": np.asarray(index.areas, dtype=object)[a],
+        "Month": np.asarray(cube.months, dtype=object)[m],
+        "Census_year": car.years[y],
+        "Stations": stations[a, m],
+        "Total": total,
+        "Households": households,
+        "No_vehicle_pct": car.pct[c, y, car._bucket(NO_VEHICLES)],
+        "Trips_per_household": np.where(households > 0, total / np.maximum(households, 1), np.nan).round(2),
+    })
+
+
+def main(argv=None):
+    import nsw
+    from cube import PatronageCube
+
+    argv = sys.argv[1:] if argv is None else argv
+    csv_path = argv[0] if argv else CAR_CSV_PATH
+    if not os.path.exists(csv_path):
+        print("Car ownership CSV file not found at", csv_path)
+        return 1
+    car = CarOwnership.load(csv_path)
+    print(compare(car, PatronageCube.from_frame(nsw.load(report=False))).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Compact NSW patronage layout
+----------------------------
+Dictionary-encodes the repeated text columns of the raw NSW frame and keeps
+trips as plain integers:
+
+- MonthYear, Station, Station_Type and Entry_Exit → small int codes plus one
+  dictionary each (the station dictionary can be shared between datasets)
+- Trip → int32 cleaned value plus a packed "censored" bitmask marking the
+  'Less than N' rows, instead of strings and a nullable Int64 column.
+
+Processing runs directly on the codes:
+
+    compact = load_compact(CSV_PATH)
+    compact.process("Dec-24")          # same table as process_patronage(df, "Dec-24")
+
+Run as a script for a memory report against the pandas layout used today:
+
+    python compact.py NSW_Train_patronage_per_station.csv
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from aggregate import scatter_sum
+from datacache import load_dataset
+from trips import clean_trip_column
+
+ENCODED = ("MonthYear", "Station", "Station_Type", "Entry_Exit")
+
+
+def _code_dtype(n):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode(values, dictionary=None):
+    """Codes of ``values`` against ``dictionary`` (extended with unseen labels)."""
+    if dictionary is None:
+        codes, uniques = pd.factorize(values, sort=True)
+        return codes.astype(_code_dtype(len(uniques))), pd.Index(uniques)
+    codes = dictionary.get_indexer(values)
+    unseen = pd.Index(pd.unique(values[(codes < 0) & pd.notna(values)]))
+    if len(unseen):
+        dictionary = dictionary.append(unseen)
+        codes = dictionary.get_indexer(values)
+    return codes.astype(_code_dtype(len(dictionary))), dictionary
+
+
+class CompactPatronage:
+    """Raw NSW rows as int codes, int32 trips and a censored bitmask."""
+
+    def __init__(self, codes: dict, dictionaries: dict, trips, censored_bits, n_rows, ids=None):
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.trips = trips
+        self.censored_bits = censored_bits
+        self.n_rows = n_rows
+        self.ids = ids
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def stations(self) -> pd.Index:
+        return self.dictionaries["Station"]
+
+    @property
+    def censored(self) -> np.ndarray:
+        """Boolean mask of rows whose Trip was reported as 'Less than N'."""
+        return np.unpackbits(self.censored_bits, count=self.n_rows).astype(bool)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, stations: pd.Index = None) -> "CompactPatronage":
+        """
+        Encode a raw NSW frame. Pass ``stations`` to reuse (and extend) a station
+        dictionary shared with another dataset.
+        """
+        month_col = "MonthYear" if "MonthYear" in df.columns else "Month"
+        codes, dictionaries = {}, {}
+        for col in ENCODED:
+            src = month_col if col == "MonthYear" else col
+            if src not in df.columns:
+                continue
+            shared = stations if col == "Station" else None
+            codes[col], dictionaries[col] = _encode(df[src], shared)
+
+        if "Trip_num" in df.columns and df["Trip_num"].dtype == np.int64:
+            trips = df["Trip_num"].to_numpy()
+        else:
+            trips = clean_trip_column(df["Trip"], "nsw").to_numpy(dtype=np.int64)
+        info = np.iinfo(np.int32)
+        if len(trips) and (trips.max() > info.max or trips.min() < info.min):
+            raise ValueError("Trip values do not fit in int32.")
+        censored = df["Trip"].astype(str).str.strip().str.lower().str.startswith("less than").to_numpy(dtype=bool)
+
+        ids = None
+        if "_id" in df.columns and pd.api.types.is_integer_dtype(df["_id"]):
+            ids = pd.to_numeric(df["_id"], downcast="integer").to_numpy()
+        return cls(codes, dictionaries, trips.astype(np.int32), np.packbits(censored), len(df), ids)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Categorical frame view (codes are shared, not copied into strings)."""
+        data = {}
+        if self.ids is not None:
+            data["_id"] = self.ids
+        for col, codes in self.codes.items():
+            data[col] = pd.Categorical.from_codes(codes, categories=self.dictionaries[col])
+        data["Trip"] = self.trips
+        data["Censored"] = self.censored
+        return pd.DataFrame(data)
+
+    # ---------- Processing on codes ----------
+    def process(self, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
+        """Same Station/Entry/Exit/Total table as process_patronage, computed from codes."""
+        months = self.dictionaries["MonthYear"]
+        m = months.get_indexer([month])[0]
+        if m < 0:
+            raise ValueError(f"No rows found for month '{month}'.")
+        rows = self.codes["MonthYear"] == m
+        station = self.codes["Station"][rows].astype(np.intp)
+        keep = station >= 0
+        station = station[keep]
+        n = len(self.stations)
+
+        present = np.bincount(station, minlength=n) > 0
+        sums = {}
+        directions = self.dictionaries.get("Entry_Exit", pd.Index([]))
+        ee = self.codes["Entry_Exit"][rows][keep] if "Entry_Exit" in self.codes else None
+        trips = self.trips[rows][keep].astype(np.int64)
+        for label in ("Entry", "Exit"):
+            d = directions.get_indexer([label])[0]
+            if ee is None or d < 0:
+                sums[label] = np.zeros(n, dtype=np.int64)
+                continue
+            hit = ee == d
+            sums[label] = scatter_sum(station[hit], trips[hit], n)
+
+        idx = np.flatnonzero(present)
+        idx = idx[np.argsort(np.asarray(self.stations[idx], dtype=object), kind="stable")]
+        pivot = pd.DataFrame({
+            "Station": self.stations[idx].astype(str),
+            "Entry": pd.array(sums["Entry"][idx], dtype="Int64"),
+            "Exit": pd.array(sums["Exit"][idx], dtype="Int64"),
+        })
+        pivot["Total"] = pivot["Entry"] + pivot["Exit"]
+
+        pivot = pivot[pivot["Total"] >= min_total].copy()
+        pivot.sort_values("Total", ascending=ascending, inplace=True)
+        pivot.reset_index(drop=True, inplace=True)
+        return pivot
+
+    # ---------- Memory ----------
+    def nbytes(self) -> dict:
+        """Bytes per logical column, dictionaries included."""
+        out = {}
+        if self.ids is not None:
+            out["_id"] = self.ids.nbytes
+        for col, codes in self.codes.items():
+            out[col] = codes.nbytes + int(self.dictionaries[col].memory_usage(deep=True))
+        out["Trip"] = self.trips.nbytes + self.censored_bits.nbytes
+        return out
+
+
+def load_compact(csv_path: str, stations: pd.Index = None, report=True) -> CompactPatronage:
+    """Load ``csv_path`` (through the binary cache) straight into the compact layout."""
+    return CompactPatronage.from_frame(load_dataset(csv_path, trip_style="nsw", report=report), stations)
+
+
+def memory_report(df: pd.DataFrame, compact: CompactPatronage) -> pd.DataFrame:
+    """
+    Deep memory of today's layout (raw frame with the nullable Int64 Trip_num
+    that process_patronage adds) against the compact layout, per column.
+    """
+    today = df.drop(columns="Trip_num", errors="ignore").copy()
+    today["Trip_num"] = clean_trip_column(today["Trip"], "nsw").astype("Int64")
+    before = today.memory_usage(deep=True, index=False)
+    before["Trip"] = before["Trip"] + before.pop("Trip_num")
+    if "Month" in before and "MonthYear" not in before:
+        before["MonthYear"] = before.pop("Month")
+    after = pd.Series(compact.nbytes())
+    report = pd.DataFrame({"before_bytes": before, "after_bytes": after}).fillna(0).astype(int)
+    report.loc["TOTAL"] = report.sum()
+    report["reduction"] = (report["before_bytes"] / report["after_bytes"].where(report["after_bytes"] > 0)).round(1)
+    return report
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    csv_path = argv[0] if argv else "NSW_Train_patronage_per_station.csv"
+    df = load_dataset(csv_path, trip_style="nsw", report=False)
+    compact = CompactPatronage.from_frame(df)
+    report = memory_report(df, compact)
+    print(report.to_string())
+    total = report.loc["TOTAL"]
+    print(f"\n{len(df)} rows: {total.before_bytes / 2**20:.2f} MiB → {total.after_bytes / 2**20:.2f} MiB "
+          f"({total.reduction}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Station × month × direction cube
+--------------------------------
+One-time build of the NSW patronage data into a dense NumPy array so that a
+month's Station/Entry/Exit/Total table is a slice instead of a re-scan of the
+raw rows.
+
+    cube = PatronageCube.from_frame(df)
+    cube.month_table("Dec-24")                       # same as process_patronage(df, "Dec-24")
+    cube.range_table(cube.month_range("Jan-25", "Mar-25"))   # a quarter in one call
+    cube.range_table(cube.financial_year("FY24-25"))
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from aggregate import scatter_sum
+from profiling import profiled
+from trips import clean_trip_column
+
+_FINANCIAL_YEAR = re.compile(r"^FY(\d{2}|\d{4})-(\d{2}|\d{4})$", re.IGNORECASE)
+
+
+def _month_order(labels):
+    """Sort 'Aug-24' style labels chronologically; unknown formats keep file order."""
+    dates = pd.to_datetime(pd.Series(labels, dtype=object), format="%b-%y", errors="coerce")
+    if dates.isna().any():
+        return list(labels)
+    return [labels[i] for i in np.argsort(dates.to_numpy(), kind="stable")]
+
+
+def _direction_codes(entry_exit) -> np.ndarray:
+    """0 for Entry, 1 for Exit, -1 for anything else; ValueError when there is no Entry_Exit column."""
+    if entry_exit is None:
+        # process_patronage sums Trip per station for such files; the cube has no
+        # undirected cell, so every Total would silently be 0
+        raise ValueError("The data has no Entry_Exit column; Entry/Exit totals need one "
+                         "(use process_patronage for Trip totals per station).")
+    return np.where(entry_exit == "Entry", 0, np.where(entry_exit == "Exit", 1, -1))
+
+
+class PatronageCube:
+    """
+    Dense (station, month, direction) array of summed trips.
+
+    ``values[s, m, 0]`` is the Entry total and ``values[s, m, 1]`` the Exit total
+    for ``stations[s]`` in ``months[m]``. ``present[s, m]`` records whether the
+    station had any row that month, so month tables list exactly the stations
+    ``process_patronage`` would.
+    """
+
+    def __init__(self, stations, months, values, present):
+        self.months = list(months)
+        self._month_pos = {m: i for i, m in enumerate(self.months)}
+        self._names = list(stations)
+        self._station_pos = {name: i for i, name in enumerate(self._names)}
+        self._index = pd.Index(stations)
+        self._alphabetical = True
+        # Station axis is over-allocated so that add() grows it in amortized O(1)
+        self._values = values
+        self._present = present
+
+    @property
+    def stations(self) -> pd.Index:
+        if self._index is None:
+            self._index = pd.Index(self._names)
+        return self._index
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:len(self._names)]
+
+    @property
+    def present(self) -> np.ndarray:
+        return self._present[:len(self._names)]
+
+    @classmethod
+    def empty(cls) -> "PatronageCube":
+        return cls([], [], np.zeros((0, 0, 2), dtype=np.int64), np.zeros((0, 0), dtype=bool))
+
+    @classmethod
+    @profiled("cube.from_frame")
+    def from_frame(cls, df: pd.DataFrame) -> "PatronageCube":
+        """Build the cube from a raw NSW frame (MonthYear/Month, Station, Entry_Exit, Trip)."""
+        month_col = "MonthYear" if "MonthYear" in df.columns else "Month"
+        station_codes, stations = pd.factorize(df["Station"], sort=True)
+        month_codes, months = pd.factorize(df[month_col])
+        months = list(months)
+        order = _month_order(months)
+        remap = np.array([order.index(m) for m in months], dtype=np.intp)
+
+        dir_codes = _direction_codes(df.get("Entry_Exit"))
+        if "Trip_num" in df.columns and df["Trip_num"].dtype == np.int64:
+            # already cleaned (e.g. loaded through the binary dataset cache)
+            trips = df["Trip_num"].to_numpy()
+        else:
+            trips = clean_trip_column(df["Trip"], "nsw").to_numpy(dtype=np.int64)
+
+        n_s, n_m = len(stations), len(order)
+        keep = (station_codes >= 0) & (month_codes >= 0)
+        cell = station_codes[keep] * n_m + remap[month_codes[keep]]
+        present = np.bincount(cell, minlength=n_s * n_m).reshape(n_s, n_m) > 0
+
+        counted = keep & (dir_codes >= 0)
+        flat = (station_codes[counted] * n_m + remap[month_codes[counted]]) * 2 + dir_codes[counted]
+        values = scatter_sum(flat, trips[counted], n_s * n_m * 2).reshape(n_s, n_m, 2)
+        return cls(stations, order, values, present)
+
+    # ---------- Incremental updates ----------
+    def station_index(self, station: str) -> int:
+        """Position of ``station`` on the station axis, adding it if it is new."""
+        pos = self._station_pos.get(station)
+        if pos is not None:
+            return pos
+        pos = len(self._names)
+        if pos == len(self._values):
+            grow = max(pos, 16)
+            self._values = np.concatenate([self._values, np.zeros((grow,) + self._values.shape[1:], np.int64)])
+            self._present = np.concatenate([self._present, np.zeros((grow,) + self._present.shape[1:], bool)])
+        if self._names and not (self._alphabetical and station > self._names[-1]):
+            self._alphabetical = False
+        self._names.append(station)
+        self._station_pos[station] = pos
+        self._index = None
+        return pos
+
+    def add_many(self, stations, months, entry_exit, trips):
+        """
+        Fold a batch of raw rows into the cube (vectorized version of ``add``).
+        """
+        station_codes, station_labels = pd.factorize(stations)
+        month_codes, month_labels = pd.factorize(months)
+        # register new months first: inserting one shifts the positions of later months
+        for m in month_labels:
+            if m not in self._month_pos:
+                self._add_month(m)
+        month_map = np.array([self._month_pos[m] for m in month_labels], dtype=np.intp)
+        station_map = np.array([self.station_index(st) for st in station_labels], dtype=np.intp)
+
+        keep = (station_codes >= 0) & (month_codes >= 0)
+        s = station_map[station_codes[keep]]
+        m = month_map[month_codes[keep]]
+        self._present[s, m] = True
+
+        d = _direction_codes(entry_exit)[keep]
+        counted = d >= 0
+        trips = np.asarray(trips, dtype=np.int64)[keep]
+        np.add.at(self._values, (s[counted], m[counted], d[counted]), trips[counted])
+
+    def station_name(self, s: int) -> str:
+        return self._names[s]
+
+    def _add_month(self, month: str) -> int:
+        """Insert a new month at its chronological position."""
+        order = _month_order(self.months + [month])
+        pos = order.index(month)
+        self._values = np.insert(self._values, pos, 0, axis=1)
+        self._present = np.insert(self._present, pos, False, axis=1)
+        self.months = order
+        self._month_pos = {m: i for i, m in enumerate(self.months)}
+        return pos
+
+    def add(self, station: str, month: str, direction: str, trips: int) -> tuple:
+        """
+        Fold one raw row into the cube without touching any other cell.
+        Returns the (station, month) indices that changed.
+        """
+        m = self._month_pos.get(month)
+        if m is None:
+            m = self._add_month(month)
+        s = self.station_index(station)
+        self._present[s, m] = True
+        if direction == "Entry":
+            self._values[s, m, 0] += trips
+        elif direction == "Exit":
+            self._values[s, m, 1] += trips
+        return s, m
+
+    # ---------- Month helpers ----------
+    def month_index(self, month: str) -> int:
+        try:
+            return self._month_pos[month]
+        except KeyError:
+            raise ValueError(f"No rows found for month '{month}'.") from None
+
+    def month_range(self, start: str, end: str) -> list:
+        """All month labels from ``start`` to ``end`` inclusive."""
+        i, j = self.month_index(start), self.month_index(end)
+        if i > j:
+            raise ValueError(f"Month range '{start}'..'{end}' is reversed.")
+        return self.months[i:j + 1]
+
+    def financial_year(self, fy: str) -> list:
+        """
+        Months of an Australian financial year, e.g. 'FY24-25' or 'FY2024-25'
+        → Jul-24 .. Jun-25 (those present).
+        """
+        match = _FINANCIAL_YEAR.match(fy.strip())
+        if match is None or (int(match[2]) - int(match[1])) % 100 != 1:
+            raise ValueError(f"'{fy}' is not a financial year; use FY24-25 or FY2024-25.")
+        start = int(match[1]) % 100
+        wanted = pd.date_range(f"20{start:02d}-07-01", periods=12, freq="MS").strftime("%b-%y")
+        months = [m for m in self.months if m in set(wanted)]
+        if not months:
+            raise ValueError(f"No months found for financial year '{fy}'.")
+        return months
+
+    # ---------- Tables ----------
+    def range_totals(self, months) -> tuple:
+        """Summed (stations × 2) Entry/Exit block and presence mask over ``months``."""
+        if isinstance(months, str):
+            months = [months]
+        idx = np.array([self.month_index(m) for m in months], dtype=np.intp)
+        if len(idx) == 0:
+            raise ValueError("No months given.")
+        contiguous = np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx)))
+        sel = slice(idx[0], idx[-1] + 1) if contiguous else idx
+        return self.values[:, sel, :].sum(axis=1), self.present[:, sel].any(axis=1)
+
+    @profiled("cube.range_table")
+    def range_table(self, months, min_total=200, ascending=False) -> pd.DataFrame:
+        """Station/Entry/Exit/Total over one or more months, filtered and sorted like process_patronage."""
+        block, present = self.range_totals(months)
+        rows = np.flatnonzero(present)
+        if not self._alphabetical:
+            # pivot_table lists stations alphabetically; stations added later sit at the end
+            rows = rows[np.argsort(np.asarray(self._names, dtype=object)[rows], kind="stable")]
+        pivot = pd.DataFrame({
+            "Station": self.stations[rows],
+            "Entry": pd.array(block[rows, 0], dtype="Int64"),
+            "Exit": pd.array(block[rows, 1], dtype="Int64"),
+        })
+        pivot["Total"] = pivot["Entry"] + pivot["Exit"]
+
+        pivot = pivot[pivot["Total"] >= min_total].copy()
+        pivot.sort_values("Total", ascending=ascending, inplace=True)
+        pivot.reset_index(drop=True, inplace=True)
+        return pivot
+
+    @profiled("cube.month_table")
+    def month_table(self, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
+        return self.range_table([month], min_total=min_total, ascending=ascending)
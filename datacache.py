@@ -0,0 +1,186 @@
+"""
+Binary dataset cache
+--------------------
+Keeps an ``.npz`` copy of a parsed CSV next to the source file so later runs
+skip ``pd.read_csv`` and Trip cleaning:
+
+    df = load_dataset(CSV_PATH, trip_style="nsw")
+
+Text columns are stored dictionary-encoded (int32 codes + unique values),
+numeric columns as-is, object columns that mix strings with numbers as a JSON
+list (so every value keeps its type), and when ``trip_style`` is given the cleaned trip
+counts are stored as an int64 ``Trip_num`` column. The cache is rebuilt when
+the CSV's size changes, or when its mtime changes and its content hash no
+longer matches. Nothing is pickled.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from profiling import profiled, stage
+from trips import clean_trip_column
+
+CACHE_SUFFIX = ".cache.npz"
+CACHE_VERSION = 2
+
+
+def cache_path(csv_path: str) -> str:
+    return csv_path + CACHE_SUFFIX
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_info(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_meta(path: str):
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            return json.loads(str(z["__meta__"]))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _is_fresh(meta, csv_path: str, trip_style) -> bool:
+    if not meta or meta.get("version") != CACHE_VERSION or meta.get("trip_style") != trip_style:
+        return False
+    src = _source_info(csv_path)
+    if src["size"] != meta["size"]:
+        return False
+    if src["mtime_ns"] == meta["mtime_ns"]:
+        return True
+    # touched but maybe not changed (copied, checked out again, ...)
+    return _file_hash(csv_path) == meta["sha1"]
+
+
+def _save_npz(path: str, arrays: dict):
+    """``np.savez`` to a uniquely named temp file beside ``path``, then an atomic replace."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _restamp(path: str, meta: dict, csv_path: str):
+    """Record the CSV's current size/mtime in a cache whose content hash still matched, so it isn't re-hashed."""
+    with np.load(path, allow_pickle=False) as z:
+        arrays = {name: z[name] for name in z.files}
+    arrays["__meta__"] = np.array(json.dumps(dict(meta, **_source_info(csv_path))))
+    _save_npz(path, arrays)
+
+
+def write_cache(df: pd.DataFrame, csv_path: str, trip_style=None, parse_seconds=None) -> str:
+    """Store ``df`` (as read from ``csv_path``) in the binary cache."""
+    arrays, columns = {}, []
+    if trip_style is not None and "Trip" in df.columns:
+        trips = df["Trip_num"] if "Trip_num" in df.columns else clean_trip_column(df["Trip"], trip_style)
+        arrays["trip_num"] = trips.to_numpy(dtype=np.int64)
+    for i, name in enumerate(df.columns.drop("Trip_num", errors="ignore")):
+        col = df[name]
+        key = f"c{i}"
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_extension_array_dtype(col):
+            arrays[key] = col.to_numpy()
+            columns.append({"name": name, "kind": "numeric"})
+        elif pd.api.types.infer_dtype(col, skipna=True) not in ("string", "empty"):
+            # e.g. numbers and strings in one object column: encoding them as text would
+            # bring 1 back as "1"; TypeError for values JSON can't hold
+            arrays[key] = np.array(json.dumps(col.to_numpy(dtype=object).tolist()))
+            columns.append({"name": name, "kind": "object"})
+        else:
+            codes, uniques = pd.factorize(col, use_na_sentinel=True)
+            arrays[key] = codes.astype(np.int32)
+            arrays[key + "_values"] = np.asarray(uniques.astype(str), dtype=str)
+            columns.append({"name": name, "kind": "text", "dtype": str(col.dtype)})
+
+    meta = dict(_source_info(csv_path), sha1=_file_hash(csv_path), version=CACHE_VERSION,
+                trip_style=trip_style, columns=columns, rows=len(df), parse_seconds=parse_seconds)
+    arrays["__meta__"] = np.array(json.dumps(meta))
+    path = cache_path(csv_path)
+    _save_npz(path, arrays)
+    return path
+
+
+def read_cache(path: str) -> pd.DataFrame:
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["__meta__"]))
+        data = {}
+        for i, col in enumerate(meta["columns"]):
+            key = f"c{i}"
+            if col["kind"] == "numeric":
+                data[col["name"]] = z[key]
+            elif col["kind"] == "object":
+                values = json.loads(str(z[key]))
+                data[col["name"]] = np.array(values + [None], dtype=object)[:-1]  # never a 2-d array
+            else:
+                # build the (small) dictionary once, then gather; code -1 becomes missing
+                values = pd.array(z[key + "_values"].astype(object), dtype=col["dtype"])
+                data[col["name"]] = values.take(z[key].astype(np.intp), allow_fill=True)
+        if "trip_num" in z.files:
+            data["Trip_num"] = z["trip_num"]
+    # the arrays are freshly loaded and owned by nobody else; skip the defensive copy
+    return pd.DataFrame(data, copy=False)
+
+
+@profiled("load_dataset")
+def load_dataset(csv_path: str, trip_style=None, report=True) -> pd.DataFrame:
+    """
+    ``pd.read_csv(csv_path)`` backed by the binary cache.
+
+    With ``trip_style`` ("nsw" or "vic") the frame also carries an int64
+    ``Trip_num`` column cleaned with the matching rules.
+    """
+    path = cache_path(csv_path)
+    start = time.perf_counter()
+    meta = _read_meta(path)
+    if _is_fresh(meta, csv_path, trip_style):
+        with stage("cache_read") as s:
+            df = read_cache(path)
+            s.rows_out = len(df)
+        if meta["mtime_ns"] != _source_info(csv_path)["mtime_ns"]:
+            try:
+                _restamp(path, meta, csv_path)  # touched but unchanged: hash once, not on every start
+            except OSError:
+                pass
+        if report:
+            took = time.perf_counter() - start
+            msg = f"Loaded {os.path.basename(csv_path)} from cache in {took * 1000:.1f} ms"
+            if meta.get("parse_seconds"):
+                msg += f" (CSV parse took {meta['parse_seconds'] * 1000:.1f} ms, {meta['parse_seconds'] / took:.0f}x slower)"
+            print(msg)
+        return df
+
+    with stage("read_csv") as s:
+        df = pd.read_csv(csv_path)
+        s.rows_out = len(df)
+    if trip_style is not None and "Trip" in df.columns:
+        with stage("clean_trip_column", len(df)) as s:
+            df["Trip_num"] = clean_trip_column(df["Trip"], trip_style)
+            s.rows_out = len(df)
+    parse_seconds = time.perf_counter() - start
+    try:
+        with stage("cache_write", len(df)):
+            write_cache(df, csv_path, trip_style, parse_seconds)
+    except (OSError, TypeError) as e:
+        if report:
+            print("Could not write dataset cache:", e)
+    if report:
+        print(f"Parsed {os.path.basename(csv_path)} in {parse_seconds * 1000:.1f} ms (cache written)")
+    return df
@@ -0,0 +1,170 @@
+"""
+Incremental patronage engine
+----------------------------
+Keeps the NSW Station/Entry/Exit/Total result up to date as rows are added
+through the CLI, without copying the raw dataset or re-running
+``process_patronage``:
+
+- the new row's trips are folded into the cube cell it touches
+- only that station is moved within the sorted ranking (bisect)
+- raw rows are buffered in growable column lists and only turned into a
+  DataFrame (together with the original rows) when something asks for it.
+
+Each (month, min_total) view hands out a cached ``Ranking``, so flipping the
+sort order never re-sorts.
+"""
+
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+from cube import PatronageCube
+from ranking import Ranking
+from trips import clean_trip_value_nsw
+
+
+class RowBuffer:
+    """Column-wise buffer of appended raw rows (list appends are amortized O(1))."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._data = {c: [] for c in self.columns}
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self, row: dict):
+        for c in row:
+            if c not in self._data:
+                self.columns.append(c)
+                self._data[c] = [None] * self._n
+        for c in self.columns:
+            self._data[c].append(row.get(c))
+        self._n += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._data, columns=self.columns)
+
+    def clear(self):
+        self._data = {c: [] for c in self.columns}
+        self._n = 0
+
+
+class RankedView:
+    """
+    Stations of one (month, min_total) kept in ascending (Total, Station) order
+    as a list of sort keys, so a single station can be re-ranked in place.
+    """
+
+    def __init__(self, cube: PatronageCube, month: str, min_total=200):
+        self.cube = cube
+        self.month = month
+        self.min_total = min_total
+        self._keys = {}
+        self._order = []
+        self._ranking = None
+
+        m = cube.month_index(month)
+        totals = cube.values[:, m, :].sum(axis=1)
+        keep = np.flatnonzero(cube.present[:, m] & (totals >= min_total))
+        names = cube.stations
+        for s in keep.tolist():
+            self._keys[s] = (int(totals[s]), names[s])
+        self._order = sorted((k, s) for s, k in self._keys.items())
+
+    def update(self, s: int):
+        """Re-rank station ``s`` after its cube cell for this month changed."""
+        old = self._keys.pop(s, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (old, s))]
+        m = self.cube.month_index(self.month)
+        total = int(self.cube.values[s, m, :].sum())
+        if self.cube.present[s, m] and total >= self.min_total:
+            key = (total, self.cube.station_name(s))
+            self._keys[s] = key
+            insort(self._order, (key, s))
+        self._ranking = None
+
+    def ranking(self) -> Ranking:
+        """Materialize the current order (cached until the next update)."""
+        if self._ranking is None:
+            rows = np.fromiter((s for _, s in self._order), dtype=np.intp, count=len(self._order))
+            m = self.cube.month_index(self.month)
+            block = self.cube.values[rows, m, :]
+            self._ranking = Ranking(self.cube.stations[rows], block[:, 0], block[:, 1], presorted=True)
+        return self._ranking
+
+
+class IncrementalPatronage:
+    """
+    Raw NSW rows plus an up-to-date ranking for the month being viewed.
+
+        engine = IncrementalPatronage(df)
+        engine.add({"MonthYear": "Dec-24", "Station": "X", "Entry_Exit": "Entry", "Trip": "120"})
+        engine.table("Dec-24", min_total=200, ascending=False)
+        engine.ranking("Dec-24", min_total=200).top(10)
+    """
+
+    def __init__(self, df, cube=None, columns=None, journal=None, n_rows=None):
+        # ``df`` may also be a callable returning the raw frame (when ``cube``,
+        # ``columns`` and ``n_rows`` come from a snapshot); only frame() calls it
+        columns = list(df.columns) if columns is None else list(columns)
+        self._base = df
+        self._n_base = n_rows if callable(df) else len(df)
+        self.month_col = "MonthYear" if "MonthYear" in columns else "Month"
+        self.cube = PatronageCube.from_frame(df) if cube is None else cube
+        self.buffer = RowBuffer(columns)
+        self.journal = journal
+        self._views = {}
+
+    @property
+    def n_rows(self):
+        """Raw rows including the added ones, or None while a lazy base has no known size."""
+        return None if self._n_base is None else self._n_base + len(self.buffer)
+
+    def __len__(self):
+        n = self.n_rows
+        return len(self.frame()) if n is None else n
+
+    def add(self, row: dict, log=True):
+        """Append one raw row and fold it into the totals (and the journal, if any)."""
+        if self.journal is not None and log:
+            self.journal.append(row)
+        station, month = row.get("Station"), row.get(self.month_col)
+        trips = clean_trip_value_nsw(row.get("Trip"))
+        if "Trip_num" in self.buffer.columns:
+            row = dict(row, Trip_num=trips)
+        self.buffer.append(row)
+        if pd.isna(station) or pd.isna(month):
+            return
+        s, _ = self.cube.add(station, month, row.get("Entry_Exit"), trips)
+        for (view_month, _), view in self._views.items():
+            if view_month == month:
+                view.update(s)
+        if self.journal is not None and log:
+            self.journal.maybe_snapshot(self.cube, rows=self.n_rows)
+
+    def view(self, month="Dec-24", min_total=200) -> RankedView:
+        """The ranked view for (month, min_total), built on first use and kept up to date."""
+        key = (month, min_total)
+        if key not in self._views:
+            self._views[key] = RankedView(self.cube, month, min_total=min_total)
+        return self._views[key]
+
+    def ranking(self, month="Dec-24", min_total=200) -> Ranking:
+        return self.view(month, min_total=min_total).ranking()
+
+    def table(self, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
+        return self.ranking(month, min_total=min_total).table(ascending=ascending)
+
+    def frame(self) -> pd.DataFrame:
+        """The full raw dataset including added rows (buffered rows are merged here, once)."""
+        if callable(self._base):
+            self._base = self._base()
+        if len(self.buffer):
+            self._base = pd.concat([self._base, self.buffer.to_frame()], ignore_index=True)
+            self.buffer.clear()
+        self._n_base = len(self._base)
+        return self._base
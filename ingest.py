@@ -0,0 +1,303 @@
+"""
+Multi-file NSW ingestion
+------------------------
+Merges a directory (or glob) of monthly NSW patronage releases into a single
+dataset. The files are hashed first, on a thread pool. A file whose content
+has already been ingested is skipped, whatever its name (same SHA-1). The
+other files are parsed on a process pool, one task per file. Each worker
+reads its CSV, cleans Trip into Trip_num and sends back compact buffers
+(dictionary-encoded text columns, as in the dataset cache), never a
+DataFrame.
+
+The driver keeps one row per key. When a key appears in several files it
+keeps the row from the latest file, because a later release revises the
+months it repeats. ``_id`` starts again at 1 in every release, so it cannot
+identify a row across files; the merged rows are numbered again.
+
+    df = ingest("releases/")                        # or "releases/*.csv", or a list of paths
+    df = ingest("releases/", known=manifest)         # skips files in the manifest, adds the new ones
+
+    python ingest.py releases/ -o NSW_all.csv       # merges into NSW_all.csv (+ NSW_all.csv.manifest.json)
+    python ingest.py --bench 100x20000 --workers 1,2,4
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import nsw
+from cube import _month_order
+from datacache import _file_hash
+from trips import clean_trip_column
+
+KEY = ["MonthYear", "Station", "Entry_Exit"]
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def expand(sources) -> list:
+    """A directory, glob, file or list of them → the CSV paths, sorted within each directory/glob."""
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for src in map(str, sources):
+        if os.path.isdir(src):
+            found = sorted(glob.glob(os.path.join(src, "*.csv")))
+        elif glob.has_magic(src):
+            found = sorted(glob.glob(src))
+        elif os.path.exists(src):
+            found = [src]
+        else:
+            raise ValueError(f"No such file or directory: {src}")
+        paths.extend(p for p in found if p not in paths)
+    return paths
+
+
+def hash_files(paths, workers=None) -> list:
+    """SHA-1 of every file; hashlib releases the GIL, so threads are enough."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_file_hash, paths))
+
+
+class Release:
+    """One parsed file as compact buffers: text columns dictionary-encoded, numbers as-is."""
+
+    def __init__(self, n_rows, columns):
+        self.n_rows = n_rows
+        self.columns = columns  # {name: ("text", int32 codes, uniques, dtype) or ("numeric", values)}
+
+    @classmethod
+    def encode(cls, df: pd.DataFrame) -> "Release":
+        columns = {}
+        for name in df.columns:
+            col = df[name]
+            if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_extension_array_dtype(col):
+                columns[name] = ("numeric", col.to_numpy())
+            else:
+                codes, uniques = pd.factorize(col, use_na_sentinel=True)
+                columns[name] = ("text", codes.astype(np.int32), np.asarray(uniques, dtype=object), str(col.dtype))
+        return cls(len(df), columns)
+
+
+def read_release(path) -> Release:
+    """Parse one release and clean Trip into Trip_num; this runs in the workers."""
+    df = pd.read_csv(path)
+    missing = [c for c in KEY + ["Trip"] if c not in df.columns]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} is not an NSW patronage file (missing {', '.join(missing)})")
+    df["Trip_num"] = clean_trip_column(df["Trip"], "nsw")
+    return Release.encode(df)
+
+
+def _as_text(col):
+    """A part's column as ("text", codes, uniques, dtype); numbers become the strings read_csv would have kept."""
+    if col[0] == "text":
+        return col
+    codes, uniques = pd.factorize(col[1], use_na_sentinel=True)
+    return "text", codes.astype(np.int32), np.asarray(uniques.astype(str), dtype=object), None
+
+
+def _merge_text(parts, name):
+    """Global (codes, uniques, dtype) of a text column: the small per-file dictionaries are factorized together."""
+    cols = [_as_text(p.columns[name]) if name in p.columns else None for p in parts]
+    present = [col for col in cols if col is not None]
+    remap, uniques = pd.factorize(np.concatenate([col[2] for col in present]))
+    codes, offset = [], 0
+    for p, col in zip(parts, cols):
+        if col is None:
+            codes.append(np.full(p.n_rows, -1, dtype=np.int32))
+            continue
+        _, local, local_uniques, _ = col
+        table = np.append(remap[offset:offset + len(local_uniques)], -1).astype(np.int32)
+        codes.append(table[local])  # local code -1 picks the appended -1
+        offset += len(local_uniques)
+    dtype = next((col[3] for col in present if col[3] is not None), "str")
+    return np.concatenate(codes), np.asarray(uniques, dtype=object), dtype
+
+
+def _merge_numeric(parts, name):
+    return np.concatenate([p.columns[name][1] if name in p.columns else np.full(p.n_rows, np.nan)
+                           for p in parts])
+
+
+def merge_releases(parts) -> pd.DataFrame:
+    """
+    One frame from ``parts`` (``Release``, oldest first) keeping the last row
+    of every (MonthYear, Station, Entry_Exit), months in calendar order and
+    ``_id`` renumbered from 1.
+
+    The key is the three dictionary codes packed into one int64, so the
+    de-duplication is a single hash-table pass over integers, and strings are
+    only materialised for the rows that are kept.
+    """
+    parts = [p for p in parts if p.n_rows]
+    if not parts:
+        return pd.DataFrame(columns=["_id", *KEY, "Trip", "Trip_num"])
+    names = list(dict.fromkeys(name for p in parts for name in p.columns))
+    # a column is text when any release has it as text: an all-digit Trip reads as
+    # int64 in one monthly drop and as strings ("Less than 50") in the next
+    kinds = {name: {p.columns[name][0] for p in parts if name in p.columns} for name in names}
+    text = {name: _merge_text(parts, name) for name in names if "text" in kinds[name] or name in KEY}
+
+    key = np.zeros(sum(p.n_rows for p in parts), dtype=np.int64)
+    for name in KEY:
+        codes, uniques, _ = text[name]
+        key = key * (len(uniques) + 1) + (codes + 1)
+    keep = ~pd.Series(key).duplicated(keep="last").to_numpy()
+
+    months, month_uniques, _ = text["MonthYear"]
+    order = pd.Index(_month_order(list(month_uniques))).get_indexer(month_uniques)
+    rows = np.flatnonzero(keep)
+    rows = rows[np.argsort(np.append(order, -1)[months[rows]], kind="stable")]
+
+    data = {}
+    for name in names:
+        if name in text:
+            codes, uniques, dtype = text[name]
+            data[name] = pd.array(uniques, dtype=dtype).take(codes[rows].astype(np.intp), allow_fill=True)
+        else:
+            data[name] = _merge_numeric(parts, name)[rows]
+    df = pd.DataFrame(data, copy=False)
+    if "_id" in df.columns:
+        df["_id"] = np.arange(1, len(df) + 1)
+    return df
+
+
+def ingest(sources, known=None, base=None, workers=None, report=False) -> pd.DataFrame:
+    """
+    One NSW frame (with Trip_num) from every release in ``sources``.
+
+    ``known`` maps content hashes to manifest entries; files listed there are
+    skipped, and the files ingested now are added to it. ``base`` is an
+    earlier consolidated frame; rows from the new files replace its rows with
+    the same key. ``workers=1`` parses in this process without a pool.
+    """
+    known = {} if known is None else known
+    paths = expand(sources)
+    start = time.perf_counter()
+    todo, seen = [], set(known)
+    for path, digest in zip(paths, hash_files(paths, workers)):
+        if digest not in seen:
+            seen.add(digest)
+            todo.append((path, digest))
+    hashed = time.perf_counter()
+
+    if workers == 1 or len(todo) <= 1:
+        parts = [read_release(path) for path, _ in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(read_release, [path for path, _ in todo]))
+    for (path, digest), part in zip(todo, parts):
+        known[digest] = {"file": os.path.basename(path), "rows": part.n_rows}
+    if base is not None:
+        parts.insert(0, Release.encode(base))
+    merged = merge_releases(parts)
+
+    if report:
+        took = time.perf_counter() - start
+        print(f"{len(paths)} file(s): {len(paths) - len(todo)} already ingested, {len(todo)} parsed; "
+              f"{len(merged):,} rows after de-duplication in {took:.2f} s (hashing {hashed - start:.2f} s)")
+    return merged
+
+
+def read_manifest(out) -> dict:
+    try:
+        with open(out + MANIFEST_SUFFIX, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ingest_into(sources, out, workers=None, report=True) -> pd.DataFrame:
+    """Merge new releases into the consolidated CSV ``out`` and record their hashes beside it."""
+    known = read_manifest(out)
+    base = nsw.load(out, report=False) if known and os.path.exists(out) else None
+    before = dict(known)
+    merged = ingest(sources, known=known, base=base, workers=workers, report=report)
+    if known == before and base is not None:
+        return merged
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out) or ".", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            merged.drop(columns="Trip_num").to_csv(f, index=False)
+        os.replace(tmp, out)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    with open(out + MANIFEST_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(known, f, indent=1)
+    return merged
+
+
+# ---------- Scaling report ----------
+def write_releases(directory, n_files, rows_per_file, seed=0) -> list:
+    """Synthetic monthly drops; each one repeats (revises) the previous month."""
+    import synthetic
+
+    df = synthetic.nsw_frame(rows_per_file * n_files // 2, n_months=n_files, seed=seed)
+    months = synthetic.month_labels(n_files)
+    by_month = {m: part for m, part in df.groupby("MonthYear", sort=False)}
+    paths = []
+    for i, month in enumerate(months):
+        parts = [by_month[m] for m in months[max(0, i - 1):i + 1] if m in by_month]
+        release = pd.concat(parts, ignore_index=True)
+        release["_id"] = np.arange(1, len(release) + 1)
+        path = os.path.join(directory, f"nsw_{i:03d}_{month}.csv")
+        release.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def scaling_report(n_files, rows_per_file, workers, log=print) -> list:
+    """Time ``ingest`` of ``n_files`` synthetic releases at each worker count."""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_releases(tmp, n_files, rows_per_file)
+        log(f"{n_files} files x ~{rows_per_file:,} rows, {os.cpu_count()} CPUs")
+        rows, base = [], None
+        for w in workers:
+            start = time.perf_counter()
+            df = ingest(tmp, workers=w)
+            took = time.perf_counter() - start
+            base = base or took
+            rows.append((w, took))
+            log(f"{w:>4d} worker(s) {took:8.2f} s  x{base / took:5.2f}  ({len(df):,} rows)")
+    return rows
+
+
+def main(argv=None):
+    import synthetic
+
+    parser = argparse.ArgumentParser(description="Merge a directory of NSW monthly releases into one CSV.")
+    parser.add_argument("sources", nargs="*", help="directories, globs or CSV files")
+    parser.add_argument("-o", "--out", help="consolidated CSV (new releases are merged into it)")
+    parser.add_argument("--workers", default=None, help="worker processes (comma separated with --bench)")
+    parser.add_argument("--bench", metavar="FILESxROWS", help="scaling report on synthetic releases, e.g. 100x20000")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        n_files, rows = args.bench.lower().split("x")
+        cpus = os.cpu_count() or 1
+        workers = [int(w) for w in args.workers.split(",")] if args.workers else list(range(1, cpus + 1))
+        scaling_report(int(n_files), synthetic.parse_size(rows), workers)
+        return 0
+    if not args.sources or not args.out:
+        parser.error("give the releases to ingest and -o OUT.csv")
+    workers = int(args.workers) if args.workers else None
+    try:
+        df = ingest_into(args.sources, args.out, workers=workers)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Wrote {len(df):,} rows to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
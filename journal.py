@@ -0,0 +1,191 @@
+"""
+Row journal and snapshots
+-------------------------
+Rows added through the CLI are appended to a JSON Lines journal next to the
+dataset (``<csv>.journal.jsonl``). An insert is one short line appended to
+the end of the file, and nothing is ever rewritten. Every
+``snapshot_every`` rows the NSW cube (the aggregated state) is written
+sorted to ``<csv>.snapshot.npz``, together with the journal byte offset it
+covers. On the next start the cube comes from the snapshot and only the
+journal tail after that offset is replayed. The CSV is not reprocessed:
+
+    journal = Journal(CSV_PATH)
+    engine = journal.open_engine(load)     # snapshot + journal tail, CSV parsed only if needed
+    engine.add(row)                        # folded into the cube and appended to the journal
+
+The snapshot is ignored, and rebuilt from the CSV plus the whole journal,
+in three cases: the CSV changed (same size/mtime/hash check as the dataset
+cache), the journal is shorter than the offset, or the format version
+differs. A torn last line left by a crash is cut off when the journal is
+opened.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from cube import PatronageCube
+from datacache import CACHE_VERSION, _file_hash, _is_fresh, _save_npz, _source_info
+from incremental import IncrementalPatronage
+from profiling import profiled
+from trips import clean_trip_column
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+SNAPSHOT_SUFFIX = ".snapshot.npz"
+
+
+class Journal:
+    """Append-only log of added raw rows for one CSV, plus the snapshot of its aggregated state."""
+
+    def __init__(self, csv_path, snapshot_every=1000, fsync=False):
+        self.csv_path = csv_path
+        self.path = csv_path + JOURNAL_SUFFIX
+        self.snapshot_path = csv_path + SNAPSHOT_SUFFIX
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.since_snapshot = 0
+        self.columns = []  # raw CSV columns, recorded in snapshots
+        self._source = None  # CSV size/mtime/hash, taken once: the CSV itself is never written
+        self._file = None
+        self._repair()
+
+    # ---------- Journal ----------
+    def _repair(self):
+        """Cut a torn (newline-less) last line so later appends start on a fresh line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            keep = size
+            while keep > 0:
+                step = min(keep, 1 << 16)
+                f.seek(keep - step)
+                cut = f.read(step).rfind(b"\n")
+                if cut >= 0:
+                    keep = keep - step + cut + 1
+                    break
+                keep -= step
+            f.truncate(keep)
+
+    def size(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def append(self, row: dict):
+        """Write one row as a single appended line."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(row, default=str) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.since_snapshot += 1
+
+    def maybe_snapshot(self, cube: PatronageCube, rows=None):
+        """Snapshot ``cube`` once ``snapshot_every`` rows have been appended since the last snapshot."""
+        if self.snapshot_every and self.since_snapshot >= self.snapshot_every:
+            self.write_snapshot(cube, rows=rows)
+
+    def rows(self, start=0, stop=None) -> list:
+        """Journal rows between byte offsets ``start`` and ``stop`` (default: to the end)."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read() if stop is None else f.read(max(0, stop - start))
+        return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+    def frame(self, columns, start=0, stop=None) -> pd.DataFrame:
+        """Journal rows as a frame with the CSV's ``columns``; Trip_num is cleaned from Trip like on load."""
+        df = pd.DataFrame(self.rows(start, stop), columns=[c for c in columns if c != "Trip_num"])
+        if "Trip_num" in columns:
+            df["Trip_num"] = clean_trip_column(df["Trip"], "nsw")
+        return df
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------- Snapshots ----------
+    def write_snapshot(self, cube: PatronageCube, columns=None, rows=None) -> str:
+        """
+        Store ``cube`` (stations sorted) with the journal offset it includes and
+        the raw row count (CSV plus journal) when known; atomic replace.
+        """
+        if self._file is not None:
+            self._file.flush()
+        names = np.asarray(list(cube.stations), dtype=str)
+        order = np.argsort(names, kind="stable")
+        if self._source is None:
+            self._source = dict(_source_info(self.csv_path), sha1=_file_hash(self.csv_path))
+        meta = dict(self._source, version=CACHE_VERSION, trip_style="nsw", journal_offset=self.size(),
+                    columns=list(columns or self.columns), rows=rows)
+        _save_npz(self.snapshot_path, dict(stations=names[order], months=np.asarray(cube.months, dtype=str),
+                                           values=cube.values[order], present=cube.present[order],
+                                           __meta__=np.array(json.dumps(meta))))
+        self.since_snapshot = 0
+        return self.snapshot_path
+
+    def read_snapshot(self):
+        """(cube, meta) from a snapshot that still matches the CSV and journal, else None."""
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as z:
+                meta = json.loads(str(z["__meta__"]))
+                if not _is_fresh(meta, self.csv_path, "nsw") or meta["journal_offset"] > self.size():
+                    return None
+                cube = PatronageCube(z["stations"].tolist(), z["months"].tolist(), z["values"], z["present"])
+        except (OSError, KeyError, ValueError):
+            return None
+        return cube, meta
+
+    # ---------- Startup ----------
+    @profiled("journal.open_engine")
+    def open_engine(self, load, report=True) -> IncrementalPatronage:
+        """
+        An ``IncrementalPatronage`` that logs its adds here. From a fresh
+        snapshot only the journal tail is replayed and ``load`` (which returns
+        the raw CSV frame) is called lazily, when the raw rows are asked for.
+        Otherwise the CSV is loaded and the whole journal replayed, and a
+        snapshot is written for next time.
+        """
+        start = time.perf_counter()
+        snap = self.read_snapshot()
+        if snap is not None:
+            cube, meta = snap
+            offset, columns = meta["journal_offset"], meta["columns"]
+            self.columns = columns
+
+            def base():
+                return pd.concat([load(), self.frame(columns, stop=offset)], ignore_index=True)
+
+            engine = IncrementalPatronage(base, cube=cube, columns=columns, journal=self, n_rows=meta.get("rows"))
+            source = "snapshot"
+        else:
+            df = load()
+            columns, offset = list(df.columns), 0
+            self.columns = columns
+            engine = IncrementalPatronage(df, journal=self)
+            source = "CSV"
+
+        tail = self.rows(offset)
+        for row in tail:
+            engine.add(row, log=False)
+        self.since_snapshot = len(tail)  # the replayed tail counts toward the next snapshot
+        if snap is None or len(tail) >= self.snapshot_every:
+            try:
+                self.write_snapshot(engine.cube, rows=engine.n_rows)
+            except OSError as e:
+                if report:
+                    print("Could not write snapshot:", e)
+        if report:
+            took = (time.perf_counter() - start) * 1000
+            print(f"Opened from {source} and replayed {len(tail)} journal row(s) in {took:.1f} ms")
+        return engine
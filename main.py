@@ -1,20 +1,9 @@
-#!/usr/bin/env python3
-import pandas as pd
-import os
-import sys
-import re
-
-
-# NSW_train_patronage = pd.read_csv('NSW_Train_patronage_per_station.csv')
-# VIC_train_patronage = pd.read_csv('Victoria_Train_patronage_per_station.csv')
-
-# Modified_NSW_train_patronage = NSW_train_patronage.str.strip('_id')
-
 #!/usr/bin/env python3
 """
-NSW Train Patronage CLI
------------------------
-Interactive text-based UI to process and explore NSW Train patronage data.
+Train Patronage CLI
+-------------------
+Interactive text-based UI to process and explore NSW and VIC train patronage
+data and City of Sydney car ownership.
 
 Features:
 - Clean and process data (Trip → numeric, pivot Entry/Exit, sum totals).
@@ -24,524 +13,435 @@ Features:
 - Options to view top/bottom stations, outliers, busiest station, etc.
 - Add new rows of data via prompts (column by column).
 - Save the processed dataset to CSV.
+
+The processing itself lives in importable modules (nsw.py, vic.py, ...); this
+file is only the menus. Importing it has no side effects and does not import
+pandas until a dataset is opened.
 """
 
-import pandas as pd
 import os
 import sys
 
-# File paths (adjust if needed)
-CSV_PATH = os.path.join(os.path.dirname(__file__), "NSW_Train_patronage_per_station.csv")
-PROCESSED_OUT = os.path.join(os.path.dirname(__file__), "processed_patronage_dec24.csv")
-
-def what():
-    def clean_trip_value(x):
-        """Convert Trip string values to numeric. Treat 'Less than 50' as 25."""
-        s = str(x).strip().replace(",", "")
-        if s.lower().startswith("less than"):
-            # e.g. 'Less than 50' → midpoint = 25
-            for p in s.split()[::-1]:
-                if p.isdigit():
-                    return int(int(p) // 2)
-            return 25
-        try:
-            return int(float(s))
-        except:
-            return 0
-
-
-    def process_patronage(df, month="Dec-24", min_total=200, ascending=False):
-        """
-        Process the raw dataframe:
-        - keep only rows for the requested month
-        - convert Trip to numeric
-        - pivot Entry/Exit into columns then sum totals per Station
-        - drop stations with Total < min_total
-        - return dataframe sorted by Total
-        """
-        d = df.copy()
-        month_col = "MonthYear" if "MonthYear" in d.columns else "Month"
-        d = d[d[month_col] == month].copy()
-
-        if d.empty:
-            raise ValueError(f"No rows found for month '{month}'.")
-
-        d["Trip_num"] = d["Trip"].apply(clean_trip_value).astype("Int64")
-
-        if "Entry_Exit" in d.columns:
-            pivot = d.pivot_table(
-                index="Station",
-                columns="Entry_Exit",
-                values="Trip_num",
-                aggfunc="sum",
-                fill_value=0,
-            )
-            for c in ["Entry", "Exit"]:
-                if c not in pivot.columns:
-                    pivot[c] = 0
-            pivot = pivot.reset_index().rename_axis(None, axis=1)
-            pivot["Total"] = pivot["Entry"] + pivot["Exit"]
-        else:
-            pivot = d.groupby("Station", as_index=False).agg(Total=("Trip_num", "sum"))
-            pivot["Entry"] = pd.NA
-            pivot["Exit"] = pd.NA
-
-        pivot = pivot[pivot["Total"] >= min_total].copy()
-        pivot.sort_values("Total", ascending=ascending, inplace=True)
-        pivot.reset_index(drop=True, inplace=True)
-        return pivot
-
-
-    def list_outliers(df):
-        """Find outliers using mean ± 2*std."""
-        mean = df["Total"].mean()
-        std = df["Total"].std()
-        high = df[df["Total"] > mean + 2 * std]
-        low = df[df["Total"] < max(0, mean - 2 * std)]
-        return low, high
-
-
-    def main():
-        if not os.path.exists(CSV_PATH):
-            print("CSV file not found at", CSV_PATH)
-            sys.exit(1)
-
-        df = pd.read_csv(CSV_PATH)
-
-        sort_desc = True
-        month = "Dec-24"
-        min_total = 200
-        processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-
-        while True:
-            print("\n=== NSW Patronage CLI ===")
-            print("1) Show top 10 stations")
-            print("2) Show bottom 10 stations")
-            print(f"3) Toggle sort order (currently {'descending' if sort_desc else 'ascending'})")
-            print("4) Add a row of data (Entry or Exit record)")
-            print(f"5) Save processed CSV to {PROCESSED_OUT}")
-            print("0) Exit")
-
-            choice = input("Choose an option: ").strip()
-
-            if choice == "1":
-                print(processed.head(10).to_string(index=False))
-            elif choice == "2":
-                print(processed.tail(10).to_string(index=False))
-            elif choice == "3":
-                sort_desc = not sort_desc
-                processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                print("Sort order now", "descending" if sort_desc else "ascending")
-        
-            elif choice == "4":
-                # Add one new row interactively
-                station = input("Station name: ").strip()
-                month_in = input("MonthYear (e.g., Dec-24): ").strip() or month
-                ee = input("Entry or Exit (Entry/Exit): ").strip().title()
-                trip = input("Trip value (number or 'Less than 50'): ").strip()
-
-                new = {
-                    "MonthYear": month_in,
-                    "Station": station,
-                    "Entry_Exit": ee,
-                    "Trip": trip,
-                }
-                # Fill missing original columns if needed
-                for c in df.columns:
-                    if c not in new:
-                        new[c] = None
-                df = pd.concat([df, pd.DataFrame([new])], ignore_index=True)
-                processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                print("Row added. Station totals updated.")
-        
-            elif choice == "5":
-                processed.to_csv(PROCESSED_OUT, index=False)
-                print("Saved processed CSV to", PROCESSED_OUT)
-            elif choice == "0":
-                print("going back to home...")
-                dataset_home()
-            else:
-                print("Invalid option. Try again.")
-
+from profiling import action, render
 
 
-    if __name__ == "__main__":
-        main()
-        
-
-
-def victoria():
+def what():
+    """NSW train patronage menu."""
+    from journal import Journal
+    from nsw import CSV_PATH, PROCESSED_OUT, load
+
+    if not os.path.exists(CSV_PATH):
+        print("CSV file not found at", CSV_PATH)
+        sys.exit(1)
+
+    # Built once (from the last snapshot plus the journal of added rows when
+    # there is one); every month/sort query below is a slice of the cube and
+    # added rows only touch the station they belong to
+    try:
+        engine = Journal(CSV_PATH).open_engine(load)
+    except ValueError as e:
+        print("Cannot open", CSV_PATH + ":", e)
+        sys.exit(1)
+    cube = engine.cube
+
+    sort_desc = True
+    month = "Dec-24"
+    min_total = 200
+    processed = engine.table(month, min_total=min_total, ascending=not sort_desc)
+    series = None  # station × month time series, built on first use and after adds
 
-    CSV_PATH = os.path.join(os.path.dirname(__file__), "Victoria_Train_patronage_per_station.csv")
-    PROCESSED_OUT = os.path.join(os.path.dirname(__file__), "vic_processed_patronage_dec24.csv")
-
-
-    # ---------- Helpers ----------
-    def _snake(s: str) -> str:
-        """Normalize a column name to lower snake_case."""
-        s = re.sub(r"\s+", "_", str(s).strip())
-        s = s.replace("-", "_").replace("/", "_")
-        s = re.sub(r"_+", "_", s)
-        return s.lower()
-
-
-    def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-        """Return a copy with normalized snake_case columns."""
-        d = df.copy()
-        d.columns = [_snake(c) for c in d.columns]
-        return d
-
-
-    def find_column(d: pd.DataFrame, candidates) -> str:
-        """
-        Given a normalized DataFrame and a list of candidate column names (lower snake),
-        return the first existing one or raise a helpful error.
-        """
-        for name in candidates:
-            if name in d.columns:
-                return name
-        raise KeyError(
-            "Could not find a required column. Looked for any of: "
-            + ", ".join(candidates)
-            + f". Columns present: {list(d.columns)}"
-        )
-
-
-    def normalise_entry_exit(val: str) -> str:
-        """Map variations to 'Entry' or 'Exit'."""
-        if val is None:
-            return None
-        s = str(val).strip().lower()
-        if s in {"entry", "entries", "in"}:
-            return "Entry"
-        if s in {"exit", "exits", "out"}:
-            return "Exit"
-        # fallback: try to guess
-        if "ent" in s or s.startswith("in"):
-            return "Entry"
-        if "ex" in s or s.startswith("out"):
-            return "Exit"
-        return str(val)  # leave as-is; will become its own column if pivoted
-
-
-    def clean_trip_value(x):
-        """
-        Convert Trip string values to numeric.
-        Handles:
-        - 'Less than 50', 'less than 50', '<50', '< 50', etc. → midpoint of last number (50→25)
-        - '12,345' and other thousand separators
-        - blanks → 0
-        """
-        if pd.isna(x):
-            return 0
-        s = str(x).strip().replace(",", "").replace(" ", "")
-        sl = s.lower()
-
-        # Detect 'less than' or '<' patterns
-        if "lessthan" in sl or sl.startswith("<"):
-            # extract the last number
-            nums = re.findall(r"\d+", s)
-            if nums:
-                n = int(nums[-1])
-                return max(0, n // 2)  # midpoint heuristic
-            return 25  # sensible default
-
-        # General numeric extraction
-        nums = re.findall(r"[-+]?\d+", s)
-        if nums:
+    while True:
+        print("\n=== NSW Patronage CLI ===")
+        print("1) Show top 10 stations")
+        print("2) Show bottom 10 stations")
+        print(f"3) Toggle sort order (currently {'descending' if sort_desc else 'ascending'})")
+        print("4) Add a row of data (Entry or Exit record)")
+        print(f"5) Save processed CSV to {PROCESSED_OUT}")
+        print(f"6) Change month (currently {month})")
+        print("7) Show totals for a month range (e.g., a quarter or FY24-25)")
+        print("8) Show fastest growing / declining stations (month-over-month or year-over-year)")
+        print("0) Exit")
+
+        choice = action("nsw", input("Choose an option: ").strip())
+
+        if choice == "1":
+            ranking = engine.ranking(month, min_total=min_total)
+            print(render(ranking.head(10, ascending=not sort_desc)))
+        elif choice == "2":
+            ranking = engine.ranking(month, min_total=min_total)
+            print(render(ranking.tail(10, ascending=not sort_desc)))
+        elif choice == "3":
+            sort_desc = not sort_desc
+            processed = engine.table(month, min_total=min_total, ascending=not sort_desc)
+            print("Sort order now", "descending" if sort_desc else "ascending")
+
+        elif choice == "4":
+            # Add one new row interactively
+            station = input("Station name: ").strip()
+            month_in = input("MonthYear (e.g., Dec-24): ").strip() or month
+            ee = input("Entry or Exit (Entry/Exit): ").strip().title()
+            trip = input("Trip value (number or 'Less than 50'): ").strip()
+
+            new = {
+                "MonthYear": month_in,
+                "Station": station,
+                "Entry_Exit": ee,
+                "Trip": trip,
+            }
+            engine.add(new)  # also appended to the journal next to the CSV
+            processed = engine.table(month, min_total=min_total, ascending=not sort_desc)
+            series = None
+            print("Row added. Station totals updated.")
+
+        elif choice == "5":
+            processed.to_csv(PROCESSED_OUT, index=False)
+            print("Saved processed CSV to", PROCESSED_OUT)
+        elif choice == "6":
+            print("Available months:", ", ".join(cube.months))
+            new_month = input("Enter month label exactly as in CSV (e.g., Dec-24): ").strip()
+            if new_month:
+                try:
+                    processed = engine.table(new_month, min_total=min_total, ascending=not sort_desc)
+                    month = new_month
+                    print("Month changed to", month)
+                except ValueError as e:
+                    print("Error after changing month:", e)
+        elif choice == "7":
+            span = input("Enter a financial year (e.g., FY24-25) or start,end months (e.g., Jan-25,Mar-25): ").strip()
             try:
-                return int(nums[-1])
-            except Exception:
-                pass
-
-        # Last resort
-        try:
-            return int(float(s))
-        except Exception:
-            return 0
-
-
-    def detect_schema(df: pd.DataFrame):
-        """
-        Detect key columns from a variety of plausible names.
-        Returns a dict with keys: month, station, entry_exit, trip (normalized names).
-        """
-        d = normalize_columns(df)
-
-        month_col = find_column(d, ["monthyear", "month", "period"])
-        station_col = find_column(d, ["station", "stop", "stop_name"])
-        # Direction / Entry_Exit column might be missing if already wide format
-        entry_exit_col = None
-        for c in ["entry_exit", "entry_or_exit", "direction", "in_out", "entryexit", "entry__exit"]:
-            if c in d.columns:
-                entry_exit_col = c
-                break
-
-        trip_col = None
-        for c in ["trip", "trips", "patronage", "count", "volume"]:
-            if c in d.columns:
-                trip_col = c
-                break
-
-        # Check for already wide format (Entry / Exit columns present)
-        wide_entry = "entry" in d.columns
-        wide_exit = "exit" in d.columns
-
-        if not (trip_col or (wide_entry and wide_exit)):
-            raise KeyError(
-                "Could not find a trips/patronage column or separate Entry/Exit columns. "
-                "Expected one of: trip, trips, patronage, count, volume OR both 'Entry' and 'Exit' columns."
-            )
-
-        return {
-            "month": month_col,
-            "station": station_col,
-            "entry_exit": entry_exit_col,  # may be None if wide
-            "trip": trip_col,              # may be None if wide
-            "is_wide": (wide_entry and wide_exit),
-        }
-
-
-    # ---------- Core processing ----------
-    def process_patronage(df: pd.DataFrame, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
-        """
-        Processing pipeline:
-        - filter to month
-        - compute Entry, Exit, Total per Station (from long or wide formats)
-        - filter stations with Total >= min_total
-        - sort by Total
-        Returns columns: Station, Entry, Exit, Total
-        """
-        if df.empty:
-            raise ValueError("Input dataframe is empty.")
-
-        d = normalize_columns(df)
-        schema = detect_schema(df)
-
-        month_col = schema["month"]
-        station_col = schema["station"]
-        entry_exit_col = schema["entry_exit"]
-        trip_col = schema["trip"]
-        is_wide = schema["is_wide"]
-
-        # Filter by month
-        d = d[d[month_col] == month].copy()
-        if d.empty:
-            raise ValueError(f"No rows found for month '{month}'. Check the exact month codes in your CSV.")
-
-        # Build Entry/Exit/Total
-        if is_wide:
-            # Expect 'entry' and 'exit' columns already numeric
-            for col in ["entry", "exit"]:
-                if col in d.columns:
-                    d[col] = pd.to_numeric(d[col], errors="coerce").fillna(0).astype(int)
+                if span.upper().startswith("FY"):
+                    months = cube.financial_year(span)
                 else:
-                    d[col] = 0
-            g = d.groupby(station_col, as_index=False).agg(Entry=("entry", "sum"),
-                                                        Exit=("exit", "sum"))
-            g["Total"] = g["Entry"] + g["Exit"]
+                    start, _, end = span.partition(",")
+                    months = cube.month_range(start.strip(), (end or start).strip())
+                totals = cube.range_table(months, min_total=min_total, ascending=not sort_desc)
+                print(f"Totals for {months[0]} to {months[-1]}:")
+                print(render(totals.head(10)))
+            except ValueError as e:
+                print("Invalid month range:", e)
+        elif choice == "8":
+            from timeseries import StationSeries
+
+            lag = input("Compare with how many months earlier? (1 = month-over-month, 12 = year-over-year) [1]: ").strip()
+            try:
+                lag = int(lag or 1)
+                if series is None:
+                    series = StationSeries.from_cube(cube)
+                growing, declining = series.movers(month, n=10, lag=lag, min_base=min_total)
+                print(f"\nFastest growing stations, {month} vs {lag} month(s) earlier:")
+                print(render(growing.round(1)) if len(growing) else "No stations to compare.")
+                print(f"\nFastest declining stations, {month} vs {lag} month(s) earlier:")
+                print(render(declining.round(1)) if len(declining) else "No stations to compare.")
+            except ValueError as e:
+                print("Invalid input:", e)
+        elif choice == "0":
+            print("going back to home...")
+            dataset_home()
         else:
-            # Long format with entry_exit + trip
-            d["trip_num"] = d[trip_col].apply(clean_trip_value).astype(int)
-            d["ee_norm"] = d[entry_exit_col].apply(normalise_entry_exit)
-            pivot = d.pivot_table(index=station_col,
-                                columns="ee_norm",
-                                values="trip_num",
-                                aggfunc="sum",
-                                fill_value=0)
-            # Ensure both columns exist
-            entry_vals = pivot["Entry"] if "Entry" in pivot.columns else 0
-            exit_vals  = pivot["Exit"]  if "Exit"  in pivot.columns else 0
-
-            g = pd.DataFrame({
-                "Station": pivot.index,
-                "Entry": entry_vals,
-                "Exit": exit_vals
-            })
-            g["Total"] = g["Entry"] + g["Exit"]
-
-        # Ensure station column named 'Station'
-        if "Station" not in g.columns:
-            g = g.rename(columns={station_col: "Station"})
-
-        # Filter by min_total, sort
-        g = g[g["Total"] >= int(min_total)].copy()
-        g = g.sort_values("Total", ascending=ascending, kind="mergesort").reset_index(drop=True)
-
-        # Only requested columns in final output
-        return g[["Station", "Entry", "Exit", "Total"]]
-
-
-    def list_outliers(df: pd.DataFrame):
-        """
-        Identify outliers using mean ± 2*std (same as previous).
-        Returns (low_outliers, high_outliers).
-        """
-        if df.empty:
-            return df.copy(), df.copy()
-        mean = df["Total"].mean()
-        std = df["Total"].std()
-        hi = df[df["Total"] > mean + 2 * std]
-        lo = df[df["Total"] < max(0, mean - 2 * std)]
-        return lo, hi
-
-
-    # ---------- CLI ----------
-    def main():
-        if not os.path.exists(CSV_PATH):
-            print("CSV file not found at", CSV_PATH)
-            sys.exit(1)
-
-        try:
-            df = pd.read_csv(CSV_PATH)
-        except Exception as e:
-            print("Failed to read CSV:", e)
-            sys.exit(1)
+            print("Invalid option. Try again.")
 
-        sort_desc = True
-        month = "Dec-24"
-        min_total = 200
 
-        # First process
+def victoria():
+    """VIC train patronage menu."""
+    import pandas as pd
+
+    from journal import Journal
+    from ranking import NO_THRESHOLD, Ranking
+    from pax import is_pax_frame
+    from query import QueryEngine, QueryView
+    from spatial import StopIndex
+    from vic import (CSV_PATH, PROCESSED_OUT, column_map, detect_schema, find_column, list_outliers,
+                     load, normalize_columns, process_patronage)
+
+    if not os.path.exists(CSV_PATH):
+        print("CSV file not found at", CSV_PATH)
+        sys.exit(1)
+
+    try:
+        df = load()
+    except Exception as e:
+        print("Failed to read CSV:", e)
+        sys.exit(1)
+
+    # Built once; answers nearest-station and radius questions
+    try:
+        stops = StopIndex.from_frame(df)
+    except KeyError:
+        stops = None  # no Stop_lat/Stop_long in this file
+
+    if is_pax_frame(df):
+        # the published file: one row per stop and financial year with Pax_* columns
+        victoria_pax(df, stops)
+        return
+
+    # Rows added in earlier sessions
+    journal = Journal(CSV_PATH)
+    added = journal.rows()
+    if added:
+        df = pd.concat([df, pd.DataFrame(added)], ignore_index=True)
+        print(f"Replayed {len(added)} added row(s) from {os.path.basename(journal.path)}")
+
+    sort_desc = True
+    month = "Dec-24"
+    min_total = 200
+
+    # Processed once per month with no threshold; sort toggles, top/bottom
+    # queries and any min_total are answered from the cached ranking
+    rankings = {}
+
+    def ranked(df, month, min_total):
+        if month not in rankings:
+            rankings[month] = Ranking.from_table(process_patronage(df, month=month, min_total=NO_THRESHOLD))
+        return rankings[month].above(min_total)
+
+    # Prompt questions are compiled once and answered over per-month column
+    # views; answers stay in an LRU cache until a row is added
+    views = {}
+
+    def view_for(period):
+        if period not in views:
+            views[period] = QueryView.from_ranking(ranked(df, period, NO_THRESHOLD))
+        return views[period]
+
+    prompts = QueryEngine(view_for)
+
+    # First process
+    try:
+        processed = ranked(df, month, min_total).table(ascending=not sort_desc)
+    except Exception as e:
+        print("\nError during initial processing:", e)
+        # Try to be helpful: show the unique month values to guide the user
         try:
-            processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-        except Exception as e:
-            print("\nError during initial processing:", e)
-            # Try to be helpful: show the unique month values to guide the user
+            d = normalize_columns(df)
+            month_col = find_column(d, ["monthyear", "month", "period"])
+            uniq = sorted(map(str, d[month_col].dropna().unique()))
+            print("Available month values in your file:", ", ".join(uniq[:50]), "..." if len(uniq) > 50 else "")
+        except Exception:
+            pass
+        sys.exit(1)
+
+    while True:
+        print("\n=== Victoria Patronage CLI ===")
+        print("1) Show top 10 stations")
+        print("2) Show bottom 10 stations")
+        print(f"3) Toggle sort order (currently {'descending' if sort_desc else 'ascending'})")
+        print("4) List outliers (very high / very low)")
+        print("5) Add a row of data (Entry or Exit record)")
+        print("6) Ask a prompt question (e.g., busiest station)")
+        print(f"7) Save processed CSV to {PROCESSED_OUT}")
+        print(f"8) Change month (currently {month})")
+        print(f"9) Change minimum total filter (currently {min_total})")
+        print("10) Find stations near a point (nearest or within X km)")
+        print("0) Exit")
+
+        choice = action("vic", input("Choose an option: ").strip())
+
+        if choice == "1":
+            print(render(ranked(df, month, min_total).head(10, ascending=not sort_desc)))
+        elif choice == "2":
+            print(render(ranked(df, month, min_total).tail(10, ascending=not sort_desc)))
+        elif choice == "3":
+            sort_desc = not sort_desc
+            processed = ranked(df, month, min_total).table(ascending=not sort_desc)
+            print("Sort order now", "descending" if sort_desc else "ascending")
+        elif choice == "4":
+            low, high = list_outliers(processed)
+            print("\nHigh outliers (very busy):")
+            print(render(high.sort_values("Total", ascending=False)))
+            print("\nLow outliers (unusually quiet):")
+            print(render(low.sort_values("Total")))
+        elif choice == "5":
+            # Add one new row interactively; we append using the most general long format
+            station = input("Station name: ").strip()
+            month_in = input(f"Month (e.g., {month}): ").strip() or month
+            ee = input("Entry or Exit (Entry/Exit): ").strip().title()
+            trip = input("Trip value (number, '<50', or 'Less than 50'): ").strip()
+
+            # Build a best-effort row that matches the CSV's schema; the header
+            # mapping and schema are cached, so this does not copy the frame
+            cols = column_map(df)
             try:
-                d = normalize_columns(df)
-                month_col = find_column(d, ["monthyear", "month", "period"])
-                uniq = sorted(map(str, d[month_col].dropna().unique()))
-                print("Available month values in your file:", ", ".join(uniq[:50]), "..." if len(uniq) > 50 else "")
+                schema = detect_schema(df)
+                month_col = schema["month"]
+                station_col = schema["station"]
+                entry_exit_col = schema["entry_exit"] or "entry_exit"
+                trip_col = schema["trip"] or "trip"
             except Exception:
-                pass
-            sys.exit(1)
-
-        while True:
-            print("\n=== Victoria Patronage CLI ===")
-            print("1) Show top 10 stations")
-            print("2) Show bottom 10 stations")
-            print(f"3) Toggle sort order (currently {'descending' if sort_desc else 'ascending'})")
-            print("4) List outliers (very high / very low)")
-            print("5) Add a row of data (Entry or Exit record)")
-            print("6) Ask a prompt question (e.g., busiest station)")
-            print(f"7) Save processed CSV to {PROCESSED_OUT}")
-            print(f"8) Change month (currently {month})")
-            print(f"9) Change minimum total filter (currently {min_total})")
-            print("0) Exit")
-
-            choice = input("Choose an option: ").strip()
-
-            if choice == "1":
-                print(processed.head(10).to_string(index=False))
-            elif choice == "2":
-                print(processed.tail(10).to_string(index=False))
-            elif choice == "3":
-                sort_desc = not sort_desc
-                processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                print("Sort order now", "descending" if sort_desc else "ascending")
-            elif choice == "4":
-                low, high = list_outliers(processed)
-                print("\nHigh outliers (very busy):")
-                print(high.sort_values("Total", ascending=False).to_string(index=False))
-                print("\nLow outliers (unusually quiet):")
-                print(low.sort_values("Total").to_string(index=False))
-            elif choice == "5":
-                # Add one new row interactively; we append using the most general long format
-                station = input("Station name: ").strip()
-                month_in = input(f"Month (e.g., {month}): ").strip() or month
-                ee = input("Entry or Exit (Entry/Exit): ").strip().title()
-                trip = input("Trip value (number, '<50', or 'Less than 50'): ").strip()
-
-                # Build a best-effort row that matches the CSV's schema
-                dnorm = normalize_columns(df)
-                # Try to detect columns again to know names
-                try:
-                    schema = detect_schema(df)
-                    month_col = schema["month"]
-                    station_col = schema["station"]
-                    entry_exit_col = schema["entry_exit"] or "entry_exit"
-                    trip_col = schema["trip"] or "trip"
-                except Exception:
-                    # Fall back to generic names
-                    month_col = "monthyear"
-                    station_col = "station"
-                    entry_exit_col = "entry_exit"
-                    trip_col = "trip"
-
-                # Create a dict with all existing columns, default None
-                new = {col: None for col in dnorm.columns}
-                # Put values into the normalised keys if present; otherwise add them
-                if month_col in dnorm.columns:
-                    new[month_col] = month_in
-                else:
-                    new[month_col] = month_in
-                if station_col in dnorm.columns:
-                    new[station_col] = station
-                else:
-                    new[station_col] = station
-                if entry_exit_col in dnorm.columns:
-                    new[entry_exit_col] = ee
-                else:
-                    new[entry_exit_col] = ee
-                if trip_col in dnorm.columns:
-                    new[trip_col] = trip
-                else:
-                    new[trip_col] = trip
-
-                # Map back to original case-sensitive columns of df
-                # Build mapping from normalized -> original
-                norm_to_orig = {_snake(c): c for c in df.columns}
-                new_orig = {}
-                for k_norm, v in new.items():
-                    k_orig = norm_to_orig.get(k_norm, k_norm)
-                    new_orig[k_orig] = v
-
-                df = pd.concat([df, pd.DataFrame([new_orig])], ignore_index=True)
-                processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                print("Row added. Station totals updated.")
-            elif choice == "6":
-                q = input("Ask a short prompt (e.g., 'what was the busiest station?'): ").strip().lower()
-                if "busiest" in q:
-                    top = processed.sort_values("Total", ascending=False).head(1)
-                    if not top.empty:
-                        print("Busiest station:", top.iloc[0]["Station"], "with total", int(top.iloc[0]["Total"]))
-                    else:
-                        print("No data available.")
-                elif "how many stations" in q:
-                    print("Number of stations:", len(processed))
-                else:
-                    print("Sorry, prompt not recognised. Try: 'what was the busiest station?', 'how many stations'")
-            elif choice == "7":
-                processed.to_csv(PROCESSED_OUT, index=False)
-                print("Saved processed CSV to", PROCESSED_OUT)
-            elif choice == "8":
-                new_month = input("Enter month label exactly as in CSV (e.g., Dec-24): ").strip()
-                if new_month:
-                    month = new_month
-                    try:
-                        processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                        print("Month changed to", month)
-                    except Exception as e:
-                        print("Error after changing month:", e)
-            elif choice == "9":
+                # Fall back to generic names
+                month_col = "monthyear"
+                station_col = "station"
+                entry_exit_col = "entry_exit"
+                trip_col = "trip"
+
+            # Create a dict with all existing columns, default None, then put
+            # values into the normalised keys (adding any that are missing)
+            new = {col: None for col in cols}
+            new[month_col] = month_in
+            new[station_col] = station
+            new[entry_exit_col] = ee
+            new[trip_col] = trip
+
+            # Map back to original case-sensitive columns of df
+            new_orig = {cols.get(k_norm, k_norm): v for k_norm, v in new.items()}
+
+            df = pd.concat([df, pd.DataFrame([new_orig])], ignore_index=True)
+            journal.append(new_orig)
+            rankings.clear()
+            views.clear()
+            prompts.invalidate()
+            processed = ranked(df, month, min_total).table(ascending=not sort_desc)
+            print("Row added. Station totals updated.")
+        elif choice == "6":
+            q = input("Ask a short prompt (e.g., 'what was the busiest station?', 'top 5 in Jan-25'): ").strip()
+            try:
+                print(prompts.ask(q, period=month, min_value=min_total).text())
+            except (KeyError, ValueError) as e:
+                print("Sorry,", e.args[0])
+        elif choice == "7":
+            processed.to_csv(PROCESSED_OUT, index=False)
+            print("Saved processed CSV to", PROCESSED_OUT)
+        elif choice == "8":
+            new_month = input("Enter month label exactly as in CSV (e.g., Dec-24): ").strip()
+            if new_month:
+                month = new_month
                 try:
-                    new_min = int(input("Enter new minimum Total (integer): ").strip())
-                    min_total = new_min
-                    processed = process_patronage(df, month=month, min_total=min_total, ascending=not sort_desc)
-                    print("Minimum total filter changed to", min_total)
+                    processed = ranked(df, month, min_total).table(ascending=not sort_desc)
+                    print("Month changed to", month)
                 except Exception as e:
-                    print("Invalid number or error:", e)
-            elif choice == "0":
-                print("Goodbye.")
-                break
-            else:
-                print("Invalid option. Try again.")
+                    print("Error after changing month:", e)
+        elif choice == "9":
+            try:
+                new_min = int(input("Enter new minimum Total (integer): ").strip())
+                min_total = new_min
+                processed = ranked(df, month, min_total).table(ascending=not sort_desc)
+                kept = ranked(df, month, NO_THRESHOLD).thresholds
+                print("Minimum total filter changed to", min_total)
+                print(f"{kept.count(min_total)} of {len(kept)} stations kept, "
+                      f"{kept.share(min_total):.2%} of patronage")
+            except Exception as e:
+                print("Invalid number or error:", e)
+        elif choice == "10":
+            if stops is None:
+                print("This file has no stop coordinates (Stop_lat/Stop_long).")
+                continue
+            point = input("Enter a point as lat,lon (e.g., -37.8183,144.9671): ").strip()
+            radius = input("Radius in km (leave blank for the 5 nearest stations): ").strip()
+            try:
+                lat, lon = (float(v) for v in point.split(","))
+                found = stops.within(lat, lon, float(radius)) if radius else stops.nearest(lat, lon, k=5)
+                print(render(found) if not found.empty else "No stations found.")
+            except ValueError as e:
+                print("Invalid input:", e)
+        elif choice == "0":
+            print("Goodbye.")
+            break
+        else:
+            print("Invalid option. Try again.")
+
 
+def victoria_pax(df, stops=None):
+    """VIC menu for the wide Pax_* layout (per stop and financial year)."""
+    from pax import PaxAggregate
+    from query import QueryEngine, QueryView
+    from vic import PROCESSED_OUT
 
-    if __name__ == "__main__":
-        main()
+    # Every Pax_* metric summed once; ranking by another metric or year is a cached sort
+    agg = PaxAggregate.from_frame(df)
+    sort_desc = True
+    fin_year = agg.years[-1]
+    metric = agg.default_metric
+    min_value = 0
 
+    def ranked():
+        return agg.table(fin_year, metric=metric, min_value=min_value, ascending=not sort_desc)
+
+    views = {}
+
+    def view_for(period):
+        if period not in views:
+            views[period] = QueryView.from_pax(agg, period)
+        return views[period]
+
+    prompts = QueryEngine(view_for)
+
+    while True:
+        print("\n=== Victoria Patronage CLI ===")
+        print(f"1) Show top 10 stations by {metric}")
+        print(f"2) Show bottom 10 stations by {metric}")
+        print(f"3) Toggle sort order (currently {'descending' if sort_desc else 'ascending'})")
+        print("4) List outliers (very high / very low)")
+        print(f"5) Change metric (currently {metric})")
+        print("6) Ask a prompt question (e.g., busiest station)")
+        print(f"7) Save processed CSV to {PROCESSED_OUT}")
+        print(f"8) Change financial year (currently {fin_year})")
+        print(f"9) Change minimum {metric} filter (currently {min_value})")
+        print("10) Find stations near a point (nearest or within X km)")
+        print("0) Exit")
+
+        choice = action("vic pax", input("Choose an option: ").strip())
+
+        if choice == "1":
+            print(render(ranked().head(10)))
+        elif choice == "2":
+            print(render(ranked().tail(10)))
+        elif choice == "3":
+            sort_desc = not sort_desc
+            print("Sort order now", "descending" if sort_desc else "ascending")
+        elif choice == "4":
+            low, high = agg.outliers(metric, fin_year)
+            print("\nHigh outliers (very busy):")
+            print(render(high))
+            print("\nLow outliers (unusually quiet):")
+            print(render(low))
+        elif choice == "5":
+            print("Available metrics:", ", ".join(agg.metric_names))
+            try:
+                metric = agg.metric(input("Enter a metric: ").strip())
+                print("Metric changed to", metric)
+            except KeyError as e:
+                print("Invalid metric:", e)
+        elif choice == "6":
+            q = input("Ask a short prompt (e.g., 'what was the busiest station?', 'top 5 by pax_am_peak'): ").strip()
+            try:
+                print(prompts.ask(q, period=fin_year, min_value=min_value, by=metric).text())
+            except (KeyError, ValueError) as e:
+                print("Sorry,", e.args[0])
+        elif choice == "7":
+            ranked().to_csv(PROCESSED_OUT, index=False)
+            print("Saved processed CSV to", PROCESSED_OUT)
+        elif choice == "8":
+            print("Available financial years:", ", ".join(agg.years), "(or 'all')")
+            new_year = input("Enter financial year (e.g., FY24-25): ").strip()
+            if new_year:
+                try:
+                    agg.block(new_year)
+                    fin_year = new_year
+                    print("Financial year changed to", fin_year)
+                except ValueError as e:
+                    print("Error after changing financial year:", e)
+        elif choice == "9":
+            try:
+                min_value = float(input(f"Enter new minimum {metric}: ").strip())
+                print("Minimum filter changed to", min_value)
+            except ValueError as e:
+                print("Invalid number or error:", e)
+        elif choice == "10":
+            if stops is None:
+                print("This file has no stop coordinates (Stop_lat/Stop_long).")
+                continue
+            point = input("Enter a point as lat,lon (e.g., -37.8183,144.9671): ").strip()
+            radius = input("Radius in km (leave blank for the 5 nearest stations): ").strip()
+            try:
+                lat, lon = (float(v) for v in point.split(","))
+                found = stops.within(lat, lon, float(radius)) if radius else stops.nearest(lat, lon, k=5)
+                print(render(found) if not found.empty else "No stations found.")
+            except ValueError as e:
+                print("Invalid input:", e)
+        elif choice == "0":
+            print("Goodbye.")
+            break
+        else:
+            print("Invalid option. Try again.")
 
 
 def dataset_home():
@@ -552,7 +452,7 @@ def dataset_home():
     print('3. Car ownership in the city of sydney')
     print('4. Exit the program :(')
     while True:
-        data_choice = input('Choose between 1 and 2 to choose dataset')
+        data_choice = action("home", input('Choose between 1 and 2 to choose dataset'))
         if data_choice == '1':
             print('You are viewing NSW train patronage')
             what()
@@ -563,13 +463,20 @@ def dataset_home():
             break
         elif data_choice == '3':
             print('You are now looking at city of sydney car ownership')
-            csv_path = os.path.join(os.path.dirname(__file__), "CarOwnership_AllTimePeriod_Datatype_EN_For_10_20.csv")
-            if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
-                print("\nFirst 5 rows of the car ownership dataset:")
-                print(df.head().to_string(index=False))
+            from car import CAR_CSV_PATH, CarOwnership, compare
+
+            if os.path.exists(CAR_CSV_PATH):
+                car = CarOwnership.load(CAR_CSV_PATH)
+                print("\nFirst 5 rows of the car ownership dataset (long form):")
+                print(render(car.frame().head()))
+                from cube import PatronageCube
+                from nsw import CSV_PATH, load
+
+                if os.path.exists(CSV_PATH):
+                    print("\nNSW patronage per area next to the latest census:")
+                    print(render(compare(car, PatronageCube.from_frame(load()))))
             else:
-                print("Car ownership CSV file not found at", csv_path)
+                print("Car ownership CSV file not found at", CAR_CSV_PATH)
             back_home = input('Press 1 to go back to home')
             if back_home == '1':
                 dataset_home()
@@ -612,5 +519,17 @@ def Title_Screen():
     else:
         print('error')
 
-dataset_home()
 
+def main(argv=None):
+    import argparse
+
+    import profiling
+
+    parser = argparse.ArgumentParser(description="Train patronage CLI.")
+    profiling.add_arguments(parser)
+    profiling.configure(parser.parse_args(argv))
+    dataset_home()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+NSW train patronage processing
+------------------------------
+Library side of the NSW CLI: clean the Trip column, keep one month, pivot
+Entry/Exit per Station and rank stations by Total. Importing this module has
+no side effects.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregate import pivot_sum
+from datacache import load_dataset
+from profiling import profiled, stage
+from trips import clean_trip_column
+
+# File paths (adjust if needed)
+CSV_PATH = os.path.join(os.path.dirname(__file__), "NSW_Train_patronage_per_station.csv")
+PROCESSED_OUT = os.path.join(os.path.dirname(__file__), "processed_patronage_dec24.csv")
+
+
+@profiled("nsw.process_patronage")
+def process_patronage(df, month="Dec-24", min_total=200, ascending=False):
+    """
+    Process the raw dataframe:
+    - keep only rows for the requested month
+    - convert Trip to numeric
+    - pivot Entry/Exit into columns then sum totals per Station
+    - drop stations with Total < min_total
+    - return dataframe sorted by Total
+    """
+    month_col = "MonthYear" if "MonthYear" in df.columns else "Month"
+    with stage("nsw.month_filter", len(df)) as s:
+        d = df[df[month_col] == month]
+        s.rows_out = len(d)
+
+    if d.empty:
+        raise ValueError(f"No rows found for month '{month}'.")
+
+    with stage("nsw.clean_trip", len(d)) as s:
+        trips = clean_trip_column(d["Trip"], "nsw").to_numpy(dtype=np.int64)
+        s.rows_out = len(trips)
+
+    with stage("nsw.pivot", len(d)) as s:
+        if "Entry_Exit" in d.columns:
+            # same table as pivot_table(index=Station, columns=Entry_Exit, aggfunc="sum", fill_value=0)
+            stations, directions, sums = pivot_sum(d["Station"], d["Entry_Exit"], trips)
+            pivot = pd.DataFrame({"Station": stations})
+            for j, c in enumerate(directions):
+                pivot[c] = pd.array(sums[:, j], dtype="Int64")
+            for c in ["Entry", "Exit"]:
+                if c not in pivot.columns:
+                    pivot[c] = 0
+            pivot["Total"] = pivot["Entry"] + pivot["Exit"]
+        else:
+            d = d.assign(Trip_num=pd.array(trips, dtype="Int64"))
+            pivot = d.groupby("Station", as_index=False).agg(Total=("Trip_num", "sum"))
+            pivot["Entry"] = pd.NA
+            pivot["Exit"] = pd.NA
+        s.rows_out = len(pivot)
+
+    with stage("nsw.min_total_filter", len(pivot)) as s:
+        pivot = pivot[pivot["Total"] >= min_total].copy()
+        s.rows_out = len(pivot)
+    with stage("nsw.sort", len(pivot)) as s:
+        pivot.sort_values("Total", ascending=ascending, inplace=True)
+        pivot.reset_index(drop=True, inplace=True)
+        s.rows_out = len(pivot)
+    return pivot
+
+
+@profiled("nsw.list_outliers")
+def list_outliers(df):
+    """Find outliers using mean ± 2*std; none when fewer than two stations are left."""
+    mean = df["Total"].mean()
+    std = df["Total"].std()
+    if len(df) < 2 or pd.isna(std):
+        return df.iloc[:0].copy(), df.iloc[:0].copy()
+    high = df[df["Total"] > mean + 2 * std]
+    low = df[df["Total"] < max(0, mean - 2 * std)]
+    return low, high
+
+
+def load(csv_path=CSV_PATH, report=True) -> pd.DataFrame:
+    """Raw NSW frame (with cleaned Trip_num), through the binary dataset cache."""
+    return load_dataset(csv_path, trip_style="nsw", report=report)
@@ -0,0 +1,201 @@
+"""
+Parallel month processing
+-------------------------
+Produces every month's ranked Station/Entry/Exit/Total table (NSW) and the VIC
+table on a process pool instead of one ``process_patronage`` call at a time.
+
+The driver cleans and encodes a dataset once, then splits it into one task per
+month. A task carries only compact NumPy buffers (int32 station codes, int8
+Entry/Exit codes, int64 trips), never a DataFrame. Workers sum, filter and sort
+their month and send back station codes with Entry/Exit; the driver attaches
+station names and merges the months.
+
+    tables = process_all({"nsw": nsw_df, "vic": vic_df}, workers=4)
+    tables["nsw"]["Dec-24"]                 # == nsw.process_patronage(nsw_df, "Dec-24")
+    merge_months(tables["nsw"])             # one long frame with a Month column
+
+    python parallel.py --rows 10M --workers 1,2,4      # scaling report
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import vic
+from aggregate import scatter_sum
+from cube import _direction_codes, _month_order
+from trips import clean_trip_column
+
+
+class Partitions:
+    """One dataset split by month into compact buffers, plus what the driver needs to rebuild tables."""
+
+    def __init__(self, kind, stations, months, tasks):
+        self.kind = kind          # "nsw" or "vic": selects the output dtypes and sort
+        self.stations = stations  # station names, indexed by station code (alphabetical)
+        self.months = months
+        self.tasks = tasks        # {month: (station_codes, direction_codes, trips)}
+
+    @classmethod
+    def _split(cls, kind, station_values, month_values, directions, trips):
+        codes, stations = pd.factorize(station_values, sort=True)
+        month_codes, months = pd.factorize(month_values)
+        keep = (codes >= 0) & (month_codes >= 0)
+        codes = codes[keep].astype(np.int32)
+        month_codes = month_codes[keep]
+        directions = directions[keep].astype(np.int8)
+        trips = trips[keep]
+
+        # one stable sort groups each month's rows into a contiguous slice
+        order = np.argsort(month_codes, kind="stable")
+        bounds = np.cumsum(np.bincount(month_codes, minlength=len(months)))
+        tasks = {}
+        for m, (lo, hi) in enumerate(zip(np.r_[0, bounds[:-1]], bounds)):
+            rows = order[lo:hi]
+            tasks[months[m]] = (codes[rows], directions[rows], trips[rows])
+        ordered = _month_order(list(months))
+        return cls(kind, np.asarray(stations, dtype=object), ordered, {m: tasks[m] for m in ordered})
+
+    @classmethod
+    def from_nsw(cls, df: pd.DataFrame) -> "Partitions":
+        month_col = "MonthYear" if "MonthYear" in df.columns else "Month"
+        if "Trip_num" in df.columns and df["Trip_num"].dtype == np.int64:
+            trips = df["Trip_num"].to_numpy()
+        else:
+            trips = clean_trip_column(df["Trip"], "nsw").to_numpy(dtype=np.int64)
+        directions = _direction_codes(df.get("Entry_Exit"))
+        return cls._split("nsw", df["Station"], df[month_col].to_numpy(), directions, trips)
+
+    @classmethod
+    def from_vic(cls, df: pd.DataFrame) -> "Partitions":
+        schema = vic.detect_schema(df)
+        cols = vic.column_map(df)
+        stations, months = df[cols[schema["station"]]], df[cols[schema["month"]]].to_numpy()
+        if schema["is_wide"]:
+            # one Entry row and one Exit row per input row
+            entry, exit_ = (pd.to_numeric(df[cols[c]], errors="coerce").fillna(0).astype(int).to_numpy()
+                            for c in ("entry", "exit"))
+            n = len(df)
+            return cls._split("vic", pd.concat([stations, stations], ignore_index=True), np.r_[months, months],
+                              np.r_[np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)], np.r_[entry, exit_])
+        codes, uniques = pd.factorize(df[cols[schema["entry_exit"]]])
+        labels = np.array([vic.normalise_entry_exit(u) for u in uniques] + [None], dtype=object)
+        directions = _direction_codes(labels[codes])
+        trips = clean_trip_column(df[cols[schema["trip"]]], "vic").to_numpy(dtype=np.int64)
+        return cls._split("vic", stations, months, directions, trips)
+
+
+def rank_month(kind, codes, directions, trips, min_total=200, ascending=False):
+    """
+    Worker: sum one month's buffers per station, drop stations under
+    ``min_total`` and sort exactly as that dataset's ``process_patronage`` does.
+    Returns (station_codes, entry, exit) in output order.
+    """
+    n = int(codes.max()) + 1 if len(codes) else 0
+    counted = directions >= 0
+    flat = codes[counted].astype(np.int64) * 2 + directions[counted]
+    sums = scatter_sum(flat, trips[counted], n * 2).reshape(n, 2)
+    rows = np.flatnonzero(np.bincount(codes, minlength=n))
+
+    entry, exit_ = sums[rows, 0], sums[rows, 1]
+    total = pd.Series(pd.array(entry + exit_, dtype="Int64") if kind == "nsw" else entry + exit_)
+    keep = (total >= min_total).to_numpy()
+    total = total[keep].reset_index(drop=True)
+    # NSW sorts with the default quicksort, VIC with a stable mergesort
+    order = total.sort_values(ascending=ascending, kind="quicksort" if kind == "nsw" else "mergesort").index
+    order = order.to_numpy()
+    return rows[keep][order], entry[keep][order], exit_[keep][order]
+
+
+def _table(parts: Partitions, result) -> pd.DataFrame:
+    codes, entry, exit_ = result
+    if parts.kind == "nsw":
+        entry, exit_ = pd.array(entry, dtype="Int64"), pd.array(exit_, dtype="Int64")
+    table = pd.DataFrame({"Station": parts.stations[codes], "Entry": entry, "Exit": exit_})
+    table["Total"] = table["Entry"] + table["Exit"]
+    return table
+
+
+def process_all(datasets: dict, min_total=200, ascending=False, workers=None) -> dict:
+    """
+    ``{name: frame}`` → ``{name: {month: table}}``, one pool task per month.
+    Names starting with "vic" are processed as VIC files, everything else as
+    NSW. ``workers=1`` runs in this process without a pool.
+    """
+    parts = {name: (Partitions.from_vic if name.startswith("vic") else Partitions.from_nsw)(df)
+             for name, df in datasets.items()}
+    jobs = [(name, month) for name, p in parts.items() for month in p.months]
+
+    def args(name, month):
+        return (parts[name].kind, *parts[name].tasks[month], min_total, ascending)
+
+    if workers == 1:
+        results = [rank_month(*args(name, month)) for name, month in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(rank_month, *args(name, month)) for name, month in jobs]
+            results = [f.result() for f in futures]
+
+    out = {name: {} for name in parts}
+    for (name, month), result in zip(jobs, results):
+        out[name][month] = _table(parts[name], result)
+    return out
+
+
+def merge_months(tables: dict) -> pd.DataFrame:
+    """Per-month tables → one frame with a leading Month column, months in order."""
+    frames = [t.assign(Month=month) for month, t in tables.items()]
+    if not frames:
+        return pd.DataFrame(columns=["Month", "Station", "Entry", "Exit", "Total"])
+    merged = pd.concat(frames, ignore_index=True)
+    return merged[["Month", "Station", "Entry", "Exit", "Total"]]
+
+
+# ---------- Scaling report ----------
+def scaling_report(n_rows, workers, min_total=200, log=print) -> list:
+    """Time the serial process_patronage loop and process_all at each worker count."""
+    import nsw
+    import synthetic
+
+    datasets = {"nsw": synthetic.nsw_frame(n_rows), "vic": synthetic.vic_long_frame(n_rows // 10)}
+    months = Partitions.from_nsw(datasets["nsw"]).months
+
+    start = time.perf_counter()
+    for month in months:
+        nsw.process_patronage(datasets["nsw"], month=month, min_total=min_total)
+    for month in Partitions.from_vic(datasets["vic"]).months:
+        vic.process_patronage(datasets["vic"], month=month, min_total=min_total)
+    serial = time.perf_counter() - start
+    log(f"{n_rows:,} NSW rows + {n_rows // 10:,} VIC rows, {os.cpu_count()} CPUs")
+    log(f"{'process_patronage loop':>24s} {serial:8.2f} s")
+
+    rows = [("serial", serial)]
+    for w in workers:
+        start = time.perf_counter()
+        process_all(datasets, min_total=min_total, workers=w)
+        took = time.perf_counter() - start
+        rows.append((w, took))
+        log(f"{w:>16d} worker(s) {took:8.2f} s  x{serial / took:5.2f}")
+    return rows
+
+
+def main(argv=None):
+    import synthetic
+
+    parser = argparse.ArgumentParser(description="Scaling report for parallel month processing.")
+    parser.add_argument("--rows", default="1M", help="synthetic NSW rows, e.g. 1M or 10M")
+    parser.add_argument("--workers", default=None, help="comma separated worker counts (default 1..CPUs)")
+    parser.add_argument("--min-total", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    workers = [int(w) for w in args.workers.split(",")] if args.workers else list(range(1, cpus + 1))
+    scaling_report(synthetic.parse_size(args.rows), workers, min_total=args.min_total)
+
+
+if __name__ == "__main__":
+    main()
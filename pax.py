@@ -0,0 +1,210 @@
+"""
+VIC Pax_* metrics
+-----------------
+The shipped VIC file is wide: one row per stop and financial year with a
+column per patronage measure (``Pax_annual``, ``Pax_weekday``,
+``Pax_AM_peak``, ...). ``PaxAggregate`` sums every ``Pax_*`` column into a
+(stop × financial year × metric) block in one vectorized pass, derives shares
+and ratios from that block for all metrics at once, and ranks stops by any
+metric from cached sort orders:
+
+    agg = PaxAggregate.from_frame(vic_df)
+    agg.table("FY24-25", metric="Pax_AM_peak")     # every metric, ranked by AM peak
+    agg.top(10, metric="Peak_ratio")               # no reprocessing per metric
+    agg.table("all")                               # summed over every financial year
+
+Derived metrics:
+- ``Share``: the stop's share of the network total of the ranked metric.
+- ``Peak_ratio``: (AM peak + PM peak) / (pre-AM peak + interpeak + PM late).
+- ``Weekend_ratio``: average weekend day (Saturday, Sunday) / weekday.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregate import ratio
+from vic import column_map
+
+ALL_YEARS = "all"
+PEAK = ("pax_am_peak", "pax_pm_peak")
+OFFPEAK = ("pax_pre_am_peak", "pax_interpeak", "pax_pm_late")
+WEEKEND = ("pax_saturday", "pax_sunday")
+DERIVED = ("Peak_ratio", "Weekend_ratio")
+
+
+def _pax_columns(cols: dict) -> list:
+    return [raw for norm, raw in cols.items() if norm.startswith("pax_")]
+
+
+def is_pax_frame(df: pd.DataFrame) -> bool:
+    """True for the wide VIC layout: a stop name column plus Pax_* columns."""
+    cols = column_map(df)
+    return ("stop_name" in cols or "station" in cols) and bool(_pax_columns(cols))
+
+
+class PaxAggregate:
+    """
+    ``values[s, y, m]`` is the sum of ``metrics[m]`` for ``stations[s]`` in
+    ``years[y]``; ``present[s, y]`` marks stops that have a row that year.
+    """
+
+    def __init__(self, stations, years, metrics, values, present):
+        self.stations = pd.Index(stations)
+        self.years = list(years)
+        self.metrics = list(metrics)
+        self.values = values
+        self.present = present
+        self._metric_pos = {m.lower(): i for i, m in enumerate(self.metrics)}
+        self._alpha = np.arange(len(self.stations))  # stations are sorted by name
+        self._orders = {}
+        self._blocks = {}
+        self._shares = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PaxAggregate":
+        cols = column_map(df)
+        metrics = _pax_columns(cols)
+        if not metrics:
+            raise KeyError(f"No Pax_* columns found. Columns present: {list(df.columns)}")
+        station_col = cols.get("stop_name", cols.get("station"))
+        if station_col is None:
+            raise KeyError(f"No Stop_name or Station column found. Columns present: {list(df.columns)}")
+
+        station_codes, stations = pd.factorize(df[station_col], sort=True)
+        if "fin_year" in cols:
+            year_codes, years = pd.factorize(df[cols["fin_year"]], sort=True)
+        else:
+            year_codes, years = np.zeros(len(df), dtype=np.intp), pd.Index([ALL_YEARS])
+
+        block = np.column_stack([pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy() for c in metrics])
+        if np.array_equal(block, np.floor(block)):
+            block = block.astype(np.int64)
+        keep = (station_codes >= 0) & (year_codes >= 0)
+        s, y = station_codes[keep], year_codes[keep]
+
+        values = np.zeros((len(stations), len(years), len(metrics)), dtype=block.dtype)
+        np.add.at(values, (s, y), block[keep])  # one pass adds every metric of a row
+        present = np.zeros((len(stations), len(years)), dtype=bool)
+        present[s, y] = True
+        return cls(stations, years, metrics, values, present)
+
+    # ---------- Metrics ----------
+    @property
+    def default_metric(self) -> str:
+        """Pax_annual when the file has it, otherwise the first Pax_* column."""
+        return self.metrics[self._metric_pos.get("pax_annual", 0)]
+
+    @property
+    def metric_names(self) -> list:
+        return self.metrics + list(DERIVED)
+
+    def metric(self, name: str) -> str:
+        """Canonical name of a Pax_* column or derived metric, matched case-insensitively."""
+        key = str(name).strip().lower()
+        if key in self._metric_pos:
+            return self.metrics[self._metric_pos[key]]
+        for d in DERIVED:
+            if key == d.lower():
+                return d
+        raise KeyError(f"Unknown metric '{name}'. Choose from: {', '.join(self.metric_names)}")
+
+    def block(self, fin_year=None) -> tuple:
+        """(year, stations × metrics sums, derived metrics, presence) for one year or ALL_YEARS (cached)."""
+        if fin_year is None:
+            fin_year = self.years[-1]
+        if fin_year not in self._blocks:
+            if fin_year == ALL_YEARS:
+                sums, present = self.values.sum(axis=1), self.present.any(axis=1)
+            elif fin_year in self.years:
+                y = self.years.index(fin_year)
+                sums, present = self.values[:, y, :], self.present[:, y]
+            else:
+                raise ValueError(f"No rows for financial year '{fin_year}'. Available: {', '.join(self.years)}")
+
+            def cols(names):
+                idx = [self._metric_pos[n] for n in names if n in self._metric_pos]
+                return sums[:, idx].sum(axis=1) if idx else np.zeros(len(sums))
+
+            weekday = sums[:, self._metric_pos["pax_weekday"]] if "pax_weekday" in self._metric_pos else 0
+            derived = {
+                "Peak_ratio": ratio(cols(PEAK), cols(OFFPEAK)),
+                "Weekend_ratio": ratio(cols(WEEKEND) / 2, weekday),
+            }
+            self._blocks[fin_year] = (sums, derived, present)
+        return (fin_year, *self._blocks[fin_year])
+
+    def shares(self, fin_year=None) -> np.ndarray:
+        """Each stop's share of the network total, for every Pax_* metric at once (cached)."""
+        fin_year, sums, _, present = self.block(fin_year)
+        if fin_year not in self._shares:
+            self._shares[fin_year] = ratio(sums.astype(float), sums[present].sum(axis=0))
+        return self._shares[fin_year]
+
+    def _values(self, metric, fin_year):
+        fin_year, sums, derived, present = self.block(fin_year)
+        metric = self.metric(metric)
+        column = derived[metric] if metric in derived else sums[:, self.metrics.index(metric)]
+        return fin_year, metric, column, present
+
+    # ---------- Ranking ----------
+    def order(self, metric="Pax_annual", fin_year=None) -> np.ndarray:
+        """
+        Station positions in ascending ``metric`` order, ties by station name
+        (cached per metric and year). Stations without a value that year are left out.
+        """
+        fin_year, metric, column, present = self._values(metric, fin_year)
+        key = (metric, fin_year)
+        if key not in self._orders:
+            rows = np.flatnonzero(present & ~np.isnan(column.astype(float)))
+            self._orders[key] = rows[np.lexsort((self._alpha[rows], column[rows]))]
+        return self._orders[key]
+
+    def table(self, fin_year=None, metric="Pax_annual", min_value=0, ascending=False) -> pd.DataFrame:
+        """Station, every Pax_* metric, Peak_ratio, Weekend_ratio and Share, ranked by ``metric``."""
+        fin_year, metric, column, _ = self._values(metric, fin_year)
+        rows = self.order(metric, fin_year)
+        rows = rows[column[rows] >= min_value]
+        if not ascending:
+            rows = rows[::-1]
+        return self._frame(rows, fin_year, metric)
+
+    def top(self, n=10, metric="Pax_annual", fin_year=None) -> pd.DataFrame:
+        """The ``n`` highest stops by ``metric``, highest first."""
+        fin_year, metric, _, _ = self._values(metric, fin_year)
+        return self._frame(self.order(metric, fin_year)[::-1][:max(0, n)], fin_year, metric)
+
+    def bottom(self, n=10, metric="Pax_annual", fin_year=None) -> pd.DataFrame:
+        """The ``n`` lowest stops by ``metric``, lowest first."""
+        fin_year, metric, _, _ = self._values(metric, fin_year)
+        return self._frame(self.order(metric, fin_year)[:max(0, n)], fin_year, metric)
+
+    def _frame(self, rows, fin_year, metric) -> pd.DataFrame:
+        _, sums, derived, present = self.block(fin_year)
+        table = pd.DataFrame({"Station": self.stations[rows]})
+        for i, m in enumerate(self.metrics):
+            table[m] = sums[rows, i]
+        for name, column in derived.items():
+            table[name] = column[rows]
+        if metric in derived:
+            table["Share"] = np.nan
+        else:
+            table["Share"] = self.shares(fin_year)[rows, self.metrics.index(metric)]
+        return table
+
+    def outliers(self, metric="Pax_annual", fin_year=None, min_value=None):
+        """
+        Stops beyond mean ± 2*std of ``metric`` (same rule as list_outliers)
+        among those with ``metric >= min_value``: (low, high).
+        """
+        fin_year, metric, column, _ = self._values(metric, fin_year)
+        rows = self.order(metric, fin_year)
+        if min_value is not None:
+            rows = rows[column[rows] >= min_value]
+        v = column[rows].astype(float)
+        if len(v) == 0:
+            empty = self._frame(rows, fin_year, metric)
+            return empty, empty
+        mean, std = v.mean(), (v.std(ddof=1) if len(v) > 1 else np.nan)
+        low = rows[v < max(0, mean - 2 * std)]
+        high = rows[v > mean + 2 * std][::-1]
+        return self._frame(low, fin_year, metric), self._frame(high, fin_year, metric)
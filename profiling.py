@@ -0,0 +1,326 @@
+"""
+Stage profiling
+---------------
+Opt-in timing of the processing stages and CLI actions. It is switched on
+with a flag or an environment variable:
+
+    python main.py --profile                                  # summary table when the session ends
+    python main.py --profile --profile-json trace.json        # + Chrome/Perfetto trace of every stage
+    python main.py --profile --cprofile session.prof          # + cProfile stats (pstats / snakeviz)
+    PATRONAGE_PROFILE=1 python main.py                        # same as --profile
+    PATRONAGE_PROFILE=1 PATRONAGE_PROFILE_JSON=trace.json python main.py
+
+Library code marks its stages, and the profiler records wall time, rows in
+and out, and bytes allocated (net and peak, from tracemalloc):
+
+    @profiled("nsw.process_patronage")          # rows in = len(first argument), rows out = len(result)
+    def process_patronage(df, ...):
+        with stage("nsw.pivot", len(d)) as s:
+            ...
+            s.rows_out = len(pivot)
+
+When profiling is off, ``stage`` returns a shared no-op and ``profiled`` adds
+one global check, well under a microsecond per call. When it is on,
+tracemalloc slows allocation-heavy stages down. Use ``--profile-no-memory``
+(or ``PATRONAGE_PROFILE=time``) for wall times closer to an unprofiled run.
+"""
+
+import atexit
+import builtins
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+ENV = "PATRONAGE_PROFILE"
+ENV_JSON = "PATRONAGE_PROFILE_JSON"
+ENV_CPROFILE = "PATRONAGE_PROFILE_CPROFILE"
+
+_active = None  # the running Profiler, or None
+
+
+class _Off:
+    """What ``stage`` returns while profiling is off: every use is a no-op."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_OFF = _Off()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "rows_in", "rows_out", "start", "mem_start", "peak_seen")
+
+    def __init__(self, profiler, name, rows_in):
+        self.profiler = profiler
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self)
+        return False
+
+
+class Profiler:
+    """Per-stage totals for one session, plus the optional trace events and cProfile run."""
+
+    def __init__(self, memory=True, json_path=None, cprofile_path=None):
+        self.memory = memory
+        self.json_path = json_path
+        self.cprofile_path = cprofile_path
+        self.stats = {}    # name -> {"calls", "ms", "max_ms", "rows_in", "rows_out", "alloc", "peak", "depth"}
+        self.events = []   # Chrome trace events, kept only when json_path is set
+        self.stack = []
+        self.input_wait = 0.0  # seconds spent in input(), left out of the CLI action times
+        self.action = None     # (name, start, input_wait at start) of the running menu action
+        self.origin = time.perf_counter()
+        self._cprofile = None
+        self._input = None
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_path:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._input = builtins.input
+        builtins.input = self._timed_input
+
+    def stop(self):
+        self.end_action()
+        if self._input is not None:
+            builtins.input = self._input
+            self._input = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self.json_path:
+            self.write_json(self.json_path)
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _timed_input(self, prompt=""):
+        start = time.perf_counter()
+        try:
+            return self._input(prompt)
+        finally:
+            self.input_wait += time.perf_counter() - start
+
+    # ---------- Stages ----------
+    def _enter(self, s):
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                parent = self.stack[-1]
+                parent.peak_seen = max(parent.peak_seen, peak)
+            tracemalloc.reset_peak()
+            s.mem_start, s.peak_seen = current, current
+        if s.name not in self.stats:
+            self.stats[s.name] = self._new_stat(len(self.stack))  # listed in call order, parents first
+        self.stack.append(s)
+        s.start = time.perf_counter()
+
+    def _exit(self, s):
+        end = time.perf_counter()
+        self.stack.pop()
+        alloc = peak = 0
+        if self.memory:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            top = max(s.peak_seen, traced_peak)
+            alloc, peak = current - s.mem_start, top - s.mem_start
+            if self.stack:
+                parent = self.stack[-1]
+                parent.peak_seen = max(parent.peak_seen, top)
+        self.record(s.name, s.start, end, s.rows_in, s.rows_out, alloc, peak, len(self.stack))
+
+    @staticmethod
+    def _new_stat(depth) -> dict:
+        return {"calls": 0, "ms": 0.0, "max_ms": 0.0, "rows_in": None, "rows_out": None, "alloc": 0, "peak": 0,
+                "depth": depth}
+
+    def record(self, name, start, end, rows_in=None, rows_out=None, alloc=0, peak=0, depth=0):
+        ms = (end - start) * 1000
+        st = self.stats.get(name)
+        if st is None:
+            st = self.stats[name] = self._new_stat(depth)
+        st["calls"] += 1
+        st["ms"] += ms
+        st["max_ms"] = max(st["max_ms"], ms)
+        if rows_in is not None:
+            st["rows_in"] = (st["rows_in"] or 0) + rows_in
+        if rows_out is not None:
+            st["rows_out"] = (st["rows_out"] or 0) + rows_out
+        st["alloc"] += alloc
+        st["peak"] = max(st["peak"], peak)
+        if self.json_path:
+            args = {k: v for k, v in (("rows_in", rows_in), ("rows_out", rows_out)) if v is not None}
+            if self.memory:
+                args.update(alloc_bytes=alloc, peak_bytes=peak)
+            self.events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                                "ts": (start - self.origin) * 1e6, "dur": ms * 1000, "args": args})
+
+    # ---------- CLI actions ----------
+    def begin_action(self, name):
+        self.end_action()
+        self.action = (name, time.perf_counter(), self.input_wait)
+
+    def end_action(self):
+        if self.action is None:
+            return
+        name, start, waited = self.action
+        self.action = None
+        # time at the keyboard (follow-up prompts) is not the action's
+        busy = time.perf_counter() - (self.input_wait - waited)
+        self.record(name, start, busy)
+
+    # ---------- Output ----------
+    def summary(self) -> str:
+        cols = f"{'calls':>7s} {'total ms':>10s} {'mean ms':>9s} {'max ms':>9s} {'rows in':>10s} {'rows out':>10s}"
+        if self.memory:
+            cols += f" {'alloc KiB':>10s} {'peak KiB':>10s}"
+        width = max([len("stage")] + [len(n) + 2 * st["depth"] for n, st in self.stats.items()])
+        lines = [f"=== Profile ({'wall time + tracemalloc' if self.memory else 'wall time'}) ===",
+                 f"{'stage':<{width}s} {cols}"]
+        for name, st in self.stats.items():
+            if not st["calls"]:
+                continue  # still running
+            row = (f"{'  ' * st['depth'] + name:<{width}s} {st['calls']:7d} {st['ms']:10.1f} "
+                   f"{st['ms'] / st['calls']:9.2f} {st['max_ms']:9.2f} {_count(st['rows_in'])} {_count(st['rows_out'])}")
+            if self.memory:
+                row += f" {st['alloc'] / 1024:10.0f} {st['peak'] / 1024:10.0f}"
+            lines.append(row)
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "stages": self.stats}, f)
+
+
+def _count(n) -> str:
+    return f"{'-' if n is None else n:>10}"
+
+
+# ---------- Module-level API ----------
+def stage(name, rows_in=None):
+    """Context manager timing one stage; set ``.rows_out`` on it before it ends."""
+    if _active is None:
+        return _OFF
+    return _Stage(_active, name, rows_in)
+
+
+def profiled(name):
+    """
+    Decorator: every call is a stage. Rows in are those of the first frame or
+    array argument, rows out those of the result (when it is one, or a tuple of them).
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            rows_in = next((n for n in map(_rows, args) if n is not None), None)
+            with _Stage(_active, name, rows_in) as s:
+                out = fn(*args, **kwargs)
+                s.rows_out = _rows(out)
+            return out
+        return inner
+    return wrap
+
+
+def _rows(obj):
+    """Length of a frame, series or array, or the sum over a tuple of them such as (low, high) outliers."""
+    if isinstance(obj, tuple):
+        parts = [_rows(part) for part in obj]
+        return None if not parts or None in parts else sum(parts)
+    shape = getattr(obj, "shape", None)
+    return shape[0] if shape else None
+
+
+def render(df, **kwargs) -> str:
+    """``df.to_string(index=False)`` as the "render" stage."""
+    kwargs.setdefault("index", False)
+    with stage("render", len(df)):
+        return df.to_string(**kwargs)
+
+
+def action(menu, choice) -> str:
+    """Mark the start of a menu action (it runs until the next action); returns ``choice``."""
+    if _active is not None:
+        _active.begin_action(f"{menu} option {choice}")
+    return choice
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def enable(memory=True, json_path=None, cprofile_path=None, report=True) -> Profiler:
+    """Start profiling; the summary is printed to stderr when the process exits (unless ``report`` is off)."""
+    global _active
+    if _active is not None:
+        return _active
+    _active = Profiler(memory=memory, json_path=json_path, cprofile_path=cprofile_path)
+    _active.start()
+    if report:
+        atexit.register(_report)
+    return _active
+
+
+def disable() -> Profiler:
+    """Stop profiling (writing the JSON/cProfile output) and return the finished profiler."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def _report():
+    profiler = disable()
+    if profiler is not None and profiler.stats:
+        print("\n" + profiler.summary(), file=sys.stderr)
+        for path in (profiler.json_path, profiler.cprofile_path):
+            if path:
+                print("Wrote", path, file=sys.stderr)
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help=f"time every stage (or set {ENV}=1)")
+    parser.add_argument("--profile-json", metavar="PATH", help="write a Chrome/Perfetto trace of the stages")
+    parser.add_argument("--cprofile", metavar="PATH", help="write cProfile stats for the whole session")
+    parser.add_argument("--profile-no-memory", action="store_true", help="skip tracemalloc (lower overhead)")
+
+
+def configure(args=None, environ=None):
+    """Enable profiling from parsed ``add_arguments`` flags or the environment; returns the profiler or None."""
+    environ = os.environ if environ is None else environ
+    flag = environ.get(ENV, "").strip().lower()
+    json_path = getattr(args, "profile_json", None) or environ.get(ENV_JSON)
+    cprofile_path = getattr(args, "cprofile", None) or environ.get(ENV_CPROFILE)
+    wanted = getattr(args, "profile", False) or flag not in ("", "0", "false", "no", "off") \
+        or json_path or cprofile_path
+    if not wanted:
+        return None
+    memory = not getattr(args, "profile_no_memory", False) and flag != "time"
+    return enable(memory=memory, json_path=json_path, cprofile_path=cprofile_path)
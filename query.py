@@ -0,0 +1,398 @@
+"""
+Prompt queries
+--------------
+A small query language for the "Ask a prompt question" menu option. A prompt
+is compiled once into a normalized ``Query`` and then answered with array
+operations over a cached per-period view of the processed table:
+
+    top 5 in Jan-25                     the 5 busiest stations that month
+    bottom 3 by exit                    ranked by another column
+    busiest station / quietest station  top 1 / bottom 1
+    how many stations total >= 5000     count
+    sum entry starting with flin        aggregates: sum, mean, median, min, max
+    count station "south yarra"         station name prefix (case-insensitive)
+    top 10 exit > 100 entry <= 5000     any column with >, >=, <, <=, =
+    over 1000 / under 50                shorthand for the ranked column
+
+Anything not understood (e.g. "what", "was", "the") is skipped. The
+menu's month and minimum total are the defaults, so the normalized query is
+a complete description of the answer. That makes it a sound key for the
+bounded LRU result cache in ``QueryEngine``. Call ``invalidate`` when rows
+are added, and repeated dashboard prompts are then answered from memory:
+
+    engine = QueryEngine(lambda month: QueryView.from_ranking(ranked(month)))
+    answer = engine.ask("top 5 starting with fl", period="Dec-24", min_value=200)
+    print(answer.text())
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+AGGREGATES = ("sum", "mean", "median", "min", "max")
+OPERATORS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal, "=": np.equal}
+
+_TOKEN = re.compile(r'"([^"]*)"|\'([^\']*)\'|(>=|<=|==|[<>=])|([^\s"\'<>=?!;]+)')
+_PERIOD = re.compile(r"^(?:[a-z]{3}-\d{2}|fy\d{2}-\d{2}|all)$", re.IGNORECASE)
+_NUMBER = re.compile(r"^-?\d[\d,]*(?:\.\d+)?$")
+
+_OP_WORDS = {"top": "top", "busiest": "top", "highest": "top", "bottom": "bottom", "quietest": "bottom",
+             "lowest": "bottom", "count": "count", "many": "count", "number": "count"}
+_AGG_WORDS = {"sum": "sum", "total": "sum", "mean": "mean", "average": "mean", "avg": "mean",
+              "median": "median", "min": "min", "minimum": "min", "max": "max", "maximum": "max"}
+_BOUND_WORDS = {"over": ">", "above": ">", "under": "<", "below": "<"}
+_PREFIX_WORDS = ("station", "stations", "starting", "starts", "prefix", "named", "like", "matching")
+_PERIOD_WORDS = ("in", "month", "for", "year", "during")
+_KEYWORDS = (set(_OP_WORDS) | set(_AGG_WORDS) | set(_BOUND_WORDS) | set(_PREFIX_WORDS) | set(_PERIOD_WORDS)
+             | {"by", "with"})
+
+
+def _number(text):
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
+
+
+def _period_label(text):
+    """'dec-24' → 'Dec-24', 'fy24-25' → 'FY24-25'; other labels are kept as typed."""
+    lower = text.lower()
+    if lower.startswith("fy"):
+        return lower.upper()
+    if lower == "all":
+        return lower
+    return lower[:1].upper() + lower[1:]
+
+
+class Query:
+    """
+    A compiled prompt. ``key`` is its normalized form: op, k, column, period,
+    filters and prefix with every default filled in, so two prompts with the
+    same meaning share one cache entry.
+    """
+
+    def __init__(self, op, k=None, column=None, period=None, filters=(), prefix=None, by=None, floor=None,
+                 floor_by=None):
+        self.op = op            # "top", "bottom", "count" or one of AGGREGATES
+        self.k = k              # rows for top / bottom
+        self.column = column    # aggregated column (None: the ranked column)
+        self.period = period
+        self.filters = tuple(filters)   # ((column or None, operator, value), ...), None = ranked column
+        self.prefix = prefix
+        self.by = by            # ranked column (None: the view's default)
+        self.floor = floor      # menu minimum, unless a filter sets its own lower bound on that column
+        self.floor_by = floor_by  # column of the menu minimum (None: the view's default, Total for rankings)
+
+    @property
+    def key(self) -> tuple:
+        return (self.op, self.k, self.column, self.period, self.filters, self.prefix, self.by, self.floor,
+                self.floor_by)
+
+    def __repr__(self):
+        return f"Query{self.key}"
+
+
+def compile_query(text: str, period=None, min_value=None, by=None) -> Query:
+    """
+    Parse ``text`` into a Query. ``period``, ``min_value`` and ``by`` are the
+    menu's current month, minimum and ranked column; a prompt's own month or
+    "by" replaces them. The minimum stays on the menu's column (Total unless
+    ``by`` is given) and only a prompt's own lower bound on that column
+    replaces it. Raises ValueError when the prompt asks for nothing or for
+    fewer than one row.
+    """
+    floor_by = by
+    tokens = []
+    for quoted, quoted2, op, word in _TOKEN.findall(text):
+        word = word.rstrip(".,")
+        if op:
+            tokens.append(("op", "=" if op == "==" else op))
+        elif word:
+            tokens.append(("word", word))
+        else:
+            tokens.append(("quoted", quoted or quoted2))
+
+    op = k = column = prefix = None
+    filters = []
+    i = 0
+
+    def peek(j):
+        return tokens[j] if j < len(tokens) else (None, None)
+
+    while i < len(tokens):
+        kind, raw = tokens[i]
+        word = raw.lower()
+        nxt_kind, nxt = peek(i + 1)
+
+        if kind == "word" and word in _OP_WORDS and (word not in ("count", "number") or op is None):
+            op = _OP_WORDS[word]
+            if op in ("top", "bottom"):
+                if nxt_kind == "word" and _NUMBER.match(nxt):
+                    k, i = int(_number(nxt)), i + 1
+                    if k < 1:
+                        raise ValueError(f"'{raw} {nxt}' must ask for at least one station")
+                else:
+                    k = 10 if word in ("top", "bottom") else 1
+            i += 1
+        elif kind == "word" and word in _AGG_WORDS and not (nxt_kind == "op"):
+            op = _AGG_WORDS[word]
+            if nxt_kind == "word" and nxt.lower() not in _KEYWORDS and not _NUMBER.match(nxt) \
+                    and not _PERIOD.match(nxt):
+                column, i = nxt.lower(), i + 1
+            i += 1
+        elif kind == "word" and word == "by" and nxt_kind == "word":
+            by, i = nxt.lower(), i + 2
+        elif kind == "word" and word in _BOUND_WORDS and nxt_kind == "word" and _NUMBER.match(nxt):
+            filters.append((None, _BOUND_WORDS[word], _number(nxt)))
+            i += 2
+        elif kind == "word" and peek(i + 1)[0] == "op" and peek(i + 2)[0] == "word" \
+                and _NUMBER.match(peek(i + 2)[1]):
+            filters.append((word, peek(i + 1)[1], _number(peek(i + 2)[1])))
+            i += 3
+        elif kind == "op" and nxt_kind == "word" and _NUMBER.match(nxt):
+            filters.append((None, raw, _number(nxt)))
+            i += 2
+        elif kind == "word" and _PERIOD.match(raw):
+            period, i = _period_label(raw), i + 1
+        elif kind == "word" and word in _PREFIX_WORDS:
+            # the name runs until the next keyword; "with" after "starting" is filler
+            j = i + 1
+            if peek(j)[0] == "word" and peek(j)[1].lower() == "with":
+                j += 1
+            words = []
+            while j < len(tokens) and tokens[j][0] != "op":
+                t_kind, t_raw = tokens[j]
+                if t_kind == "word" and (t_raw.lower() in _KEYWORDS or _PERIOD.match(t_raw)):
+                    break
+                if t_kind == "word" and peek(j + 1)[0] == "op":
+                    break
+                words.append(t_raw)
+                j += 1
+            if words:
+                prefix = " ".join(words).lower()
+            i = j
+        elif kind == "quoted":
+            prefix, i = raw.lower(), i + 1
+        else:
+            i += 1  # filler ("what", "was", "the", ...)
+
+    if op is None:
+        raise ValueError(
+            "prompt not recognised. Try: 'busiest station', 'how many stations', "
+            "'top 5 in Jan-25', 'sum entry starting with flin', 'count total >= 5000'"
+        )
+    return Query(op, k, column, period, sorted(filters, key=repr), prefix, by, min_value, floor_by)
+
+
+class QueryView:
+    """
+    One period's processed table as column arrays. Ascending orders per
+    column (ties by station name) are computed on first use and cached; the
+    lower-cased station names used for prefix filters are built once.
+    """
+
+    def __init__(self, stations, columns: dict, default=None, orders=None):
+        self.stations = pd.Index(stations)
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        self.default = default or next(iter(self.columns))
+        self._names = {name.lower(): name for name in self.columns}
+        self._alpha = None
+        self._lower = None
+        self._orders = dict(orders or {})
+
+    @classmethod
+    def from_ranking(cls, ranking) -> "QueryView":
+        """Station/Entry/Exit/Total of a ``Ranking``, already in ascending Total order."""
+        order = ranking.order
+        columns = {"Entry": ranking.entry[order], "Exit": ranking.exit[order], "Total": ranking.total[order]}
+        return cls(ranking.stations[order], columns, default="Total", orders={"Total": np.arange(len(order))})
+
+    @classmethod
+    def from_pax(cls, agg, fin_year=None, metric=None) -> "QueryView":
+        """Every Pax_* metric and derived ratio of a ``PaxAggregate`` for one financial year."""
+        fin_year, sums, derived, present = agg.block(fin_year)
+        rows = np.flatnonzero(present)
+        columns = {m: sums[rows, i] for i, m in enumerate(agg.metrics)}
+        columns.update({name: values[rows] for name, values in derived.items()})
+        return cls(agg.stations[rows], columns, default=agg.metric(metric or agg.default_metric))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def column(self, name=None) -> str:
+        if name is None:
+            return self.default
+        try:
+            return self._names[name.lower()]
+        except KeyError:
+            raise KeyError(f"Unknown column '{name}'. Choose from: {', '.join(self.columns)}") from None
+
+    def order(self, name) -> np.ndarray:
+        """Positions in ascending ``name`` order, ties by station name; missing (NaN) values left out."""
+        if name not in self._orders:
+            values = self.columns[name]
+            if self._alpha is None:
+                self._alpha = pd.factorize(self.stations, sort=True)[0]
+            rows = np.arange(len(values))
+            if values.dtype.kind == "f":
+                rows = rows[~np.isnan(values)]
+            self._orders[name] = rows[np.lexsort((self._alpha[rows], values[rows]))]
+        return self._orders[name]
+
+    def starts_with(self, prefix) -> np.ndarray:
+        if self._lower is None:
+            self._lower = self.stations.astype(str).str.lower().str.strip()
+        return np.asarray(self._lower.str.startswith(prefix))
+
+
+class Answer:
+    """A query's result: a ranked table for top/bottom, a number otherwise."""
+
+    def __init__(self, query, value, column):
+        self.query = query
+        self.value = value
+        self.column = column
+
+    def text(self) -> str:
+        q, value = self.query, self.value
+        if q.op in ("top", "bottom"):
+            if len(value) == 0:
+                return "No data available."
+            if q.k == 1:
+                label = "Busiest station:" if q.op == "top" else "Quietest station:"
+                number = value.iloc[0][self.column]
+                shown = int(number) if float(number).is_integer() else round(float(number), 4)
+                return f"{label} {value.iloc[0]['Station']} with {self.column} {shown}"
+            return value.to_string(index=False)
+        if q.op == "count":
+            return f"Number of stations: {value}"
+        if value is None:
+            return "No data available."
+        shown = int(value) if float(value).is_integer() else round(float(value), 2)
+        return f"{q.op.title()} of {self.column}: {shown}"
+
+
+class QueryEngine:
+    """
+    Compiles prompts and answers them over ``view_for(period)``. Compiled
+    queries and answers are both kept in bounded LRU caches; ``invalidate``
+    drops the answers (and the views' source should drop its own caches) when
+    the data changes.
+    """
+
+    def __init__(self, view_for, maxsize=128):
+        self.view_for = view_for
+        self.results = LRUCache(maxsize)
+        self._compiled = LRUCache(maxsize)
+
+    def compile(self, text, period=None, min_value=None, by=None) -> Query:
+        key = (" ".join(text.split()), period, min_value, by)
+        query = self._compiled.get(key)
+        if query is None:
+            query = compile_query(text, period=period, min_value=min_value, by=by)
+            self._compiled.put(key, query)
+        return query
+
+    def ask(self, text, period=None, min_value=None, by=None) -> Answer:
+        return self.run(self.compile(text, period=period, min_value=min_value, by=by))
+
+    def run(self, query: Query) -> Answer:
+        answer = self.results.get(query.key)
+        if answer is None:
+            answer = self._execute(query)
+            self.results.put(query.key, answer)
+        return answer
+
+    def invalidate(self):
+        self.results.clear()
+
+    def _execute(self, query: Query) -> Answer:
+        view = self.view_for(query.period)
+        by = view.column(query.by)
+        rows = view.order(by)
+
+        # every filter is one vectorized mask over the ranked rows
+        filters = [(view.column(col) if col else by, op, value) for col, op, value in query.filters]
+        floor_by = view.column(query.floor_by)
+        if query.floor is not None and not any(col == floor_by and op in (">", ">=") for col, op, _ in filters):
+            filters.append((floor_by, ">=", query.floor))
+        mask = np.ones(len(rows), dtype=bool)
+        for col, op, value in filters:
+            mask &= OPERATORS[op](view.columns[col][rows], value)
+        if query.prefix:
+            mask &= view.starts_with(query.prefix)[rows]
+        rows = rows[mask]
+
+        if query.op in ("top", "bottom"):
+            picked = rows[::-1][:query.k] if query.op == "top" else rows[:query.k]
+            table = pd.DataFrame({"Station": view.stations[picked]})
+            for name, values in view.columns.items():
+                table[name] = values[picked]
+            return Answer(query, table, by)
+        if query.op == "count":
+            return Answer(query, len(rows), by)
+        column = view.column(query.column) if query.column else by
+        values = view.columns[column][rows]
+        if values.dtype.kind == "f":
+            values = values[~np.isnan(values)]
+        value = getattr(np, query.op)(values).item() if len(values) else None
+        return Answer(query, value, column)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer prompt queries over a processed patronage table.")
+    parser.add_argument("prompts", nargs="+", help="e.g. 'top 5 in Jan-25' 'how many stations over 1000'")
+    parser.add_argument("--dataset", choices=("nsw", "vic"), default="nsw")
+    parser.add_argument("--month", default=None, help="default month (NSW) or financial year (VIC Pax_* file)")
+    parser.add_argument("--min-total", type=float, default=200)
+    parser.add_argument("--repeat", type=int, default=1, help="ask every prompt this many times and report timing")
+    args = parser.parse_args(argv)
+
+    from ranking import NO_THRESHOLD, Ranking
+
+    if args.dataset == "nsw":
+        from cube import PatronageCube
+        from nsw import load
+
+        cube = PatronageCube.from_frame(load(report=False))
+        period = args.month or "Dec-24"
+
+        def view(month):
+            return QueryView.from_ranking(Ranking.from_table(cube.month_table(month, min_total=NO_THRESHOLD)))
+    else:
+        from pax import PaxAggregate, is_pax_frame
+        from vic import load, process_patronage
+
+        df = load(report=False)
+        if is_pax_frame(df):
+            agg = PaxAggregate.from_frame(df)
+            period = args.month or agg.years[-1]
+
+            def view(fin_year):
+                return QueryView.from_pax(agg, fin_year)
+        else:
+            period = args.month or "Dec-24"
+
+            def view(month):
+                return QueryView.from_ranking(
+                    Ranking.from_table(process_patronage(df, month=month, min_total=NO_THRESHOLD)))
+
+    views = {}
+    engine = QueryEngine(lambda p: views[p] if p in views else views.setdefault(p, view(p)))
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        answers = [engine.ask(p, period=period, min_value=args.min_total) for p in args.prompts]
+    took = time.perf_counter() - start
+    for prompt, answer in zip(args.prompts, answers):
+        print(f"> {prompt}\n{answer.text()}\n")
+    if args.repeat > 1:
+        asked = args.repeat * len(args.prompts)
+        print(f"{asked} prompts in {took * 1000:.1f} ms ({engine.results.hits} cache hits, "
+              f"{engine.results.misses} misses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Station ranking
+---------------
+A processed Station/Entry/Exit/Total table, ranked once and then queried in
+either direction without re-sorting:
+
+    ranking = Ranking.from_table(processed)
+    ranking.table(ascending=True)     # cached; toggling back is a lookup
+    ranking.top(10)                   # argpartition, no full sort needed
+    ranking.rank_of("Central  Station")
+    ranking.above(200)                # min_total filter by binary search
+
+Stations are ordered by Total, ties by station name; descending order is the
+exact reverse of ascending order.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from threshold import ThresholdIndex
+
+# min_total that keeps every station; rank once with it and narrow with above()
+NO_THRESHOLD = int(np.iinfo(np.int64).min)
+# filtered rankings kept per ranking; min_total can come from a client, so this is bounded
+ABOVE_CACHE_SIZE = 16
+
+
+class Ranking:
+    """Stations with their Entry/Exit/Total, ordered lazily and cached per direction."""
+
+    def __init__(self, stations, entry, exit, presorted=False):
+        self.stations = pd.Index(stations)
+        self.entry = np.asarray(entry, dtype=np.int64)
+        self.exit = np.asarray(exit, dtype=np.int64)
+        self.total = self.entry + self.exit
+        n = len(self.total)
+        self._order = np.arange(n) if presorted or n == 0 else None
+        self._positions = None
+        self._tables = {}
+        self._thresholds = None
+        self._above = LRUCache(ABOVE_CACHE_SIZE)
+
+        # One unique int64 key per station: Total first, station name breaks ties
+        self._key = None
+        if self._order is None:
+            alpha = pd.factorize(self.stations, sort=True)[0]
+            bound = np.abs(self.total).max() + 1
+            if bound < np.iinfo(np.int64).max // (n + 1):
+                self._key = self.total * n + alpha
+            else:
+                self._order = np.lexsort((alpha, self.total))
+
+    @classmethod
+    def from_table(cls, df: pd.DataFrame) -> "Ranking":
+        """Rank a process_patronage-style frame (any row order)."""
+        return cls(df["Station"], df["Entry"].fillna(0), df["Exit"].fillna(0))
+
+    def __len__(self):
+        return len(self.total)
+
+    # ---------- Ordering ----------
+    @property
+    def order(self) -> np.ndarray:
+        """Row positions in ascending order (computed once)."""
+        if self._order is None:
+            self._order = np.argsort(self._key, kind="stable")
+        return self._order
+
+    def _frame(self, rows) -> pd.DataFrame:
+        table = pd.DataFrame({
+            "Station": self.stations[rows],
+            "Entry": pd.array(self.entry[rows], dtype="Int64"),
+            "Exit": pd.array(self.exit[rows], dtype="Int64"),
+        })
+        table["Total"] = table["Entry"] + table["Exit"]
+        return table
+
+    def table(self, ascending=False) -> pd.DataFrame:
+        """The whole ranking; both directions are cached after first use."""
+        if ascending not in self._tables:
+            self._tables[ascending] = self._frame(self.order if ascending else self.order[::-1])
+        return self._tables[ascending]
+
+    # ---------- Partial selection ----------
+    def _smallest(self, k) -> np.ndarray:
+        n = len(self)
+        k = max(0, min(k, n))
+        if self._order is not None or k == n:
+            return self.order[:k]
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+        part = np.argpartition(self._key, k - 1)[:k]
+        return part[np.argsort(self._key[part])]
+
+    def _largest(self, k) -> np.ndarray:
+        n = len(self)
+        k = max(0, min(k, n))
+        if self._order is not None or k == n:
+            return self.order[n - k:][::-1]
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+        part = np.argpartition(self._key, n - k)[n - k:]
+        return part[np.argsort(-self._key[part])]
+
+    def top(self, k=10) -> pd.DataFrame:
+        """The k busiest stations, busiest first."""
+        return self._frame(self._largest(k))
+
+    def bottom(self, k=10) -> pd.DataFrame:
+        """The k quietest stations, quietest first."""
+        return self._frame(self._smallest(k))
+
+    def head(self, k=10, ascending=False) -> pd.DataFrame:
+        """Same rows as ``table(ascending).head(k)``."""
+        return self.bottom(k) if ascending else self.top(k)
+
+    def tail(self, k=10, ascending=False) -> pd.DataFrame:
+        """Same rows as ``table(ascending).tail(k)``."""
+        rows = self._largest(k)[::-1] if ascending else self._smallest(k)[::-1]
+        return self._frame(rows)
+
+    # ---------- Lookups ----------
+    def rank_of(self, station, ascending=False) -> int:
+        """1-based position of ``station`` in the chosen order."""
+        if self._positions is None:
+            pos = np.empty(len(self), dtype=np.intp)
+            pos[self.order] = np.arange(len(self))
+            self._positions = dict(zip(self.stations, pos.tolist()))
+        try:
+            p = self._positions[station]
+        except KeyError:
+            raise KeyError(f"Station '{station}' is not in this ranking.") from None
+        return p + 1 if ascending else len(self) - p
+
+    # ---------- Thresholds ----------
+    @property
+    def thresholds(self) -> ThresholdIndex:
+        """Ascending totals with prefix sums (count/share/quantiles for any min_total)."""
+        if self._thresholds is None:
+            self._thresholds = ThresholdIndex.from_ranking(self)
+        return self._thresholds
+
+    def above(self, min_total) -> "Ranking":
+        """
+        The stations with Total >= ``min_total``, still ranked: a suffix of the
+        ascending order found by binary search, cached for the most recent thresholds.
+        """
+        above = self._above.get(min_total)
+        if above is None:
+            rows = self.order[self.thresholds.cut(min_total):]
+            above = Ranking(self.stations[rows], self.entry[rows], self.exit[rows], presorted=True)
+            self._above.put(min_total, above)
+        return above
@@ -0,0 +1,389 @@
+"""
+Patronage HTTP service
+----------------------
+A local asyncio HTTP/1.1 server so that other tools can read station
+rankings as JSON without the interactive CLI. The datasets are loaded once,
+every NSW month is ranked at startup, and each response body is encoded once
+and kept in an LRU cache with its ETag. A request that sends a matching
+``If-None-Match`` header gets ``304 Not Modified`` back with no body.
+
+    GET /datasets                                  months / financial years per dataset
+    GET /nsw/top?month=Dec-24&n=10&min_total=200   also: table, bottom, busiest, count, outliers
+    GET /nsw/station/Central%20%20Station?month=Jan-25
+    GET /vic/top?n=5&metric=Pax_AM_peak            Pax_* file: year, metric, min_value, sort, n
+    GET /car                                       car ownership rows
+    GET /health
+
+    python server.py serve --port 8765
+    python server.py bench --requests 5000 --concurrency 16     # starts its own server
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from batch import DEFAULTS, OPS, BatchSession, _json_rows
+from cache import LRUCache
+from car import CAR_CSV_PATH
+
+STATUS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY = 64 * 1024  # GET/HEAD bodies are read and dropped; anything larger is refused
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer") from None
+
+
+class PatronageService:
+    """Routes requests to the loaded datasets; every 200 response is encoded once and cached."""
+
+    def __init__(self, session=None, car_path=CAR_CSV_PATH, cache_size=4096):
+        from pax import PaxAggregate, is_pax_frame
+
+        self.session = session or BatchSession()
+        self.responses = LRUCache(cache_size)
+        self.car_path = car_path
+        self._car = None
+        self._stations = LRUCache(256)  # (dataset, month, min_total) -> (ranking, {station: row})
+        self.has_vic = "vic" in self.session.frames or os.path.exists(self.session.csv_paths["vic"])
+        vic_frame = self.session.frame("vic") if self.has_vic else None
+        # the published VIC file has Pax_* columns per financial year instead of months
+        self.pax = PaxAggregate.from_frame(vic_frame) if self.has_vic and is_pax_frame(vic_frame) else None
+
+    # ---------- Startup ----------
+    def months(self, dataset) -> list:
+        if dataset == "vic" and self.pax is not None:
+            return self.pax.years
+        return self.session.months(dataset)
+
+    def warm(self, min_total=DEFAULTS["min_total"]) -> int:
+        """Rank every NSW month (and VIC month for the long layout) up front; returns the number ranked."""
+        count = 0
+        for dataset in ("nsw", "vic"):
+            if dataset == "vic" and (self.pax is not None or not self.has_vic):
+                continue
+            for month in self.months(dataset):
+                self.session.records(dataset, month, min_total)
+                count += 1
+        return count
+
+    # ---------- Requests ----------
+    def respond(self, method, target, headers=None) -> tuple:
+        """
+        (status, headers, body) for one request; ``headers`` keys are lower-case.
+        HEAD gets the GET body too, so its Content-Length is right; the handler doesn't send it.
+        """
+        if method not in ("GET", "HEAD"):
+            return self._error(405, f"{method} is not supported")
+        parts = urlsplit(target)
+        params = tuple(sorted(parse_qsl(parts.query)))
+        key = (parts.path.rstrip("/") or "/", params)
+
+        cached = self.responses.get(key)
+        if cached is None:
+            try:
+                payload = self.route(key[0], dict(params))
+            except HTTPError as e:
+                return self._error(e.status, str(e))
+            except (KeyError, ValueError) as e:
+                return self._error(400, str(e.args[0]) if e.args else type(e).__name__)
+            body = json.dumps(payload, allow_nan=False).encode()
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            cached = (body, etag)
+            self.responses.put(key, cached)
+
+        body, etag = cached
+        out = {"ETag": etag, "Cache-Control": "max-age=60", "Content-Type": "application/json"}
+        if (headers or {}).get("if-none-match") == etag:
+            return 304, out, b""
+        return 200, out, body
+
+    def _error(self, status, message):
+        return status, {"Content-Type": "application/json"}, json.dumps({"ok": False, "error": message}).encode()
+
+    def route(self, path, params) -> object:
+        parts = [unquote(p) for p in path.strip("/").split("/")] if path != "/" else []
+        if parts in ([], ["datasets"]):
+            names = ["nsw"] + (["vic"] if self.has_vic else [])
+            out = {name: self.months(name) for name in names}
+            if os.path.exists(self.car_path):
+                out["car"] = list(pd.unique(self.car()["Area"]))
+            return out
+        if parts == ["health"]:
+            return {"ok": True}
+        if parts == ["car"]:
+            return _json_rows(self.car())
+        if parts and parts[0] in ("nsw", "vic"):
+            dataset, rest = parts[0], parts[1:]
+            if rest == ["months"]:
+                return self.months(dataset)
+            if dataset == "vic" and self.pax is not None:
+                return self._pax(rest, params)
+            if len(rest) == 2 and rest[0] == "station":
+                return self._station(dataset, rest[1], params)
+            if len(rest) == 1 and rest[0] in OPS and rest[0] != "save":
+                query = {"dataset": dataset, "op": rest[0], **{k: v for k, v in params.items() if k in DEFAULTS}}
+                for name in ("min_total", "n"):
+                    if name in query:
+                        query[name] = _int(params, name, DEFAULTS[name])
+                answer = self.session.answer(query)
+                if not answer["ok"]:
+                    raise HTTPError(400, answer["error"])
+                return answer["result"]
+        raise HTTPError(404, f"No route for {path}")
+
+    def _station(self, dataset, name, params):
+        month = params.get("month", DEFAULTS["month"])
+        min_total = _int(params, "min_total", DEFAULTS["min_total"])
+        ranking = self.session.ranking(dataset, month, min_total)
+        key = (dataset, month, min_total)
+        cached = self._stations.get(key)
+        if cached is None or cached[0] is not ranking:
+            cached = (ranking, {s: i for i, s in enumerate(ranking.stations)})
+            self._stations.put(key, cached)
+        row = cached[1].get(name)
+        if row is None:
+            raise HTTPError(404, f"Station '{name}' is not in the {month} ranking")
+        return {"Station": name, "month": month, "Entry": int(ranking.entry[row]), "Exit": int(ranking.exit[row]),
+                "Total": int(ranking.total[row]), "rank": ranking.rank_of(name), "of": len(ranking)}
+
+    def _pax(self, rest, params):
+        agg = self.pax
+        year = params.get("year", agg.years[-1])
+        try:
+            metric = agg.metric(params.get("metric", agg.default_metric))
+            n = _int(params, "n", DEFAULTS["n"])
+            if rest == ["table"] or rest == ["count"]:
+                table = agg.table(year, metric, float(params.get("min_value", 0)), params.get("sort") == "asc")
+                return _json_rows(table) if rest == ["table"] else len(table)
+            if rest in (["top"], ["busiest"]):
+                top = agg.top(1 if rest == ["busiest"] else n, metric, year)
+                rows = _json_rows(top)
+                return (rows[0] if rows else None) if rest == ["busiest"] else rows
+            if rest == ["bottom"]:
+                return _json_rows(agg.bottom(n, metric, year))
+            if rest == ["outliers"]:
+                low, high = agg.outliers(metric, year)
+                return {"high": _json_rows(high), "low": _json_rows(low)}
+            if len(rest) == 2 and rest[0] == "station":
+                table = agg.table(year, metric, -math.inf)
+                row = table[table["Station"] == rest[1]]
+                if row.empty:
+                    raise HTTPError(404, f"Station '{rest[1]}' has no {year} row")
+                return {**_json_rows(row)[0], "year": year, "rank": int(row.index[0]) + 1, "of": len(table)}
+        except (KeyError, ValueError) as e:
+            raise HTTPError(400, e.args[0]) from None
+        raise HTTPError(404, f"No route for /vic/{'/'.join(rest)}")
+
+    def car(self) -> pd.DataFrame:
+        if self._car is None:
+            if not os.path.exists(self.car_path):
+                raise HTTPError(404, "Car ownership CSV not found")
+            self._car = pd.read_csv(self.car_path).dropna(axis=1, how="all")
+        return self._car
+
+
+# ---------- HTTP/1.1 over asyncio streams ----------
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "Malformed Content-Length") from None
+    if length < 0:
+        raise HTTPError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Request bodies are limited to {MAX_BODY} bytes")
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def _encode(status, headers, body, keep_alive, head=False) -> bytes:
+    """The response bytes; for HEAD (``head``) the Content-Length of ``body`` without the body."""
+    lines = [f"HTTP/1.1 {status} {STATUS.get(status, '')}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head else body)
+
+
+def make_handler(service: PatronageService):
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    status, headers, body = service._error(e.status, str(e))
+                    writer.write(_encode(status, headers, body, False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                keep_alive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+                status, out, body = service.respond(method, target, headers)
+                writer.write(_encode(status, out, body, keep_alive, head=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:  # a bug in a route: answer 500 rather than drop the connection
+            status, headers, body = service._error(500, f"Internal server error ({type(e).__name__})")
+            try:
+                writer.write(_encode(status, headers, body, False))
+                await writer.drain()
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def start_server(service, host="127.0.0.1", port=8765):
+    return await asyncio.start_server(make_handler(service), host, port)
+
+
+# ---------- Load generator ----------
+def bench_paths(months, n, seed=0) -> list:
+    """A dashboard-like mix of ``n`` NSW request paths over ``months``."""
+    rng = random.Random(seed)
+    ops = ["top"] * 4 + ["bottom"] * 2 + ["busiest", "count", "outliers", "table"]
+    paths = []
+    for _ in range(n):
+        op = rng.choice(ops)
+        month = quote(rng.choice(months))
+        paths.append(f"/nsw/{op}?month={month}&min_total={rng.choice([0, 200, 1000])}&n={rng.choice([5, 10, 20])}")
+    return paths
+
+
+async def load_test(host, port, paths, concurrency=16, revalidate=False) -> dict:
+    """
+    Request every path over ``concurrency`` keep-alive connections and return
+    latency percentiles (ms) and requests/s. With ``revalidate`` each client
+    sends back the ETag it last saw for a path, as a caching client would.
+    """
+    queue = asyncio.Queue()
+    for p in paths:
+        queue.put_nowait(p)
+    latencies, statuses = [], {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        etags = {}
+        try:
+            while not queue.empty():
+                path = queue.get_nowait()
+                extra = f"If-None-Match: {etags[path]}\r\n" if revalidate and path in etags else ""
+                start = time.perf_counter()
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n".encode("latin-1"))
+                status = int((await reader.readline()).split()[1])
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get("content-length", 0)))
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if "etag" in headers:
+                    etags[path] = headers["etag"]
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+    seconds = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "rps": len(latencies) / seconds if seconds > 0 else math.inf,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else math.nan,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else math.nan,
+        "statuses": statuses,
+    }
+
+
+async def _bench(args):
+    service = PatronageService()
+    start = time.perf_counter()
+    ranked = service.warm()
+    print(f"Loaded and ranked {ranked} month(s) in {time.perf_counter() - start:.2f} s")
+    server = await start_server(service, args.host, 0)
+    port = server.sockets[0].getsockname()[1]
+    paths = bench_paths(service.months("nsw"), args.requests, seed=args.seed)
+    async with server:
+        for label, revalidate in (("cold cache", False), ("warm cache", False), ("If-None-Match", True)):
+            if label == "cold cache":
+                service.responses.clear()
+            r = await load_test(args.host, port, paths, args.concurrency, revalidate)
+            codes = ", ".join(f"{k}: {v}" for k, v in sorted(r["statuses"].items()))
+            print(f"{label:>14s}: {r['requests']} requests, {r['rps']:,.0f} req/s, "
+                  f"p50 {r['p50_ms']:.2f} ms, p99 {r['p99_ms']:.2f} ms ({codes})")
+
+
+async def _serve(args):
+    service = PatronageService()
+    ranked = service.warm()
+    server = await start_server(service, args.host, args.port)
+    print(f"Ranked {ranked} month(s); serving on http://{args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve processed patronage as JSON over HTTP.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="run the server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p = sub.add_parser("bench", help="start a server on a free port and load-test it")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--requests", type=int, default=5000)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args) if args.command == "serve" else _bench(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Stop spatial index
+------------------
+Nearest-station and radius queries over the VIC ``Stop_lat``/``Stop_long``
+columns. Stops are bucketed once into a uniform grid of roughly square cells
+(a few stops per cell, stored CSR-style in one sorted array). A query scans
+only the grid cells that intersect the circle's bounding box and then keeps
+exact haversine distances, so it touches a few dozen stops instead of all of
+them.
+
+    stops = StopIndex.from_frame(vic_df)
+    stops.within(-37.8183, 144.9671, km=2)      # Flinders Street, 2 km radius
+    stops.nearest(-37.8183, 144.9671, k=5)      # with Pax_annual and distance_km
+
+    python spatial.py near -37.8183 144.9671 --k 5
+    python spatial.py within -37.8183 144.9671 2
+    python spatial.py bench --stops 1M           # grid vs brute force
+
+The grid does not wrap across the antimeridian; Australian data never needs it.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments in degrees, broadcast like NumPy."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _by_distance(rows, dist):
+    order = np.lexsort((rows, dist))
+    return rows[order], dist[order]
+
+
+# ---------- Brute force baseline ----------
+def brute_radius(lats, lons, lat, lon, km) -> tuple:
+    """(rows, distances) of every point within ``km``, nearest first, by scanning all points."""
+    dist = haversine_km(lat, lon, np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+    rows = np.flatnonzero(dist <= km)
+    return _by_distance(rows, dist[rows])
+
+
+def brute_nearest(lats, lons, lat, lon, k=5) -> tuple:
+    """(rows, distances) of the ``k`` nearest points, by scanning all points."""
+    dist = haversine_km(lat, lon, np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+    dist = np.where(np.isnan(dist), np.inf, dist)
+    k = max(0, min(k, int(np.isfinite(dist).sum())))
+    if k == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    rows = np.argpartition(dist, k - 1)[:k]
+    # ties at the k-th distance: keep the lowest row numbers, like the grid does
+    cutoff = dist[rows].max()
+    rows = np.flatnonzero(dist <= cutoff)
+    rows, d = _by_distance(rows, dist[rows])
+    return rows[:k], d[:k]
+
+
+class StopIndex:
+    """
+    Uniform lat/lon grid over a set of points.
+
+    ``query_radius`` / ``query_nearest`` return (rows, distances_km) where rows
+    are positions in the arrays the index was built from. ``within`` /
+    ``nearest`` return those rows of ``stops`` (when built with
+    ``from_frame``) with a ``distance_km`` column.
+    """
+
+    def __init__(self, lats, lons, stops: pd.DataFrame = None, per_cell=8):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        self.stops = stops
+        ok = np.isfinite(lats) & np.isfinite(lons)
+        rows = np.flatnonzero(ok)
+        lats, lons = lats[ok], lons[ok]
+        n = len(rows)
+
+        self.lat0 = lats.min() if n else 0.0
+        self.lon0 = lons.min() if n else 0.0
+        # square-ish cells (in km) holding about ``per_cell`` stops each
+        cells = max(1, n // per_cell)
+        cos = max(math.cos(math.radians(float(np.mean(lats)) if n else 0.0)), 0.01)
+        span_lat_km = max((lats.max() - self.lat0) * KM_PER_DEG if n else 0.0, 1e-3)
+        span_lon_km = max((lons.max() - self.lon0) * KM_PER_DEG * cos if n else 0.0, 1e-3)
+        self.cell_km = max(math.sqrt(span_lat_km * span_lon_km / cells), max(span_lat_km, span_lon_km) / cells)
+        self.dlat = self.cell_km / KM_PER_DEG
+        self.dlon = self.dlat / cos
+        self.n_rows = int(span_lat_km / self.cell_km) + 1
+        self.n_cols = int(span_lon_km / self.cell_km) + 1
+
+        r = np.minimum(((lats - self.lat0) / self.dlat).astype(np.int64), self.n_rows - 1)
+        c = np.minimum(((lons - self.lon0) / self.dlon).astype(np.int64), self.n_cols - 1)
+        cell = r * self.n_cols + c
+        order = np.argsort(cell, kind="stable")
+        self._rows = rows[order]
+        self._lat = lats[order]
+        self._lon = lons[order]
+        self._starts = np.zeros(self.n_rows * self.n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=self.n_rows * self.n_cols), out=self._starts[1:])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fin_year=None, **kwargs) -> "StopIndex":
+        """
+        Index the stops of a VIC frame. With several financial years in the file
+        only ``fin_year`` (default: the latest) is indexed, so each stop appears once.
+        """
+        from vic import column_map, find_column
+
+        cols = column_map(df)
+        header = pd.DataFrame(columns=list(cols))
+        lat_col = cols[find_column(header, ["stop_lat", "lat", "latitude"])]
+        lon_col = cols[find_column(header, ["stop_long", "stop_lon", "lon", "long", "longitude"])]
+        keep = [cols[c] for c in ("stop_id", "stop_name", "station") if c in cols]
+        keep += [lat_col, lon_col] + [cols[c] for c in ("pax_annual",) if c in cols]
+
+        if "fin_year" in cols:
+            years = df[cols["fin_year"]]
+            year = fin_year if fin_year is not None else years.dropna().max()
+            df = df[years == year]
+        stops = df[list(dict.fromkeys(keep))].reset_index(drop=True)
+        return cls(stops[lat_col], stops[lon_col], stops=stops, **kwargs)
+
+    def __len__(self):
+        return len(self._rows)
+
+    # ---------- Queries ----------
+    def _candidates(self, lat, lon, km) -> np.ndarray:
+        """Positions (in grid order) of every stop whose cell meets the circle's bounding box."""
+        if len(self) == 0 or km < 0:
+            return np.empty(0, dtype=np.int64)
+        ang = km / EARTH_RADIUS_KM
+        dlat = math.degrees(ang)
+        r0 = max(0, math.floor((lat - dlat - self.lat0) / self.dlat))
+        r1 = min(self.n_rows - 1, math.floor((lat + dlat - self.lat0) / self.dlat))
+        # widest longitude difference of a point within ``ang`` of the query
+        s = math.sin(ang) / max(math.cos(math.radians(lat)), 1e-12)
+        if ang >= math.pi / 2 or s >= 1 or abs(lat) + dlat >= 90:
+            c0, c1 = 0, self.n_cols - 1
+        else:
+            dlon = math.degrees(math.asin(s))
+            c0 = max(0, math.floor((lon - dlon - self.lon0) / self.dlon))
+            c1 = min(self.n_cols - 1, math.floor((lon + dlon - self.lon0) / self.dlon))
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype=np.int64)
+
+        # cells c0..c1 of one grid row are contiguous in grid order: one slice per row
+        base = np.arange(r0, r1 + 1) * self.n_cols
+        lo, hi = self._starts[base + c0], self._starts[base + c1 + 1]
+        lens = hi - lo
+        total = int(lens.sum())
+        return np.arange(total) + np.repeat(lo - np.cumsum(lens) + lens, lens)
+
+    @staticmethod
+    def _check(**values):
+        for name, value in values.items():
+            if not math.isfinite(value):
+                raise ValueError(f"{name} must be a finite number, not {value}")
+
+    def query_radius(self, lat, lon, km) -> tuple:
+        """(rows, distances) of every stop within ``km`` of (lat, lon), nearest first."""
+        self._check(lat=lat, lon=lon, km=km)
+        idx = self._candidates(lat, lon, km)
+        dist = haversine_km(lat, lon, self._lat[idx], self._lon[idx])
+        hit = dist <= km
+        return _by_distance(self._rows[idx[hit]], dist[hit])
+
+    def query_nearest(self, lat, lon, k=5) -> tuple:
+        """(rows, distances) of the ``k`` nearest stops, nearest first."""
+        self._check(lat=lat, lon=lon)
+        k = max(0, min(k, len(self)))
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        # widen the radius until it holds k stops; a radius search is exact,
+        # so the k nearest inside it are the k nearest overall
+        km = self.cell_km * max(1.0, math.sqrt(k))
+        while True:
+            rows, dist = self.query_radius(lat, lon, km)
+            if len(rows) >= k:
+                return rows[:k], dist[:k]
+            km *= 2
+
+    def _frame(self, rows, dist) -> pd.DataFrame:
+        if self.stops is None:
+            return pd.DataFrame({"row": rows, "distance_km": dist})
+        out = self.stops.iloc[rows].reset_index(drop=True)
+        out["distance_km"] = dist
+        return out
+
+    def within(self, lat, lon, km) -> pd.DataFrame:
+        """Stops within ``km`` of (lat, lon), nearest first."""
+        return self._frame(*self.query_radius(lat, lon, km))
+
+    def nearest(self, lat, lon, k=5) -> pd.DataFrame:
+        """The ``k`` nearest stops to (lat, lon)."""
+        return self._frame(*self.query_nearest(lat, lon, k))
+
+
+# ---------- CLI ----------
+def benchmark(n_stops, n_queries=1000, km=2.0, k=5, seed=0, log=print) -> dict:
+    """Mean per-query time of the grid vs brute force over synthetic stops."""
+    # distinct stops spread over the same area as synthetic.vic_frame
+    rng = np.random.default_rng(seed)
+    lats = -38.5 + rng.random(n_stops) * 2.0
+    lons = 144.0 + rng.random(n_stops) * 2.5
+    start = time.perf_counter()
+    index = StopIndex(lats, lons)
+    build = time.perf_counter() - start
+
+    points = np.column_stack([rng.uniform(lats.min(), lats.max(), n_queries),
+                              rng.uniform(lons.min(), lons.max(), n_queries)])
+    brute_points = points[:max(1, min(n_queries, 20))]
+
+    def timed(fn, pts):
+        start = time.perf_counter()
+        for lat, lon in pts:
+            fn(lat, lon)
+        return (time.perf_counter() - start) / len(pts)
+
+    results = {
+        "stops": n_stops,
+        "build_s": build,
+        "radius_grid_ms": timed(lambda a, b: index.query_radius(a, b, km), points) * 1000,
+        "radius_brute_ms": timed(lambda a, b: brute_radius(lats, lons, a, b, km), brute_points) * 1000,
+        "nearest_grid_ms": timed(lambda a, b: index.query_nearest(a, b, k), points) * 1000,
+        "nearest_brute_ms": timed(lambda a, b: brute_nearest(lats, lons, a, b, k), brute_points) * 1000,
+    }
+    log(f"{n_stops:,} stops, index built in {build:.2f} s ({index.n_rows}x{index.n_cols} cells)")
+    for q in ("radius", "nearest"):
+        grid, brute = results[f"{q}_grid_ms"], results[f"{q}_brute_ms"]
+        label = f"within {km:g} km" if q == "radius" else f"{k} nearest"
+        log(f"{label:>14s}: grid {grid:8.3f} ms/query   brute force {brute:8.2f} ms/query   x{brute / grid:,.0f}")
+    return results
+
+
+def main(argv=None):
+    import vic
+
+    parser = argparse.ArgumentParser(description="Nearest-stop and radius queries over the VIC stops.")
+    parser.add_argument("--csv", default=vic.CSV_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("near", help="k nearest stops to a point")
+    p.add_argument("lat", type=float)
+    p.add_argument("lon", type=float)
+    p.add_argument("--k", type=int, default=5)
+
+    p = sub.add_parser("within", help="stops within a radius of a point")
+    p.add_argument("lat", type=float)
+    p.add_argument("lon", type=float)
+    p.add_argument("km", type=float)
+
+    p = sub.add_parser("bench", help="grid index vs brute force on synthetic stops")
+    p.add_argument("--stops", default="1M")
+    p.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        import synthetic
+        benchmark(synthetic.parse_size(args.stops), n_queries=args.queries)
+        return 0
+
+    index = StopIndex.from_frame(pd.read_csv(args.csv))
+    if args.command == "near":
+        table = index.nearest(args.lat, args.lon, k=args.k)
+    else:
+        table = index.within(args.lat, args.lon, args.km)
+    print(table.to_string(index=False) if not table.empty else "No stops found.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
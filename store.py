@@ -0,0 +1,390 @@
+"""
+SQLite store
+------------
+An optional on-disk backend. The NSW, VIC and car ownership CSVs are bulk
+loaded into one SQLite file, a chunk at a time. After that, month tables,
+top-k and outliers are answered by indexed SQL instead of by filtering a
+resident DataFrame:
+
+    store = PatronageStore("patronage.sqlite")
+    store.build()                                  # CSVs → tables; unchanged CSVs are skipped
+    store.table("nsw", "Dec-24", min_total=200)    # same rows as process_patronage
+    store.top("nsw", "Dec-24", 10)
+    low, high = store.outliers("nsw", "Dec-24")
+    store.pax_top(10, metric="Pax_AM_peak")        # the shipped VIC Pax_* file
+
+Tables, per dataset (nsw, vic):
+- ``{ds}_rows(month, station, entry_exit, trip)``: cleaned raw rows, with
+  an index on (month, station, entry_exit).
+- ``{ds}_summary(month, station, entry, exit, total)``: Entry/Exit/Total
+  per station and month, pre-aggregated at load time. It is keyed by
+  (month, station) and has a covering index on (month, total, station).
+- ``vic_pax``: the wide Pax_* VIC layout as-is, with an index on
+  (Fin_year, Stop_name).
+- ``car_ownership``: the car ownership CSV as-is.
+
+Stations tied on Total are ordered by name, and descending order is the
+exact reverse of ascending, like ``Ranking``.
+
+    python store.py build --db patronage.sqlite
+    python store.py top --db patronage.sqlite --month Jan-25 -n 5
+    python store.py bench --rows 1M          # against the in-memory pandas path
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import nsw
+import vic
+from car import CAR_CSV_PATH
+from pax import is_pax_frame
+from trips import clean_trip_column
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "patronage.sqlite")
+CHUNK_ROWS = 200_000
+DATASETS = ("nsw", "vic")
+
+
+def _nsw_rows(chunk: pd.DataFrame) -> pd.DataFrame:
+    month_col = "MonthYear" if "MonthYear" in chunk.columns else "Month"
+    return pd.DataFrame({
+        "month": chunk[month_col],
+        "station": chunk["Station"],
+        "entry_exit": chunk["Entry_Exit"] if "Entry_Exit" in chunk.columns else None,
+        "trip": clean_trip_column(chunk["Trip"], "nsw"),
+    })
+
+
+def _vic_rows(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Long or wide VIC rows as (month, station, Entry/Exit, trip), normalised like vic.process_patronage."""
+    schema, cols = vic.detect_schema(chunk), vic.column_map(chunk)
+    month, station = chunk[cols[schema["month"]]], chunk[cols[schema["station"]]]
+    if schema["is_wide"]:
+        entry, exit_ = (pd.to_numeric(chunk[cols[c]], errors="coerce").fillna(0).astype(int) for c in ("entry", "exit"))
+        return pd.DataFrame({
+            "month": pd.concat([month, month], ignore_index=True),
+            "station": pd.concat([station, station], ignore_index=True),
+            "entry_exit": ["Entry"] * len(chunk) + ["Exit"] * len(chunk),
+            "trip": pd.concat([entry, exit_], ignore_index=True),
+        })
+    codes, uniques = pd.factorize(chunk[cols[schema["entry_exit"]]])
+    labels = np.array([vic.normalise_entry_exit(u) for u in uniques] + [None], dtype=object)
+    return pd.DataFrame({
+        "month": month,
+        "station": station,
+        "entry_exit": labels[codes],
+        "trip": clean_trip_column(chunk[cols[schema["trip"]]], "vic").astype(int),
+    })
+
+
+def _tuples(df: pd.DataFrame):
+    """Rows for executemany with every missing value as None (NULL)."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def _frame(rows) -> pd.DataFrame:
+    table = pd.DataFrame(rows, columns=["Station", "Entry", "Exit", "Total"])
+    for c in ("Entry", "Exit", "Total"):
+        table[c] = pd.array(table[c].to_numpy(dtype=np.int64), dtype="Int64")
+    return table
+
+
+class PatronageStore:
+    """A SQLite file holding the datasets; every query is one indexed SELECT."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, path TEXT, size INT, "
+                          "mtime_ns INT, rows INT, layout TEXT)")
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- Loading ----------
+    def _is_loaded(self, name, csv_path) -> bool:
+        st = os.stat(csv_path)
+        row = self.conn.execute("SELECT size, mtime_ns FROM sources WHERE name = ?", (name,)).fetchone()
+        return row == (st.st_size, st.st_mtime_ns)
+
+    def _record(self, name, csv_path, rows, layout):
+        st = os.stat(csv_path)
+        self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                          (name, os.path.abspath(csv_path), st.st_size, st.st_mtime_ns, rows, layout))
+
+    def load_patronage(self, dataset, csv_path, chunk_rows=CHUNK_ROWS) -> int:
+        """Stream a NSW or VIC (long/wide) CSV into ``{dataset}_rows`` and rebuild its summary."""
+        to_rows = _nsw_rows if dataset == "nsw" else _vic_rows
+        rows, summary = f"{dataset}_rows", f"{dataset}_summary"
+        c = self.conn
+        with c:
+            c.execute(f"DROP TABLE IF EXISTS {rows}")
+            c.execute(f"DROP TABLE IF EXISTS {summary}")
+            c.execute(f"CREATE TABLE {rows} (month TEXT, station TEXT, entry_exit TEXT, trip INTEGER)")
+            count = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                part = to_rows(chunk)
+                c.executemany(f"INSERT INTO {rows} VALUES (?, ?, ?, ?)", _tuples(part))
+                count += len(part)
+            c.execute(f"CREATE INDEX {rows}_key ON {rows} (month, station, entry_exit)")
+            # a station is listed for a month when it has any row with a direction,
+            # as in the pivot; only Entry and Exit count towards the totals
+            c.execute(f"""
+                CREATE TABLE {summary} (month TEXT, station TEXT, entry INTEGER, exit INTEGER, total INTEGER,
+                                        PRIMARY KEY (month, station)) WITHOUT ROWID""")
+            c.execute(f"""
+                INSERT INTO {summary}
+                SELECT month, station, entry, exit, entry + exit FROM (
+                    SELECT month, station,
+                           SUM(CASE WHEN entry_exit = 'Entry' THEN trip ELSE 0 END) AS entry,
+                           SUM(CASE WHEN entry_exit = 'Exit' THEN trip ELSE 0 END) AS exit
+                    FROM {rows}
+                    WHERE month IS NOT NULL AND station IS NOT NULL AND entry_exit IS NOT NULL
+                    GROUP BY month, station)""")
+            # covering: a ranked month is read from the index alone
+            c.execute(f"CREATE INDEX {summary}_rank ON {summary} (month, total, station, entry, exit)")
+            self._record(dataset, csv_path, count, "rows")
+        return count
+
+    def load_table(self, name, csv_path, index=None) -> int:
+        """A CSV stored as-is (VIC Pax_* file, car ownership), optionally indexed on ``index`` columns."""
+        df = pd.read_csv(csv_path).dropna(axis=1, how="all")
+        with self.conn:
+            df.to_sql(name, self.conn, if_exists="replace", index=False)
+            if index:
+                cols = ", ".join(f'"{c}"' for c in index)
+                self.conn.execute(f"CREATE INDEX {name}_key ON {name} ({cols})")
+            self._record(name, csv_path, len(df), "table")
+        return len(df)
+
+    def build(self, nsw_csv=nsw.CSV_PATH, vic_csv=vic.CSV_PATH, car_csv=CAR_CSV_PATH, force=False,
+              report=True) -> dict:
+        """Load every CSV that exists and changed since it was last loaded; returns {name: rows}."""
+        loaded = {}
+        jobs = [("nsw", nsw_csv), ("vic", vic_csv), ("car_ownership", car_csv)]
+        for name, path in jobs:
+            if not path or not os.path.exists(path):
+                continue
+            if name == "vic" and is_pax_frame(pd.read_csv(path, nrows=0)):
+                name = "vic_pax"
+            if not force and self._is_loaded(name, path):
+                continue
+            start = time.perf_counter()
+            if name in DATASETS:
+                loaded[name] = self.load_patronage(name, path)
+            elif name == "vic_pax":
+                header = vic.column_map(pd.read_csv(path, nrows=0))
+                keys = [header[k] for k in ("fin_year", "stop_name") if k in header]
+                loaded[name] = self.load_table(name, path, index=keys)
+            else:
+                loaded[name] = self.load_table(name, path)
+            if report:
+                print(f"Loaded {loaded[name]:,} rows into {name} in {time.perf_counter() - start:.2f} s")
+        return loaded
+
+    # ---------- Patronage queries ----------
+    def _summary(self, dataset) -> str:
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset '{dataset}'. Use nsw or vic.")
+        return f"{dataset}_summary"
+
+    def months(self, dataset) -> list:
+        from cube import _month_order
+
+        rows = self.conn.execute(f"SELECT DISTINCT month FROM {self._summary(dataset)}").fetchall()
+        return _month_order([r[0] for r in rows])
+
+    def _check_month(self, dataset, month):
+        hit = self.conn.execute(f"SELECT 1 FROM {self._summary(dataset)} WHERE month = ? LIMIT 1", (month,))
+        if hit.fetchone() is None:
+            raise ValueError(f"No rows found for month '{month}'.")
+
+    def table(self, dataset, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
+        """Station/Entry/Exit/Total for one month, Total >= ``min_total`` (``process_patronage``)."""
+        direction = "ASC" if ascending else "DESC"
+        rows = self.conn.execute(
+            f"SELECT station, entry, exit, total FROM {self._summary(dataset)} "
+            f"WHERE month = ? AND total >= ? ORDER BY total {direction}, station {direction}",
+            (month, min_total)).fetchall()
+        if not rows:
+            self._check_month(dataset, month)
+        return _frame(rows)
+
+    def count(self, dataset, month="Dec-24", min_total=200) -> int:
+        """Number of stations with Total >= ``min_total`` (an index range count)."""
+        n = self.conn.execute(f"SELECT COUNT(*) FROM {self._summary(dataset)} WHERE month = ? AND total >= ?",
+                              (month, min_total)).fetchone()[0]
+        if not n:
+            self._check_month(dataset, month)
+        return n
+
+    def top(self, dataset, month="Dec-24", k=10, min_total=200) -> pd.DataFrame:
+        """The ``k`` busiest stations, busiest first."""
+        return self._limit(dataset, month, k, min_total, "DESC")
+
+    def bottom(self, dataset, month="Dec-24", k=10, min_total=200) -> pd.DataFrame:
+        """The ``k`` quietest stations with Total >= ``min_total``, quietest first."""
+        return self._limit(dataset, month, k, min_total, "ASC")
+
+    def _limit(self, dataset, month, k, min_total, direction):
+        rows = self.conn.execute(
+            f"SELECT station, entry, exit, total FROM {self._summary(dataset)} "
+            f"WHERE month = ? AND total >= ? ORDER BY total {direction}, station {direction} LIMIT ?",
+            (month, min_total, max(0, int(k)))).fetchall()
+        if not rows:
+            self._check_month(dataset, month)
+        return _frame(rows)
+
+    def outliers(self, dataset, month="Dec-24", min_total=200):
+        """(low, high) stations beyond mean ± 2*std of Total, as ``list_outliers`` on the month table."""
+        summary = self._summary(dataset)
+        n, s, ss = self.conn.execute(
+            f"SELECT COUNT(*), SUM(total), SUM(CAST(total AS REAL) * total) FROM {summary} "
+            f"WHERE month = ? AND total >= ?", (month, min_total)).fetchone()
+        if not n:
+            self._check_month(dataset, month)
+            return _frame([]), _frame([])
+        mean = s / n
+        std = math.sqrt(max(0.0, (ss - s * mean) / (n - 1))) if n > 1 else math.nan
+        if math.isnan(std):
+            return _frame([]), _frame([])
+        select = f"SELECT station, entry, exit, total FROM {summary} WHERE month = ? AND total >= ? AND "
+        low = self.conn.execute(select + "total < ? ORDER BY total ASC, station ASC",
+                                (month, min_total, max(0, mean - 2 * std))).fetchall()
+        high = self.conn.execute(select + "total > ? ORDER BY total DESC, station DESC",
+                                 (month, min_total, mean + 2 * std)).fetchall()
+        return _frame(low), _frame(high)
+
+    def rows(self, dataset, month) -> pd.DataFrame:
+        """The cleaned raw rows of one month (index range scan, not a full-table filter)."""
+        return pd.read_sql_query(f"SELECT * FROM {dataset}_rows WHERE month = ?", self.conn, params=(month,))
+
+    # ---------- VIC Pax_* and car ownership ----------
+    def _pax_columns(self) -> dict:
+        info = self.conn.execute("PRAGMA table_info(vic_pax)").fetchall()
+        if not info:
+            raise ValueError("No VIC Pax_* table in this store; run build with the published VIC file.")
+        return {vic.snake_case(row[1]): row[1] for row in info}
+
+    def pax_top(self, k=10, metric="Pax_annual", fin_year=None, ascending=False) -> pd.DataFrame:
+        """Stops ranked by a Pax_* column for one financial year (latest by default)."""
+        cols = self._pax_columns()
+        column = cols.get(vic.snake_case(metric))
+        if column is None or not column.lower().startswith("pax_"):
+            raise KeyError(f"Unknown metric '{metric}'.")
+        station = cols.get("stop_name", cols.get("station"))
+        where, params = "", []
+        if "fin_year" in cols:
+            if fin_year is None:
+                fin_year = self.conn.execute(f'SELECT MAX("{cols["fin_year"]}") FROM vic_pax').fetchone()[0]
+            where, params = f'WHERE "{cols["fin_year"]}" = ?', [fin_year]
+        direction = "ASC" if ascending else "DESC"
+        query = (f'SELECT "{station}" AS Station, SUM("{column}") AS "{column}" FROM vic_pax {where} '
+                 f'GROUP BY "{station}" ORDER BY 2 {direction}, 1 {direction} LIMIT ?')
+        return pd.read_sql_query(query, self.conn, params=[*params, max(0, int(k))])
+
+    def car(self) -> pd.DataFrame:
+        return pd.read_sql_query("SELECT * FROM car_ownership", self.conn)
+
+
+# ---------- Benchmark ----------
+def _timed(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def benchmark(n_rows, repeat=3, log=print) -> list:
+    """Time the pandas path (resident frame) against the store on a synthetic NSW file of ``n_rows``."""
+    import synthetic
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "nsw.csv")
+        synthetic.nsw_frame(n_rows).to_csv(csv_path, index=False)
+        store = PatronageStore(os.path.join(tmp, "patronage.sqlite"))
+        start = time.perf_counter()
+        store.load_patronage("nsw", csv_path)
+        log(f"{n_rows:,} rows: store built in {time.perf_counter() - start:.2f} s "
+            f"({os.path.getsize(store.path) / 2**20:.0f} MiB on disk)")
+
+        df = nsw.load(csv_path, report=False)
+        month = store.months("nsw")[len(store.months("nsw")) // 2]
+        log(f"pandas frame resident: {df.memory_usage(deep=True).sum() / 2**20:.0f} MiB")
+        cases = {
+            "process_patronage": (lambda: nsw.process_patronage(df, month=month),
+                                  lambda: store.table("nsw", month)),
+            "top_10": (lambda: nsw.process_patronage(df, month=month).head(10),
+                       lambda: store.top("nsw", month, 10)),
+            "outliers": (lambda: nsw.list_outliers(nsw.process_patronage(df, month=month)),
+                         lambda: store.outliers("nsw", month)),
+        }
+        log(f"{'query':>18s} {'pandas':>10s} {'sqlite':>10s} {'speedup':>8s} {'pandas peak':>12s} {'sqlite peak':>12s}")
+        for name, (pandas_fn, sql_fn) in cases.items():
+            (pt, pm), (st, sm) = _timed(pandas_fn, repeat), _timed(sql_fn, repeat)
+            results.append({"query": name, "rows": n_rows, "pandas_s": pt, "sqlite_s": st,
+                            "pandas_peak": pm, "sqlite_peak": sm})
+            log(f"{name:>18s} {pt * 1000:8.1f}ms {st * 1000:8.1f}ms {pt / st:7.1f}x "
+                f"{pm / 2**20:10.1f}MiB {sm / 2**20:10.1f}MiB")
+        store.close()
+    return results
+
+
+def main(argv=None):
+    import synthetic
+
+    parser = argparse.ArgumentParser(description="SQLite backend for the patronage datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="load the CSVs into the store")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--force", action="store_true", help="reload even unchanged CSVs")
+    for op in ("table", "top", "bottom", "outliers"):
+        p = sub.add_parser(op, help=f"{op} for one month")
+        p.add_argument("--db", default=DB_PATH)
+        p.add_argument("--dataset", choices=DATASETS, default="nsw")
+        p.add_argument("--month", default="Dec-24")
+        p.add_argument("--min-total", type=int, default=200)
+        p.add_argument("-n", type=int, default=10)
+    p = sub.add_parser("bench", help="compare against the in-memory pandas path")
+    p.add_argument("--rows", default="1M")
+    p.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        benchmark(synthetic.parse_size(args.rows), repeat=args.repeat)
+        return 0
+    store = PatronageStore(args.db)
+    if args.command == "build":
+        store.build(force=args.force)
+        return 0
+    if args.command == "outliers":
+        low, high = store.outliers(args.dataset, args.month, args.min_total)
+        print("High outliers (very busy):\n" + high.to_string(index=False))
+        print("\nLow outliers (unusually quiet):\n" + low.to_string(index=False))
+    elif args.command == "table":
+        print(store.table(args.dataset, args.month, args.min_total).to_string(index=False))
+    else:
+        print(getattr(store, args.command)(args.dataset, args.month, args.n, args.min_total).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Streaming NSW ingestion
+-----------------------
+Reads an NSW patronage CSV in bounded chunks and folds each chunk into the
+running per-(station, month, Entry/Exit) sums of a ``PatronageCube``, so peak
+memory depends on the chunk size and the number of distinct stations and
+months, not on the number of rows in the file.
+
+    table = stream_patronage(CSV_PATH, month="Dec-24")   # == process_patronage(pd.read_csv(CSV_PATH))
+
+Run as a script to print a month's table with the peak memory used:
+
+    python streaming.py NSW_Train_patronage_per_station.csv --month Dec-24 --chunksize 50000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from cube import PatronageCube
+from trips import clean_trip_column
+
+CHUNKSIZE = 100_000
+_NEEDED = {"MonthYear", "Month", "Station", "Entry_Exit", "Trip"}
+
+
+def iter_chunks(csv_path: str, chunksize=CHUNKSIZE):
+    """Chunks of the CSV holding only the columns processing needs."""
+    return pd.read_csv(csv_path, chunksize=chunksize, usecols=lambda c: c in _NEEDED)
+
+
+def stream_cube(csv_path: str, chunksize=CHUNKSIZE, months=None) -> PatronageCube:
+    """
+    Build a cube from ``csv_path`` one chunk at a time. With ``months``, rows of
+    other months are dropped before they are cleaned or folded in.
+    """
+    cube = PatronageCube.empty()
+    for chunk in iter_chunks(csv_path, chunksize):
+        month_col = "MonthYear" if "MonthYear" in chunk.columns else "Month"
+        if months is not None:
+            chunk = chunk[chunk[month_col].isin(months)]
+            if chunk.empty:
+                continue
+        trips = clean_trip_column(chunk["Trip"], "nsw").to_numpy()
+        cube.add_many(chunk["Station"], chunk[month_col], chunk.get("Entry_Exit"), trips)
+    return cube
+
+
+def stream_patronage(csv_path: str, month="Dec-24", min_total=200, ascending=False,
+                     chunksize=CHUNKSIZE) -> pd.DataFrame:
+    """Station/Entry/Exit/Total for ``month`` without loading the whole file."""
+    cube = stream_cube(csv_path, chunksize=chunksize, months=[month])
+    return cube.month_table(month, min_total=min_total, ascending=ascending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process an NSW patronage CSV in bounded chunks.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--month", default="Dec-24")
+    parser.add_argument("--min-total", type=int, default=200)
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--top", type=int, default=10, help="rows to print (0 for all)")
+    args = parser.parse_args(argv)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = stream_patronage(args.csv_path, month=args.month, min_total=args.min_total,
+                             ascending=args.ascending, chunksize=args.chunksize)
+    took = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print((table.head(args.top) if args.top else table).to_string(index=False))
+    print(f"\n{len(table)} stations in {took:.2f}s, peak traced memory {peak / 2**20:.1f} MiB "
+          f"(chunksize {args.chunksize})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Synthetic patronage data
+------------------------
+Vectorized generators for data shaped like the shipped CSVs, at any size:
+
+- ``nsw_frame(n)``: ``_id, MonthYear, Station, Station_Type, Entry_Exit, Trip``
+  with one Entry and one Exit row per station and month, and small counts
+  reported as 'Less than 50' like the real file.
+- ``vic_frame(n)``: the wide VIC layout (``Fin_year, Stop_ID, Stop_name,
+  Stop_lat, Stop_long, Pax_*``), one row per stop and financial year.
+- ``vic_long_frame(n)``: long Month/Station/Entry_Exit/Trip rows in the shape
+  ``vic.detect_schema`` recognises, with '<50' / '1,234' style trip strings.
+
+    python synthetic.py nsw 1M big_nsw.csv
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+NSW_MONTHS = ["Aug-24", "Sep-24", "Oct-24", "Nov-24", "Dec-24", "Jan-25",
+              "Feb-25", "Mar-25", "Apr-25", "May-25", "Jun-25"]
+VIC_PAX = ["Pax_annual", "Pax_weekday", "Pax_norm_weekday", "Pax_sch_hol_weekday", "Pax_Saturday",
+           "Pax_Sunday", "Pax_pre_AM_peak", "Pax_AM_peak", "Pax_interpeak", "Pax_PM_peak", "Pax_PM_late"]
+
+
+def parse_size(text) -> int:
+    """'10k' → 10_000, '1M' → 1_000_000, '2500' → 2500."""
+    s = str(text).strip().lower().replace("_", "")
+    scale = {"k": 10**3, "m": 10**6, "g": 10**9}.get(s[-1:], 1)
+    return int(float(s[:-1] if scale > 1 else s) * scale)
+
+
+def month_labels(n_months, start="2024-08-01"):
+    return list(pd.date_range(start, periods=n_months, freq="MS").strftime("%b-%y"))
+
+
+def station_names(n, suffix="  Station"):
+    return np.char.add(np.char.add("Synthetic ", np.arange(n).astype(str)), suffix).astype(object)
+
+
+def _trip_counts(rng, size):
+    # heavy-tailed like real patronage: a few hubs, many small stations
+    return np.floor(rng.lognormal(mean=8.0, sigma=2.0, size=size)).astype(np.int64)
+
+
+def nsw_frame(n_rows, n_months=11, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    months = np.array(month_labels(n_months), dtype=object)
+    n_stations = max(1, -(-n_rows // (n_months * 2)))
+    names = station_names(n_stations)
+    types = rng.choice(np.array(["Train", "Metro", "Shared"], dtype=object), size=n_stations, p=[0.85, 0.05, 0.1])
+
+    i = np.arange(n_rows)
+    month_idx = i // (n_stations * 2)
+    station_idx = (i // 2) % n_stations
+    trips = _trip_counts(rng, n_rows)
+    trip_text = trips.astype(str).astype(object)
+    trip_text[trips < 50] = "Less than 50"
+
+    return pd.DataFrame({
+        "_id": i + 1,
+        "MonthYear": months[month_idx % n_months],
+        "Station": names[station_idx],
+        "Station_Type": types[station_idx],
+        "Entry_Exit": np.where(i % 2 == 0, "Exit", "Entry").astype(object),
+        "Trip": trip_text,
+    })
+
+
+def vic_frame(n_rows, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_years = max(1, min(5, n_rows // 200))
+    n_stops = max(1, -(-n_rows // n_years))
+    i = np.arange(n_rows)
+    stop = i % n_stops
+    year = 24 - i // n_stops
+    annual = _trip_counts(rng, n_rows) * 50
+    data = {
+        "Fin_year": np.char.add(np.char.add("FY", year.astype(str)), np.char.add("-", (year + 1).astype(str))).astype(object),
+        "Stop_ID": 15000 + stop,
+        "Stop_name": np.char.add("Stop ", stop.astype(str)).astype(object),
+        "Stop_lat": -38.5 + rng.random(n_stops)[stop] * 2.0,
+        "Stop_long": 144.0 + rng.random(n_stops)[stop] * 2.5,
+        "Pax_annual": annual,
+    }
+    weekday = annual // 310
+    shares = {"Pax_weekday": 1.0, "Pax_norm_weekday": 1.05, "Pax_sch_hol_weekday": 0.85, "Pax_Saturday": 0.6,
+              "Pax_Sunday": 0.45, "Pax_pre_AM_peak": 0.15, "Pax_AM_peak": 0.4, "Pax_interpeak": 0.2,
+              "Pax_PM_peak": 0.2, "Pax_PM_late": 0.05}
+    for col in VIC_PAX[1:]:
+        # published rounded to the nearest 50, minimum 50
+        v = weekday * shares[col] * rng.uniform(0.8, 1.2, n_rows)
+        data[col] = np.maximum(50, np.round(v / 50) * 50).astype(np.int64)
+    return pd.DataFrame(data)
+
+
+def vic_long_frame(n_rows, n_months=11, seed=0) -> pd.DataFrame:
+    df = nsw_frame(n_rows, n_months=n_months, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    trips = df["Trip"].to_numpy(dtype=object)
+    censored = trips == "Less than 50"
+    trips[censored] = rng.choice(np.array(["<50", "< 50", "less than 50"], dtype=object), size=int(censored.sum()))
+    big = ~censored & (rng.random(len(df)) < 0.3)
+    trips[big] = pd.Series(trips[big]).astype(int).map("{:,}".format).to_numpy(dtype=object)
+    return pd.DataFrame({
+        "Month": df["MonthYear"],
+        "Station": df["Station"].str.replace("  Station", "", regex=False),
+        "Entry_Exit": df["Entry_Exit"],
+        "Trips": trips,
+    })
+
+
+GENERATORS = {"nsw": nsw_frame, "vic": vic_frame, "vic-long": vic_long_frame}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] not in GENERATORS:
+        print("usage: python synthetic.py {nsw,vic,vic-long} SIZE OUT.csv")
+        return 2
+    kind, size, out = argv
+    GENERATORS[kind](parse_size(size)).to_csv(out, index=False)
+    print("Wrote", out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
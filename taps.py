@@ -0,0 +1,411 @@
+"""
+Live tap events
+---------------
+Approximate busiest-station tables from a stream of individual taps, in
+memory that does not grow with the stream. A tap is one text line,
+``Station,Entry|Exit`` with an optional ``,count`` (default 1). The lines
+come from a file that is being appended to (``tail``) or from a local TCP
+socket (``listen``):
+
+- ``CountMinSketch`` estimates the Entry and Exit count of every station.
+  With width ``ceil(e / epsilon)`` and depth ``ceil(ln(1 / delta))``, an
+  estimate is never below the true count and exceeds it by more than
+  ``epsilon * N`` (``N`` = taps so far) with probability at most ``delta``.
+- ``SpaceSaving`` keeps the ``capacity`` stations with the largest Entry+Exit
+  total. Every station whose true total is above ``N / capacity`` is among
+  them, and each kept count overestimates the true total by at most its
+  recorded error.
+- ``LiveTopK`` combines the two. ``table()`` returns the same
+  Station/Entry/Exit/Total frame as ``process_patronage``, for the stations
+  Space-Saving keeps.
+
+    live = LiveTopK(epsilon=1e-4, delta=1e-3, capacity=200)
+    live.update(stations, directions)            # arrays of one batch of taps
+    live.table(10)                               # Station, Entry, Exit, Total (estimates)
+
+    python taps.py tail events.txt --every 5 --top 10
+    python taps.py listen 9009 --every 5
+    python taps.py generate 1M events.txt        # stations drawn like the shipped NSW Dec-24 totals
+    python taps.py bench 2M                      # ingest rate and error against exact counts
+"""
+
+import argparse
+import io
+import math
+import os
+import selectors
+import socket
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregate import scatter_sum
+
+BATCH = 10_000
+DIRECTIONS = ("Entry", "Exit")
+
+
+# ---------- Sketches ----------
+def _hash_pairs(keys, seed) -> tuple:
+    """Two independent seeded uint64 hashes per key, for ``h1 + i * h2`` row hashing."""
+    keys = np.asarray(keys, dtype=object)
+    h1 = pd.util.hash_array(keys, hash_key=f"{2 * seed:016x}", categorize=False)
+    h2 = pd.util.hash_array(keys, hash_key=f"{2 * seed + 1:016x}", categorize=False)
+    return h1, h2 | np.uint64(1)
+
+
+class CountMinSketch:
+    """``depth`` rows of ``width`` int64 counters; estimates never undercount."""
+
+    def __init__(self, width, depth, seed=0):
+        self.width = int(width)
+        self.depth = int(depth)
+        self.seed = seed
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon, delta, seed=0) -> "CountMinSketch":
+        """Overestimate at most ``epsilon * total`` with probability ``1 - delta``."""
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError("epsilon and delta must be between 0 and 1")
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def error_bound(self) -> float:
+        """``epsilon * total``: the overestimate that is exceeded with probability at most delta."""
+        return self.epsilon * self.total
+
+    def _columns(self, keys) -> np.ndarray:
+        h1, h2 = _hash_pairs(keys, self.seed)
+        rows = np.arange(self.depth, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return ((h1[:, None] + rows * h2[:, None]) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, keys, counts):
+        """Add ``counts`` to distinct ``keys`` (aggregate a batch first)."""
+        counts = np.asarray(counts, dtype=np.int64)
+        cols = self._columns(keys)
+        for row in range(self.depth):
+            np.add.at(self.table[row], cols[:, row], counts)
+        self.total += int(counts.sum())
+
+    def estimate(self, keys) -> np.ndarray:
+        cols = self._columns(keys)
+        return self.table[np.arange(self.depth), cols].min(axis=1)
+
+
+class SpaceSaving:
+    """Weighted Space-Saving over at most ``capacity`` keys: (count, error) per kept key."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.keys = []
+        self.pos = {}
+        self.counts = np.zeros(self.capacity, dtype=np.int64)
+        self.errors = np.zeros(self.capacity, dtype=np.int64)
+        self.total = 0
+
+    def add(self, keys, counts):
+        """
+        Merge a batch of exact ``counts`` for distinct ``keys``. A key that is
+        not kept yet enters with the smallest kept count (0 until full) as its
+        error, and the ``capacity`` largest counts stay: the merge of two
+        Space-Saving summaries, so the per-tap error bounds still hold.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        self.total += int(counts.sum())
+        n = len(self.keys)
+        floor = int(self.counts[:n].min()) if n == self.capacity else 0
+        rows = pd.Index(self.keys, dtype=object).get_indexer(keys) if n else np.full(len(keys), -1)
+        known = rows >= 0
+        np.add.at(self.counts, rows[known], counts[known])
+        new = np.flatnonzero(~known)
+
+        all_keys = np.concatenate([np.asarray(self.keys, dtype=object), np.asarray(keys, dtype=object)[new]])
+        all_counts = np.concatenate([self.counts[:n], floor + counts[new]])
+        all_errors = np.concatenate([self.errors[:n], np.full(len(new), floor, dtype=np.int64)])
+        keep = np.lexsort((np.arange(len(all_keys)), -all_counts))[:self.capacity]
+        self.keys = all_keys[keep].tolist()
+        self.pos = {k: i for i, k in enumerate(self.keys)}
+        self.counts[:len(keep)] = all_counts[keep]
+        self.errors[:len(keep)] = all_errors[keep]
+
+    def guaranteed(self) -> np.ndarray:
+        """Lower bounds of the kept keys' true counts (count − error)."""
+        n = len(self.keys)
+        return self.counts[:n] - self.errors[:n]
+
+    def top(self, n=None) -> list:
+        """(key, count, error) of the kept keys, largest count first."""
+        size = len(self.keys)
+        order = np.lexsort((np.arange(size), -self.counts[:size]))[:n]
+        return [(self.keys[i], int(self.counts[i]), int(self.errors[i])) for i in order]
+
+
+class LiveTopK:
+    """Count-Min for per-(station, direction) counts plus Space-Saving for the candidate busiest stations."""
+
+    def __init__(self, epsilon=1e-4, delta=1e-3, capacity=200, seed=0):
+        self.sketch = CountMinSketch.from_error(epsilon, delta, seed)
+        self.heavy = SpaceSaving(capacity)
+        self.events = 0
+        self.skipped = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.sketch.nbytes + self.heavy.counts.nbytes + self.heavy.errors.nbytes
+
+    def update(self, stations, directions, counts=None):
+        """Fold one batch of taps in; rows whose direction is not Entry/Exit are skipped."""
+        stations = np.asarray(stations, dtype=object)
+        directions = np.asarray(directions, dtype=object)
+        counts = np.ones(len(stations), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        d = np.where(directions == "Entry", 0, np.where(directions == "Exit", 1, -1))
+        keep = (d >= 0) & pd.notna(stations)
+        self.skipped += int((~keep).sum())
+        self.events += int(keep.sum())
+        if not keep.any():
+            return
+        codes, names = pd.factorize(stations[keep])
+        d, counts = d[keep], counts[keep]
+        # one sketch update per distinct (station, direction) in the batch
+        per_key = scatter_sum(codes * 2 + d, counts, len(names) * 2)
+        present = np.flatnonzero(per_key)
+        keys = [f"{names[i >> 1]}\t{DIRECTIONS[i & 1]}" for i in present]
+        self.sketch.add(keys, per_key[present])
+        totals = per_key.reshape(-1, 2).sum(axis=1)
+        self.heavy.add(list(names), totals)
+
+    def table(self, n=None, min_total=0) -> pd.DataFrame:
+        """
+        Station/Entry/Exit/Total (Count-Min estimates) of the Space-Saving
+        stations, busiest first, like ``process_patronage`` with ascending=False.
+        """
+        stations = [key for key, _, _ in self.heavy.top()]
+        if stations:
+            est = self.sketch.estimate([f"{s}\t{d}" for s in stations for d in DIRECTIONS]).reshape(-1, 2)
+        else:
+            est = np.zeros((0, 2), dtype=np.int64)
+        df = pd.DataFrame({"Station": stations, "Entry": est[:, 0], "Exit": est[:, 1]})
+        df["Total"] = df["Entry"] + df["Exit"]
+        df = df[df["Total"] >= min_total].sort_values("Total", ascending=False, kind="stable")
+        return df.head(n).reset_index(drop=True) if n else df.reset_index(drop=True)
+
+
+# ---------- Event sources ----------
+def parse_events(lines) -> tuple:
+    """(stations, directions, counts) of ``Station,Entry|Exit[,count]`` lines; malformed lines are skipped."""
+    if not lines:
+        return np.empty(0, dtype=object), np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+    df = pd.read_csv(io.StringIO("".join(lines)), header=None, names=["Station", "Entry_Exit", "Count"],
+                     dtype={"Station": object, "Entry_Exit": object}, skipinitialspace=True,
+                     skip_blank_lines=True, on_bad_lines="skip")
+    counts = pd.to_numeric(df["Count"], errors="coerce").fillna(1).astype(np.int64)
+    stations = df["Station"].str.strip().to_numpy(dtype=object)
+    return stations, df["Entry_Exit"].to_numpy(dtype=object), counts.to_numpy()
+
+
+def tail_batches(path, batch=BATCH, poll=0.2, follow=True, from_start=True):
+    """Batches of complete lines from a file that may still be growing (``tail -f``)."""
+    with open(path, encoding="utf-8") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            lines = f.readlines(batch * 32)
+            if lines:
+                lines[0] = partial + lines[0]
+                partial = "" if lines[-1].endswith("\n") else lines.pop()
+                if lines:
+                    yield lines
+                continue
+            if not follow:
+                if partial:
+                    yield [partial]
+                return
+            yield []  # idle: lets the caller emit on time
+            time.sleep(poll)
+
+
+def connection_batches(conn, batch=BATCH, timeout=0.2):
+    """
+    Batches of complete lines from one connected socket, and an idle batch
+    every ``timeout`` quiet seconds. Raw bytes are read when the selector
+    says they are ready, so a quiet feed never puts the socket in a timed-out
+    state; a partial line is kept until its newline arrives.
+    """
+    lines, partial = [], b""
+    with selectors.DefaultSelector() as selector:
+        selector.register(conn, selectors.EVENT_READ)
+        while True:
+            if not selector.select(timeout):
+                yield lines  # idle: lets the caller emit on time
+                lines = []
+                continue
+            try:
+                data = conn.recv(1 << 16)
+            except ConnectionError:
+                data = b""
+            if not data:
+                break
+            buffer = partial + data
+            cut = buffer.rfind(b"\n") + 1
+            partial = buffer[cut:]
+            if cut:
+                lines.extend(buffer[:cut].decode("utf-8", errors="replace").splitlines(keepends=True))
+                if len(lines) >= batch:
+                    yield lines
+                    lines = []
+    if partial:
+        lines.append(partial.decode("utf-8", errors="replace"))
+    if lines:
+        yield lines
+
+
+def socket_batches(port, host="127.0.0.1", batch=BATCH, timeout=0.2):
+    """Batches of lines sent to a local TCP socket, one client at a time (a stand-in for a tap feed)."""
+    with socket.create_server((host, port)) as server:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                yield from connection_batches(conn, batch, timeout)
+
+
+def run(batches, live: LiveTopK, every=5.0, top=10, emit=None):
+    """Fold batches into ``live`` and call ``emit(table)`` at most every ``every`` seconds."""
+    emit = emit or (lambda t: print(t.to_string(index=False), end="\n\n", flush=True))
+    last = time.monotonic()
+    try:
+        for lines in batches:
+            if lines:
+                live.update(*parse_events(lines))
+            if time.monotonic() - last >= every:
+                emit(live.table(top))
+                last = time.monotonic()
+    finally:
+        emit(live.table(top))
+    return live
+
+
+# ---------- Synthetic stream and benchmark ----------
+def station_weights(month="Dec-24"):
+    """(stations, share of taps) from the shipped NSW month, so the stream is as skewed as real patronage."""
+    import nsw
+
+    table = nsw.process_patronage(pd.read_csv(nsw.CSV_PATH), month=month, min_total=0)
+    totals = table["Total"].to_numpy(dtype=float)
+    return table["Station"].to_numpy(dtype=object), totals / totals.sum()
+
+
+def generate(n_events, n_stations=None, seed=0) -> tuple:
+    """
+    (stations, directions) of ``n_events`` random taps: over the shipped NSW
+    stations, or over ``n_stations`` synthetic ones with Zipf-like (1/rank) shares.
+    """
+    rng = np.random.default_rng(seed)
+    if n_stations:
+        import synthetic
+
+        names = synthetic.station_names(n_stations)
+        p = 1 / np.arange(1, n_stations + 1)
+        p /= p.sum()
+    else:
+        names, p = station_weights()
+    stations = names[rng.choice(len(names), size=n_events, p=p)]
+    directions = np.asarray(DIRECTIONS, dtype=object)[rng.integers(0, 2, size=n_events)]
+    return stations, directions
+
+
+def benchmark(n_events, n_stations=None, epsilon=1e-4, delta=1e-3, capacity=200, k=10, batch=BATCH,
+              log=print) -> dict:
+    """Ingest rate and error of ``LiveTopK`` against exact counts."""
+    stations, directions = generate(n_events, n_stations)
+    lines = [f"{s},{d}\n" for s, d in zip(stations, directions)]
+    live = LiveTopK(epsilon, delta, capacity)
+    start = time.perf_counter()
+    for lo in range(0, n_events, batch):
+        live.update(*parse_events(lines[lo:lo + batch]))
+    took = time.perf_counter() - start
+
+    exact = pd.DataFrame({"Station": stations, "Entry_Exit": directions}).value_counts().unstack(fill_value=0)
+    exact["Total"] = exact["Entry"] + exact["Exit"]
+    true_top = exact.sort_values("Total", ascending=False).head(k)
+    got = live.table(k)
+    over = (live.sketch.estimate([f"{s}\t{d}" for s in exact.index for d in DIRECTIONS]).reshape(-1, 2)
+            - exact[["Entry", "Exit"]].to_numpy())
+    result = {
+        "events": n_events,
+        "events_per_s": n_events / took,
+        "memory_bytes": live.nbytes,
+        "bound": live.sketch.error_bound(),
+        "max_over": int(over.max()),
+        "top_recall": len(set(got["Station"]) & set(true_top.index)) / k,
+        "top_max_rel_err": float((got.set_index("Station")["Total"] / exact["Total"]).loc[got["Station"]].max() - 1),
+    }
+    log(f"{n_events:,} taps in {took:.2f} s: {result['events_per_s']:,.0f} taps/s, "
+        f"sketches {result['memory_bytes'] / 1024:.0f} KiB")
+    log(f"Count-Min overestimate: max {result['max_over']:,} (bound eps*N = {result['bound']:,.0f}); "
+        f"top-{k} recall {result['top_recall']:.0%}, worst top-{k} total +{result['top_max_rel_err']:.3%}")
+    return result
+
+
+def main(argv=None):
+    import synthetic
+
+    parser = argparse.ArgumentParser(description="Live busiest-station tables from tap events.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("tail", "listen"):
+        p = sub.add_parser(name)
+        p.add_argument("source", help="event file" if name == "tail" else "TCP port on 127.0.0.1")
+        p.add_argument("--every", type=float, default=5.0, help="seconds between tables")
+        p.add_argument("--top", type=int, default=10)
+        p.add_argument("--epsilon", type=float, default=1e-4)
+        p.add_argument("--delta", type=float, default=1e-3)
+        p.add_argument("--capacity", type=int, default=200, help="Space-Saving counters")
+        if name == "tail":
+            p.add_argument("--once", action="store_true", help="stop at the end of the file instead of following it")
+    g = sub.add_parser("generate")
+    g.add_argument("size")
+    g.add_argument("out")
+    b = sub.add_parser("bench")
+    b.add_argument("size", nargs="?", default="2M")
+    b.add_argument("--stations", default=None, help="synthetic Zipf stations instead of the NSW ones, e.g. 100k")
+    b.add_argument("--epsilon", type=float, default=1e-4)
+    b.add_argument("--capacity", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "generate":
+        stations, directions = generate(synthetic.parse_size(args.size))
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.writelines(f"{s},{d}\n" for s, d in zip(stations, directions))
+        print("Wrote", args.out)
+        return 0
+    if args.cmd == "bench":
+        n_stations = synthetic.parse_size(args.stations) if args.stations else None
+        benchmark(synthetic.parse_size(args.size), n_stations, epsilon=args.epsilon, capacity=args.capacity)
+        return 0
+
+    live = LiveTopK(args.epsilon, args.delta, args.capacity)
+    if args.cmd == "tail":
+        batches = tail_batches(args.source, follow=not args.once)
+    else:
+        batches = socket_batches(int(args.source))
+    try:
+        run(batches, live, every=args.every, top=args.top)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
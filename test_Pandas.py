@@ -18,75 +18,7 @@ import pandas as pd
 import os
 import sys
 
-# File paths (adjust if needed)
-CSV_PATH = os.path.join(os.path.dirname(__file__), "NSW_Train_patronage_per_station.csv")
-PROCESSED_OUT = os.path.join(os.path.dirname(__file__), "processed_patronage_dec24.csv")
-
-
-def clean_trip_value(x):
-    """Convert Trip string values to numeric. Treat 'Less than 50' as 25."""
-    s = str(x).strip().replace(",", "")
-    if s.lower().startswith("less than"):
-        # e.g. 'Less than 50' → midpoint = 25
-        for p in s.split()[::-1]:
-            if p.isdigit():
-                return int(int(p) // 2)
-        return 25
-    try:
-        return int(float(s))
-    except:
-        return 0
-
-
-def process_patronage(df, month="Dec-24", min_total=200, ascending=False):
-    """
-    Process the raw dataframe:
-      - keep only rows for the requested month
-      - convert Trip to numeric
-      - pivot Entry/Exit into columns then sum totals per Station
-      - drop stations with Total < min_total
-      - return dataframe sorted by Total
-    """
-    d = df.copy()
-    month_col = "MonthYear" if "MonthYear" in d.columns else "Month"
-    d = d[d[month_col] == month].copy()
-
-    if d.empty:
-        raise ValueError(f"No rows found for month '{month}'.")
-
-    d["Trip_num"] = d["Trip"].apply(clean_trip_value).astype("Int64")
-
-    if "Entry_Exit" in d.columns:
-        pivot = d.pivot_table(
-            index="Station",
-            columns="Entry_Exit",
-            values="Trip_num",
-            aggfunc="sum",
-            fill_value=0,
-        )
-        for c in ["Entry", "Exit"]:
-            if c not in pivot.columns:
-                pivot[c] = 0
-        pivot = pivot.reset_index().rename_axis(None, axis=1)
-        pivot["Total"] = pivot["Entry"] + pivot["Exit"]
-    else:
-        pivot = d.groupby("Station", as_index=False).agg(Total=("Trip_num", "sum"))
-        pivot["Entry"] = pd.NA
-        pivot["Exit"] = pd.NA
-
-    pivot = pivot[pivot["Total"] >= min_total].copy()
-    pivot.sort_values("Total", ascending=ascending, inplace=True)
-    pivot.reset_index(drop=True, inplace=True)
-    return pivot
-
-
-def list_outliers(df):
-    """Find outliers using mean ± 2*std."""
-    mean = df["Total"].mean()
-    std = df["Total"].std()
-    high = df[df["Total"] > mean + 2 * std]
-    low = df[df["Total"] < max(0, mean - 2 * std)]
-    return low, high
+from nsw import CSV_PATH, PROCESSED_OUT, list_outliers, process_patronage
 
 
 def main():
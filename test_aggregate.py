@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import nsw
+import synthetic
+from aggregate import pivot_sum, scatter_sum
+
+
+def _reference(d):
+    return d.pivot_table(index="Station", columns="Entry_Exit", values="Trip_num", aggfunc="sum", fill_value=0)
+
+
+def test_pivot_sum_matches_pivot_table():
+    d = pd.DataFrame({
+        "Station": ["B", "A", "B", None, "C", "A", "D"],
+        "Entry_Exit": ["Exit", "Entry", "Entry", "Entry", "Both", "Entry", None],
+        "Trip_num": [5, 1, 2, 100, 7, 3, 9],
+    })
+    stations, directions, sums = pivot_sum(d["Station"], d["Entry_Exit"], d["Trip_num"].to_numpy())
+    ref = _reference(d)
+    assert list(stations) == list(ref.index) == ["A", "B", "C"]
+    assert list(directions) == list(ref.columns) == ["Both", "Entry", "Exit"]
+    assert sums.tolist() == ref.to_numpy().tolist()
+
+
+def test_scatter_sum_stays_exact_past_float_precision():
+    big = np.array([2 ** 53 + 1, 1, 2 ** 60, 3], dtype=np.int64)
+    out = scatter_sum(np.array([0, 0, 1, 1]), big, 3)
+    assert out.dtype == np.int64
+    assert out.tolist() == [2 ** 53 + 2, 2 ** 60 + 3, 0]
+    assert scatter_sum(np.array([], dtype=np.intp), np.array([], dtype=np.int64), 2).tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("month", ["Dec-24", "Jan-25"])
+def test_process_patronage_matches_pivot_table(month):
+    df = synthetic.nsw_frame(20_000, seed=3)
+    d = df[df["MonthYear"] == month].copy()
+    d["Trip_num"] = nsw.clean_trip_column(d["Trip"], "nsw")
+    ref = _reference(d).reset_index()
+    ref["Total"] = ref["Entry"] + ref["Exit"]
+    ref = ref[ref["Total"] >= 200].sort_values("Total", ascending=False).reset_index(drop=True)
+
+    out = nsw.process_patronage(df, month=month, min_total=200)
+    assert out["Station"].tolist() == ref["Station"].tolist()
+    assert out["Total"].tolist() == ref["Total"].tolist()
@@ -0,0 +1,81 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from batch import BatchSession, make_queries
+import vic
+from nsw import CSV_PATH, list_outliers, process_patronage
+from pax import PaxAggregate
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture
+def session(raw):
+    return BatchSession(frames={"nsw": raw})
+
+
+def _rows(df):
+    return [{k: int(v) if k != "Station" else v for k, v in r.items()} for r in df.to_dict("records")]
+
+
+@pytest.mark.parametrize("sort", ["desc", "asc"])
+def test_matches_process_patronage(raw, session, sort):
+    expected = process_patronage(raw, month="Jan-25", min_total=200, ascending=sort == "asc")
+    expected = expected.sort_values(["Total", "Station"], ascending=sort == "asc", kind="mergesort")
+    ask = {"month": "Jan-25", "min_total": 200, "sort": sort}
+    assert session.answer({"op": "table", **ask})["result"] == _rows(expected)
+    assert session.answer({"op": "top", "n": 5, **ask})["result"] == _rows(expected.head(5))
+    assert session.answer({"op": "bottom", "n": 5, **ask})["result"] == _rows(expected.tail(5))
+    assert session.answer({"op": "count", **ask})["result"] == len(expected)
+    busiest = session.answer({"op": "busiest", **ask})["result"]
+    assert busiest["Total"] == expected.Total.max()
+
+    low, high = list_outliers(expected)
+    outliers = session.answer({"op": "outliers", **ask})["result"]
+    assert sorted(r["Station"] for r in outliers["high"]) == sorted(high.Station)
+    assert sorted(r["Station"] for r in outliers["low"]) == sorted(low.Station)
+
+
+def test_run_reports_errors_per_line(session, tmp_path):
+    path = tmp_path / "dec.csv"
+    lines = [
+        json.dumps({"op": "top", "n": 3}),
+        json.dumps({"op": "top", "n": 3}),
+        "",
+        json.dumps({"op": "nope"}),
+        "{not json",
+        json.dumps({"op": "top", "month": "Dec-99"}),
+        json.dumps({"op": "save", "path": str(path)}),
+    ]
+    out = io.StringIO()
+    assert session.run(lines, out) == 6
+    answers = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [a["ok"] for a in answers] == [True, True, False, False, False, True]
+    assert answers[0]["result"] == answers[1]["result"] and len(answers[0]["result"]) == 3
+    assert [a["line"] for a in answers] == [1, 2, 4, 5, 6, 7]
+    assert len(pd.read_csv(path)) == session.answer({"op": "count"})["result"]
+
+
+def test_generated_queries_all_answer(session):
+    queries = make_queries(500, ["Dec-24", "Jan-25"])
+    assert all(session.answer(q)["ok"] for q in queries)
+
+
+def test_vic_queries_on_the_shipped_pax_file():
+    session = BatchSession()
+    agg = PaxAggregate.from_frame(vic.load(report=False))
+    year = agg.years[-1]
+    top = session.answer({"dataset": "vic", "op": "top", "n": 3})
+    assert top["ok"] and [r["Station"] for r in top["result"]] == agg.top(3, fin_year=year)["Station"].tolist()
+    count = session.answer({"dataset": "vic", "op": "count", "month": year, "min_total": 1_000_000})
+    assert count["result"] == len(agg.table(year, min_value=1_000_000))
+    bottom = session.answer({"dataset": "vic", "op": "bottom", "n": 2, "min_total": 0})["result"]
+    assert [r["Station"] for r in bottom] == agg.bottom(2, fin_year=year)["Station"].tolist()[::-1]
+    assert session.months("vic") == agg.years
+    assert "financial year" in session.answer({"dataset": "vic", "op": "top", "month": "Dec-24"})["error"]
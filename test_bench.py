@@ -0,0 +1,41 @@
+import json
+
+import pandas as pd
+
+import bench
+import nsw
+import synthetic
+import vic
+
+
+def test_parse_size():
+    assert synthetic.parse_size("10k") == 10_000
+    assert synthetic.parse_size("1M") == 1_000_000
+    assert synthetic.parse_size("2500") == 2500
+
+
+def test_generators_match_shipped_schemas():
+    df = synthetic.nsw_frame(1000)
+    assert len(df) == 1000
+    assert list(df.columns) == list(pd.read_csv(nsw.CSV_PATH, nrows=1).columns)
+    assert not nsw.process_patronage(df, month="Aug-24", min_total=0).empty
+
+    wide = synthetic.vic_frame(1000)
+    assert len(wide) == 1000 and set(synthetic.VIC_PAX) <= set(wide.columns)
+
+    long = synthetic.vic_long_frame(1000)
+    assert vic.detect_schema(long) is not None
+    assert not vic.process_patronage(long, month="Aug-24", min_total=0).empty
+
+
+def test_run_and_compare(tmp_path):
+    baseline = bench.run([500], repeat=1, log=lambda *a: None)
+    assert "nsw/process_patronage/500" in baseline["results"]
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+
+    slower = json.loads(path.read_text())
+    slower["results"]["nsw/read_csv/500"]["seconds"] *= 2
+    rows = bench.compare(baseline, slower, threshold=0.2)
+    assert [key for key, *_, regressed in rows if regressed] == ["nsw/read_csv/500"]
+    assert bench.main(["compare", str(path), str(path)]) == 0
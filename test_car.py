@@ -0,0 +1,51 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nsw
+from car import CAR_CSV_PATH, AreaIndex, CarOwnership, compare
+from cube import PatronageCube
+
+
+@pytest.fixture
+def car_csv(tmp_path):
+    path = str(tmp_path / "car.csv")
+    shutil.copy(CAR_CSV_PATH, path)
+    return path
+
+
+def test_melt_matches_the_wide_table(car_csv):
+    wide = pd.read_csv(car_csv)
+    long = CarOwnership.load(car_csv).frame()
+    assert len(long) == len(wide) * 7
+    row = wide[(wide["Area"] == "City of Sydney") & (wide["Data label"] == "No motor vehicles")].iloc[0]
+    for year in ["1991", "2021"]:
+        hit = long[(long["Area"] == "City of Sydney") & (long["Year"] == int(year))
+                   & (long["Vehicles"] == "No motor vehicles")].iloc[0]
+        assert hit["Count"] == row[year] and hit["Pct"] == pytest.approx(row[year + "%"])
+
+    cached = CarOwnership.read_cache(car_csv)
+    assert cached is not None and np.array_equal(cached.counts, CarOwnership.from_frame(wide).counts)
+    wide.head(6).to_csv(car_csv, index=False)  # the cache of a different CSV is never used
+    assert CarOwnership.read_cache(car_csv) is None
+    assert CarOwnership.load(car_csv).areas == ["City of Sydney"]
+
+
+def test_compare_joins_areas_months_and_census(car_csv):
+    raw = nsw.load(report=False)
+    cube = PatronageCube.from_frame(raw)
+    index = AreaIndex.from_stations(cube.stations)
+    assert "Central  Station" in index.stations("City of Sydney", list(cube.stations))
+    greater = index.stations("Greater Sydney", list(cube.stations))
+    assert "Parramatta  Station" in greater and "Wollongong  Station" not in greater
+
+    out = compare(CarOwnership.load(car_csv), cube, index)
+    assert len(out) == 2 * len(cube.months) and set(out["Census_year"]) == {2021}
+    city = set(index.stations("City of Sydney", list(cube.stations)))
+    dec = raw[(raw["MonthYear"] == "Dec-24") & raw["Station"].isin(city)]
+    row = out[(out["Area"] == "City of Sydney") & (out["Month"] == "Dec-24")].iloc[0]
+    assert row["Total"] == dec.loc[dec["Entry_Exit"].isin(["Entry", "Exit"]), "Trip_num"].sum()
+    assert row["Stations"] == dec["Station"].nunique()
+    assert row["Households"] == 104795 and row["No_vehicle_pct"] == pytest.approx(36.6621)
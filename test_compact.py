@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from compact import CompactPatronage, memory_report
+from nsw import CSV_PATH, process_patronage
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture(scope="module")
+def compact(raw):
+    return CompactPatronage.from_frame(raw)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_process_on_codes_matches(raw, compact, ascending):
+    for month in raw["MonthYear"].unique():
+        expected = process_patronage(raw, month=month, ascending=ascending)
+        pd.testing.assert_frame_equal(compact.process(month, ascending=ascending), expected)
+
+
+def test_layout(raw, compact):
+    assert compact.trips.dtype == "int32"
+    assert compact.censored.sum() == (raw["Trip"] == "Less than 50").sum()
+    frame = compact.to_frame()
+    assert frame["Station"].astype(str).tolist() == raw["Station"].tolist()
+    assert (frame.loc[frame["Censored"], "Trip"] == 25).all()
+
+
+def test_shared_station_dictionary(raw):
+    shared = pd.Index(["Zzz  Station", "Central  Station"])
+    compact = CompactPatronage.from_frame(raw, stations=shared)
+    assert list(compact.stations[:2]) == ["Zzz  Station", "Central  Station"]
+    pd.testing.assert_frame_equal(compact.process("Dec-24"), process_patronage(raw, month="Dec-24"))
+
+
+def test_memory_report_shows_reduction(raw, compact):
+    report = memory_report(raw, compact)
+    assert report.loc["TOTAL", "after_bytes"] * 10 < report.loc["TOTAL", "before_bytes"]
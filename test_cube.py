@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from cube import PatronageCube
+from nsw import CSV_PATH, process_patronage
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture(scope="module")
+def cube(raw):
+    return PatronageCube.from_frame(raw)
+
+
+def test_covers_every_month(cube):
+    assert cube.months == ["Aug-24", "Sep-24", "Oct-24", "Nov-24", "Dec-24", "Jan-25",
+                           "Feb-25", "Mar-25", "Apr-25", "May-25", "Jun-25"]
+    assert cube.values.shape == (len(cube.stations), 11, 2)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_month_table_matches_process_patronage(raw, cube, ascending):
+    for month in cube.months:
+        expected = process_patronage(raw, month=month, ascending=ascending)
+        pd.testing.assert_frame_equal(cube.month_table(month, ascending=ascending), expected)
+
+
+def test_range_sums_months(raw, cube):
+    quarter = cube.month_range("Jan-25", "Mar-25")
+    assert quarter == ["Jan-25", "Feb-25", "Mar-25"]
+    totals = cube.range_table(quarter, min_total=0).set_index("Station")["Total"]
+    by_month = [process_patronage(raw, month=m, min_total=0).set_index("Station")["Total"] for m in quarter]
+    expected = pd.concat(by_month, axis=1).fillna(0).sum(axis=1)
+    assert totals.sort_index().tolist() == expected.sort_index().tolist()
+
+
+def test_financial_year_and_unknown_month(cube):
+    assert cube.financial_year("FY24-25") == cube.financial_year("fy2024-25") == cube.months
+    assert cube.financial_year("FY2024-2025") == cube.months
+    for bad in ["FY202024-25", "FY24-26", "2024-25"]:
+        with pytest.raises(ValueError, match="financial year"):
+            cube.financial_year(bad)
+    with pytest.raises(ValueError):
+        cube.month_table("Dec-99")
+
+
+def test_frame_without_entry_exit_is_refused(raw):
+    with pytest.raises(ValueError, match="Entry_Exit"):
+        PatronageCube.from_frame(raw.drop(columns="Entry_Exit"))
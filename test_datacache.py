@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import datacache
+from datacache import cache_path, load_dataset
+from nsw import CSV_PATH
+from trips import clean_trip_column
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "nsw.csv"
+    shutil.copy(CSV_PATH, path)
+    return str(path)
+
+
+def test_cached_frame_matches_read_csv(csv, capsys):
+    first = load_dataset(csv, trip_style="nsw")
+    assert os.path.exists(cache_path(csv))
+    second = load_dataset(csv, trip_style="nsw")
+    assert "from cache" in capsys.readouterr().out
+
+    raw = pd.read_csv(csv)
+    pd.testing.assert_frame_equal(second.drop(columns="Trip_num"), raw)
+    pd.testing.assert_frame_equal(second, first)
+    assert second["Trip_num"].tolist() == clean_trip_column(raw["Trip"], "nsw").tolist()
+
+
+def test_touched_but_unchanged_file_stays_cached(csv, capsys, monkeypatch):
+    load_dataset(csv)
+    st = os.stat(csv)
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    hashes, real_hash = [], datacache._file_hash
+    monkeypatch.setattr(datacache, "_file_hash", lambda path: hashes.append(path) or real_hash(path))
+    capsys.readouterr()
+    for _ in range(3):
+        load_dataset(csv)
+        assert "from cache" in capsys.readouterr().out
+    assert len(hashes) == 1  # the new mtime is recorded after the first hash
+    assert [name for name in os.listdir(os.path.dirname(csv)) if name.endswith(".npz")] == ["nsw.csv.cache.npz"]
+
+
+def test_edited_file_invalidates_cache(csv, capsys):
+    load_dataset(csv)
+    with open(csv, "a", encoding="utf-8") as f:
+        f.write("99999,Dec-24,Extra  Station,Train,Entry,123\n")
+    capsys.readouterr()
+    df = load_dataset(csv)
+    assert "from cache" not in capsys.readouterr().out
+    assert df["Station"].iloc[-1] == "Extra  Station"
+
+
+def test_trip_style_is_part_of_the_key(csv):
+    load_dataset(csv, trip_style="nsw")
+    assert "Trip_num" not in load_dataset(csv, report=False).columns
+
+
+def test_mixed_object_columns_keep_their_values(csv):
+    from datacache import read_cache, write_cache
+
+    df = pd.DataFrame({
+        "Station": ["A", None, "C", "D"],
+        "Mixed": pd.array(["x", 1, float("nan"), 2.5], dtype=object),
+        "Trip": [1, 2, 3, 4],
+    })
+    pd.testing.assert_frame_equal(read_cache(write_cache(df, csv)), df)
@@ -0,0 +1,59 @@
+import random
+
+import pandas as pd
+import pytest
+
+from incremental import IncrementalPatronage, RowBuffer
+from nsw import CSV_PATH, process_patronage
+
+
+def _by_total_then_name(df, ascending):
+    d = df.sort_values(["Total", "Station"], kind="mergesort")
+    return (d if ascending else d[::-1]).reset_index(drop=True)
+
+
+@pytest.fixture
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_adds_match_full_reprocess(raw, ascending):
+    engine = IncrementalPatronage(raw)
+    engine.table("Dec-24", ascending=ascending)
+    rng = random.Random(3)
+    stations = list(raw["Station"].unique()[:40]) + ["Brand New  Station"]
+    for _ in range(500):
+        engine.add({
+            "MonthYear": rng.choice(["Dec-24", "Jan-25", "Jul-25"]),
+            "Station": rng.choice(stations),
+            "Entry_Exit": rng.choice(["Entry", "Exit"]),
+            "Trip": rng.choice(["Less than 50", str(rng.randint(0, 3000))]),
+        })
+    full = engine.frame()
+    assert len(full) == len(raw) + 500
+    for month in ["Dec-24", "Jan-25", "Jul-25"]:
+        expected = process_patronage(full, month=month, ascending=ascending)
+        pd.testing.assert_frame_equal(engine.table(month, ascending=ascending),
+                                      _by_total_then_name(expected, ascending))
+        pd.testing.assert_frame_equal(engine.cube.month_table(month, ascending=ascending), expected)
+
+
+def test_station_crosses_min_total(raw):
+    engine = IncrementalPatronage(raw)
+    assert "Nowhere  Station" not in engine.table("Dec-24").Station.tolist()
+    engine.add({"MonthYear": "Dec-24", "Station": "Nowhere  Station", "Entry_Exit": "Entry", "Trip": "150"})
+    assert "Nowhere  Station" not in engine.table("Dec-24").Station.tolist()
+    engine.add({"MonthYear": "Dec-24", "Station": "Nowhere  Station", "Entry_Exit": "Exit", "Trip": "60"})
+    row = engine.table("Dec-24").set_index("Station").loc["Nowhere  Station"]
+    assert (row["Entry"], row["Exit"], row["Total"]) == (150, 60, 210)
+
+
+def test_row_buffer_adds_new_columns():
+    buf = RowBuffer(["a"])
+    buf.append({"a": 1})
+    buf.append({"a": 2, "b": "x"})
+    frame = buf.to_frame()
+    assert frame.columns.tolist() == ["a", "b"]
+    assert frame["a"].tolist() == [1, 2]
+    assert frame["b"].isna().tolist() == [True, False]
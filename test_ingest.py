@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import nsw
+from ingest import expand, ingest, ingest_into, read_manifest
+
+
+@pytest.fixture
+def releases(tmp_path):
+    """The shipped file split into monthly drops; each drop repeats the previous month with revised trips."""
+    raw = pd.read_csv(nsw.CSV_PATH)
+    months = list(pd.unique(raw["MonthYear"]))
+    directory = tmp_path / "releases"
+    directory.mkdir()
+    for i, month in enumerate(months):
+        current = raw[raw["MonthYear"] == month]
+        if i:
+            previous = raw[raw["MonthYear"] == months[i - 1]].copy()
+            previous["Trip"] = "999"  # a revision of what the last drop published
+            current = pd.concat([previous, current])
+        current.assign(_id=range(1, len(current) + 1)).to_csv(directory / f"{i:02d}_{month}.csv", index=False)
+    expected = raw.copy()
+    expected.loc[expected["MonthYear"] != months[-1], "Trip"] = "999"
+    return directory, expected
+
+
+def test_merge_keeps_the_latest_release(releases):
+    directory, expected = releases
+    df = ingest(directory, workers=2)
+    assert len(df) == len(expected) and df["_id"].tolist() == list(range(1, len(df) + 1))
+    for month in ["Aug-24", "Dec-24", "Jun-25"]:
+        pd.testing.assert_frame_equal(nsw.process_patronage(df, month=month),
+                                      nsw.process_patronage(expected, month=month))
+    assert (df["Trip_num"] == 999).sum() == (expected["Trip"] == "999").sum()
+
+
+def test_known_files_are_skipped_and_merged_into_output(releases, tmp_path):
+    directory, expected = releases
+    files = expand(str(directory / "*.csv"))
+    shutil.copy(files[0], directory / "copy_of_first.csv")  # same content, different name
+
+    known = {}
+    ingest(files[:5] + [str(directory / "copy_of_first.csv")], known=known, workers=1)
+    assert len(known) == 5
+
+    out = str(tmp_path / "all.csv")
+    ingest_into(files[:5], out, report=False)
+    first = os.path.getmtime(out)
+    ingest_into(files[:5], out, report=False)  # nothing new: the output is left alone
+    assert os.path.getmtime(out) == first
+    df = ingest_into(directory, out, report=False)
+    assert len(read_manifest(out)) == len(files)
+    assert len(df) == len(expected) == len(pd.read_csv(out))
+    with pytest.raises(ValueError):
+        expand(str(tmp_path / "missing"))
+
+
+@pytest.mark.parametrize("numeric_first", [True, False])
+def test_numeric_and_text_trip_releases_merge(tmp_path, numeric_first):
+    header = "_id,MonthYear,Station,Entry_Exit,Trip\n"
+    numeric = tmp_path / "a.csv"
+    numeric.write_text(header + "1,Nov-24,Central  Station,Entry,120\n2,Nov-24,Central  Station,Exit,80\n")
+    text = tmp_path / "b.csv"
+    text.write_text(header + "1,Dec-24,Central  Station,Entry,Less than 50\n2,Dec-24,Central  Station,Exit,300\n")
+    files = [str(numeric), str(text)] if numeric_first else [str(text), str(numeric)]
+    out = str(tmp_path / "all.csv")
+    df = ingest_into(files, out, workers=1, report=False)
+    assert df["Trip"].tolist() == ["120", "80", "Less than 50", "300"]
+    assert df["Trip_num"].tolist() == [120, 80, 25, 300]
+    assert pd.read_csv(out)["Trip"].tolist() == ["120", "80", "Less than 50", "300"]
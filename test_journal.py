@@ -0,0 +1,83 @@
+import random
+
+import pandas as pd
+import pytest
+
+import nsw
+import synthetic
+from journal import Journal
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "nsw.csv")
+    synthetic.nsw_frame(5_000, seed=2).to_csv(path, index=False)
+    return path
+
+
+def _load(path):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return nsw.load(path, report=False)
+
+    return load, calls
+
+
+def _rows(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "MonthYear": rng.choice(["Dec-24", "Jan-25", "Jul-25"]),
+        "Station": rng.choice(["Alpha  Station", "Zulu  Station", "Brand New  Station"]),
+        "Entry_Exit": rng.choice(["Entry", "Exit"]),
+        "Trip": rng.choice(["Less than 50", str(rng.randint(0, 3000))]),
+    } for _ in range(n)]
+
+
+def test_reopen_replays_snapshot_and_tail(csv_path):
+    rows = _rows(25)
+    load, calls = _load(csv_path)
+    journal = Journal(csv_path, snapshot_every=10)
+    engine = journal.open_engine(load, report=False)
+    for row in rows:
+        engine.add(row)
+    journal.close()
+    assert len(journal.rows()) == 25
+    assert journal.read_snapshot()[1]["journal_offset"] < journal.size()  # 5 rows after the last snapshot
+
+    load, calls = _load(csv_path)
+    journal = Journal(csv_path, snapshot_every=10)
+    reopened = journal.open_engine(load, report=False)
+    full = pd.concat([pd.read_csv(csv_path), pd.DataFrame(rows)], ignore_index=True)
+    assert len(reopened) == len(full) and calls == []  # the CSV was not read
+    assert journal.since_snapshot == 5  # the replayed tail counts toward the next snapshot
+    offset = journal.read_snapshot()[1]["journal_offset"]
+    for row in _rows(5, seed=1):
+        reopened.add(row)
+    assert journal.read_snapshot()[1]["journal_offset"] > offset and journal.since_snapshot == 0
+    journal.close()
+    rows += _rows(5, seed=1)
+    full = pd.concat([pd.read_csv(csv_path), pd.DataFrame(rows)], ignore_index=True)
+    for month in ["Dec-24", "Jan-25", "Jul-25"]:
+        expected = nsw.process_patronage(full, month=month, min_total=0)
+        pd.testing.assert_frame_equal(reopened.cube.month_table(month, min_total=0), expected)
+    assert len(reopened.frame()) == len(full) and calls == [1]
+    assert reopened.frame()["Trip_num"].notna().all()
+
+
+def test_torn_line_and_changed_csv(csv_path):
+    journal = Journal(csv_path)
+    engine = journal.open_engine(_load(csv_path)[0], report=False)
+    engine.add(_rows(1)[0])
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"MonthYear": "Dec-24", "Stat')
+    assert len(Journal(csv_path).rows()) == 1
+
+    # a snapshot of a different CSV is never used
+    pd.read_csv(csv_path).head(100).to_csv(csv_path, index=False)
+    assert Journal(csv_path).read_snapshot() is None
+    load, calls = _load(csv_path)
+    engine = Journal(csv_path).open_engine(load, report=False)
+    assert calls == [1] and len(engine.frame()) == 101
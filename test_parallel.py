@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import synthetic
+import vic
+from nsw import CSV_PATH, process_patronage
+from parallel import merge_months, process_all
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_nsw_months_match_process_patronage(raw, ascending):
+    tables = process_all({"nsw": raw}, ascending=ascending, workers=2)["nsw"]
+    assert list(tables) == ["Aug-24", "Sep-24", "Oct-24", "Nov-24", "Dec-24", "Jan-25",
+                            "Feb-25", "Mar-25", "Apr-25", "May-25", "Jun-25"]
+    for month, table in tables.items():
+        pd.testing.assert_frame_equal(table, process_patronage(raw, month=month, ascending=ascending))
+
+
+def test_vic_long_and_wide_match_process_patronage():
+    long = synthetic.vic_long_frame(5000)
+    wide = pd.DataFrame({"Month": ["Dec-24", "Dec-24", "Jan-25", "Dec-24"], "Station": ["B", "A", "A", "B"],
+                         "Entry": [300, "7", 10, None], "Exit": [1, 500, 20, 2]})
+    tables = process_all({"vic": long, "vic_wide": wide}, min_total=0, workers=1)
+    for name, df in [("vic", long), ("vic_wide", wide)]:
+        for month, table in tables[name].items():
+            pd.testing.assert_frame_equal(table, vic.process_patronage(df, month=month, min_total=0))
+
+
+def test_merge_months(raw):
+    tables = process_all({"nsw": raw}, min_total=0, workers=1)["nsw"]
+    merged = merge_months(tables)
+    assert list(merged.columns) == ["Month", "Station", "Entry", "Exit", "Total"]
+    assert len(merged) == sum(len(t) for t in tables.values())
+    assert merged.Month.iloc[0] == "Aug-24" and merged.Month.iloc[-1] == "Jun-25"
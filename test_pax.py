@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic
+from pax import ALL_YEARS, PaxAggregate, is_pax_frame
+from vic import CSV_PATH
+
+
+@pytest.fixture(scope="module")
+def frame():
+    df = synthetic.vic_frame(3000)
+    # a duplicated stop row and a stop missing from one year
+    return pd.concat([df, df.iloc[[0]]], ignore_index=True).drop(index=5)
+
+
+@pytest.fixture(scope="module")
+def agg(frame):
+    return PaxAggregate.from_frame(frame)
+
+
+def test_sums_match_groupby(frame, agg):
+    expected = frame.groupby(["Stop_name", "Fin_year"])[synthetic.VIC_PAX].sum()
+    for (stop, year), row in expected.sample(200, random_state=0).iterrows():
+        s, y = agg.stations.get_loc(stop), agg.years.index(year)
+        assert agg.values[s, y].tolist() == row.tolist()
+    assert agg.present.sum() == len(expected)
+    by_stop = frame.groupby("Stop_name")["Pax_annual"].sum()
+    table = agg.table(ALL_YEARS, min_value=-1).set_index("Station")
+    assert table["Pax_annual"].sort_index().tolist() == by_stop.sort_index().tolist()
+
+
+def test_rank_any_metric(agg):
+    year = agg.years[0]
+    for metric in ["Pax_annual", "pax_am_peak", "Peak_ratio"]:
+        table = agg.table(year, metric=metric, min_value=0)
+        name = agg.metric(metric)
+        expected = table.sort_values([name, "Station"], ascending=[False, False], kind="mergesort")
+        assert table.Station.tolist() == expected.Station.tolist()
+        assert agg.top(5, metric, year).Station.tolist() == table.Station.head(5).tolist()
+        assert agg.bottom(5, metric, year).Station.tolist() == table.Station.tail(5)[::-1].tolist()
+    assert agg.table(year, ascending=True).Station.tolist() == agg.table(year).Station.tolist()[::-1]
+
+
+def test_derived_metrics(agg):
+    table = agg.table(agg.years[-1])
+    assert table["Share"].sum() == pytest.approx(1.0)
+    row = table.iloc[0]
+    peak = (row.Pax_AM_peak + row.Pax_PM_peak) / (row.Pax_pre_AM_peak + row.Pax_interpeak + row.Pax_PM_late)
+    assert row.Peak_ratio == pytest.approx(peak)
+    assert row.Weekend_ratio == pytest.approx((row.Pax_Saturday + row.Pax_Sunday) / 2 / row.Pax_weekday)
+    assert np.allclose(agg.shares(agg.years[-1]).sum(axis=0), 1.0)
+
+
+def test_errors(agg):
+    with pytest.raises(KeyError):
+        agg.table(metric="Pax_nope")
+    with pytest.raises(ValueError):
+        agg.table("FY99-00")
+
+
+def test_shipped_file():
+    df = pd.read_csv(CSV_PATH)
+    assert is_pax_frame(df)
+    agg = PaxAggregate.from_frame(df)
+    assert agg.years == ["FY24-25"] and len(agg.stations) == 222
+    assert agg.top(1).Station.iloc[0] == "Flinders Street"
+    low, high = agg.outliers()
+    assert "Flinders Street" in high.Station.tolist()
+    assert not is_pax_frame(synthetic.vic_long_frame(100))
@@ -0,0 +1,59 @@
+import builtins
+import json
+import time
+
+import pandas as pd
+import pytest
+
+import nsw
+import profiling
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    p = profiling.enable(json_path=str(tmp_path / "trace.json"), report=False)
+    yield p
+    profiling.disable()
+
+
+def test_off_by_default():
+    assert not profiling.enabled()
+    assert profiling.stage("anything", 10) is profiling._OFF
+    assert profiling.configure(environ={}) is None
+    assert profiling.configure(environ={"PATRONAGE_PROFILE": "0"}) is None
+
+
+def test_process_patronage_stages(profiler, tmp_path):
+    raw = pd.read_csv(nsw.CSV_PATH)
+    table = nsw.process_patronage(raw, month="Dec-24")
+    nsw.list_outliers(table)
+    profiling.disable()
+
+    stats = profiler.stats
+    assert list(stats)[:6] == ["nsw.process_patronage", "nsw.month_filter", "nsw.clean_trip", "nsw.pivot",
+                               "nsw.min_total_filter", "nsw.sort"]
+    month_rows = int((raw["MonthYear"] == "Dec-24").sum())
+    assert stats["nsw.process_patronage"]["rows_in"] == len(raw)
+    assert stats["nsw.month_filter"]["rows_out"] == month_rows == stats["nsw.clean_trip"]["rows_in"]
+    assert stats["nsw.sort"]["rows_out"] == len(table) == stats["nsw.process_patronage"]["rows_out"]
+    assert stats["nsw.month_filter"]["depth"] == 1 and stats["nsw.pivot"]["peak"] > 0
+    low, high = nsw.list_outliers.__wrapped__(table)
+    assert stats["nsw.list_outliers"]["rows_out"] == len(low) + len(high)
+
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert {e["name"] for e in trace["traceEvents"]} >= set(list(stats)[:6])
+    assert "nsw.sort" in profiler.summary()
+
+
+def test_actions_leave_out_keyboard_time(monkeypatch):
+    monkeypatch.setattr(builtins, "input", lambda prompt="": time.sleep(0.05) or "x")
+    p = profiling.configure(environ={"PATRONAGE_PROFILE": "time"})
+    try:
+        assert p is not None and not p.memory
+        profiling.action("nsw", input("Choose: "))
+        input("Station name: ")  # a follow-up prompt inside the action
+        profiling.action("nsw", "0")
+    finally:
+        profiling.disable()
+    assert builtins.input("again") == "x"  # the original input is restored
+    assert p.stats["nsw option x"]["ms"] < 25
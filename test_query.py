@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from nsw import CSV_PATH, process_patronage
+from cache import LRUCache
+from query import QueryEngine, QueryView, compile_query
+from ranking import NO_THRESHOLD, Ranking
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture
+def engine(raw):
+    views = {}
+
+    def view_for(month):
+        if month not in views:
+            table = process_patronage(raw, month=month, min_total=NO_THRESHOLD)
+            views[month] = QueryView.from_ranking(Ranking.from_table(table))
+        return views[month]
+
+    return QueryEngine(view_for, maxsize=4)
+
+
+def _table(raw, month="Dec-24", min_total=200):
+    table = process_patronage(raw, month=month, min_total=min_total)
+    return table.sort_values(["Total", "Station"], ascending=False, kind="mergesort")
+
+
+def test_prompts_with_the_same_meaning_share_a_key():
+    same = ["top 5 in Jan-25 starting with \"Central\"", "Top 5 stations  starting with central in jan-25"]
+    assert len({compile_query(p, period="Dec-24", min_value=200).key for p in same}) == 1
+    assert compile_query("busiest", period="Dec-24").key != compile_query("busiest", period="Jan-25").key
+    for prompt in ["hello there", "top -2", "bottom 0"]:
+        with pytest.raises(ValueError):
+            compile_query(prompt)
+
+
+def test_answers_match_process_patronage(raw, engine):
+    expected = _table(raw)
+    top = engine.ask("top 5", period="Dec-24", min_value=200).value
+    assert top["Station"].tolist() == expected["Station"].head(5).tolist()
+    assert engine.ask("how many stations", period="Dec-24", min_value=200).value == len(expected)
+    busiest = engine.ask("what was the busiest station?", period="Dec-24", min_value=200)
+    assert busiest.text() == f"Busiest station: {expected.iloc[0]['Station']} with Total {expected.iloc[0]['Total']}"
+
+    jan = _table(raw, "Jan-25", min_total=5000)
+    kept = jan[jan["Station"].str.lower().str.startswith("s") & (jan["Exit"] <= 50_000)]
+    answer = engine.ask("sum entry station s exit <= 50,000 total >= 5000 in Jan-25", period="Dec-24", min_value=200)
+    assert answer.value == kept["Entry"].sum()
+    by_exit = engine.ask("bottom 3 by exit", period="Dec-24", min_value=0).value
+    assert by_exit["Exit"].tolist() == sorted(_table(raw, min_total=0)["Exit"])[:3]
+    floored = engine.ask("bottom 3 by exit", period="Dec-24", min_value=1000).value  # the floor stays on Total
+    expected = _table(raw, min_total=1000).sort_values(["Exit", "Station"], kind="mergesort")
+    assert floored["Station"].tolist() == expected["Station"].head(3).tolist()
+
+
+def test_results_are_cached_and_invalidated(engine):
+    first = engine.ask("top 5", period="Dec-24", min_value=200)
+    assert engine.ask("Top   5", period="Dec-24", min_value=200) is first
+    assert engine.results.hits == 1
+    engine.invalidate()
+    assert engine.ask("top 5", period="Dec-24", min_value=200) is not first
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert len(cache) == 2
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ranking import Ranking
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(4)
+    n = 500
+    entry = rng.integers(0, 1000, n)
+    exit_ = rng.integers(0, 1000, n)
+    stations = [f"Station {i:03d}" for i in rng.permutation(n)]
+    return pd.DataFrame({"Station": stations, "Entry": entry, "Exit": exit_, "Total": entry + exit_})
+
+
+def _sorted(table, ascending):
+    d = table.sort_values(["Total", "Station"], kind="mergesort")
+    return (d if ascending else d[::-1]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_table_head_tail(table, ascending):
+    expected = _sorted(table, ascending)
+    for k in [0, 1, 10, 499, 500, 600]:
+        # fresh ranking so head/tail go through argpartition, not the cached order
+        ranking = Ranking.from_table(table)
+        assert ranking.head(k, ascending).Station.tolist() == expected.head(k).Station.tolist()
+        assert ranking.tail(k, ascending).Station.tolist() == expected.tail(k).Station.tolist()
+    ranking = Ranking.from_table(table)
+    got = ranking.table(ascending)
+    assert got.Station.tolist() == expected.Station.tolist()
+    assert got.Total.tolist() == expected.Total.tolist()
+    assert ranking.table(ascending) is got
+
+
+def test_rank_of(table):
+    ranking = Ranking.from_table(table)
+    busiest = _sorted(table, False).Station.iloc[0]
+    assert ranking.rank_of(busiest) == 1
+    assert ranking.rank_of(busiest, ascending=True) == len(table)
+    with pytest.raises(KeyError):
+        ranking.rank_of("Nowhere")
+
+
+def test_empty():
+    ranking = Ranking([], [], [])
+    assert ranking.top(5).empty and ranking.table().empty
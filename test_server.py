@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+import vic
+from batch import BatchSession
+from nsw import CSV_PATH, process_patronage
+from server import PatronageService, bench_paths, load_test, start_server
+
+
+@pytest.fixture(scope="module")
+def service():
+    session = BatchSession(frames={"nsw": pd.read_csv(CSV_PATH), "vic": vic.load(report=False)})
+    service = PatronageService(session)
+    service.warm()
+    return service
+
+
+def _get(service, target, **headers):
+    status, out, body = service.respond("GET", target, headers)
+    return status, out, json.loads(body) if body else None
+
+
+def test_top_matches_process_patronage(service):
+    expected = process_patronage(pd.read_csv(CSV_PATH), month="Jan-25", min_total=200)
+    expected = expected.sort_values(["Total", "Station"], ascending=False, kind="mergesort")
+    status, _, rows = _get(service, "/nsw/top?month=Jan-25&n=5")
+    assert status == 200
+    assert [r["Station"] for r in rows] == expected["Station"].head(5).tolist()
+
+    name = expected.iloc[2]["Station"]
+    status, _, station = _get(service, f"/nsw/station/{name.replace(' ', '%20')}?month=Jan-25")
+    assert status == 200 and station["rank"] == 3 and station["Total"] == expected.iloc[2]["Total"]
+
+
+def test_etag_revalidation(service):
+    status, headers, _ = _get(service, "/nsw/count?month=Dec-24&min_total=1000")
+    assert status == 200
+    # parameter order does not matter: same cache entry and ETag
+    again = service.respond("GET", "/nsw/count?min_total=1000&month=Dec-24", {"if-none-match": headers["ETag"]})
+    assert again[0] == 304 and again[2] == b""
+
+
+def test_errors_and_other_datasets(service):
+    assert _get(service, "/nsw/top?month=Foo-99")[0] == 400
+    assert _get(service, "/nsw/top?n=abc")[0] == 400
+    assert _get(service, "/nope")[0] == 404
+    assert service.respond("POST", "/nsw/top")[0] == 405
+    status, _, rows = _get(service, "/vic/top?n=3&metric=pax_am_peak")
+    assert status == 200 and len(rows) == 3 and rows[0]["Pax_AM_peak"] >= rows[1]["Pax_AM_peak"]
+    status, _, datasets = _get(service, "/datasets")
+    assert "Dec-24" in datasets["nsw"] and datasets["vic"] == service.pax.years
+
+
+def test_load_test_over_http(service):
+    async def run():
+        server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await load_test("127.0.0.1", port, bench_paths(service.months("nsw"), 200), concurrency=4,
+                                   revalidate=True)
+
+    result = asyncio.run(run())
+    assert result["requests"] == 200
+    assert set(result["statuses"]) <= {200, 304}
+    assert result["p50_ms"] <= result["p99_ms"]
+
+
+def test_client_thresholds_do_not_grow_the_caches():
+    session = BatchSession(frames={"nsw": pd.read_csv(CSV_PATH)}, cache_size=32)
+    service = PatronageService(session, cache_size=64)
+    for i in range(300):
+        assert _get(service, f"/nsw/count?month=Dec-24&min_total={i}")[0] == 200
+        assert _get(service, f"/nsw/station/Central%20%20Station?month=Dec-24&min_total={i}")[0] == 200
+    ranking = session._rankings[("nsw", "Dec-24")]
+    assert len(ranking._above) <= 16 and len(session._records) <= 32 and len(session._answers) <= 32
+    assert len(service._stations) <= 256 and len(service.responses) <= 64
+    assert _get(service, "/nsw/count?month=Dec-24&min_total=0")[2] == len(ranking)
+
+
+def _exchange(service, request: bytes) -> bytes:
+    """Send raw request bytes to a server on a free port; everything it writes back before closing."""
+    async def run():
+        server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            response = await reader.read()
+            writer.close()
+            return response
+
+    return asyncio.run(run())
+
+
+def test_bad_requests_get_a_status(service, monkeypatch):
+    assert _exchange(service, b"GET /health HTTP/1.1\r\nContent-Length: abc\r\n\r\n").startswith(b"HTTP/1.1 400 ")
+    huge = b"GET /health HTTP/1.1\r\nContent-Length: 10000000000\r\n\r\n"
+    assert _exchange(service, huge).startswith(b"HTTP/1.1 413 ")
+
+    get = _exchange(service, b"GET /nsw/count?month=Dec-24 HTTP/1.1\r\nConnection: close\r\n\r\n")
+    head = _exchange(service, b"HEAD /nsw/count?month=Dec-24 HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert head == get.partition(b"\r\n\r\n")[0] + b"\r\n\r\n" and b"Content-Length: 0" not in head
+
+    def broken(path, params):
+        raise TypeError("boom")
+
+    monkeypatch.setattr(service, "route", broken)
+    error = _exchange(service, b"GET /nsw/top?month=Broken HTTP/1.1\r\n\r\n")
+    assert error.startswith(b"HTTP/1.1 500 ") and b'"ok": false' in error
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial import StopIndex, brute_nearest, brute_radius, haversine_km
+from vic import CSV_PATH
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(3)
+    lats = -38.5 + rng.random(20000) * 2.0
+    lons = 144.0 + rng.random(20000) * 2.5
+    lats[:50] = lats[50:100]  # duplicate locations tie on distance
+    lons[:50] = lons[50:100]
+    lats[100] = np.nan
+    return lats, lons
+
+
+def test_haversine():
+    # Melbourne to Sydney is about 714 km
+    assert haversine_km(-37.8136, 144.9631, -33.8688, 151.2093) == pytest.approx(714, abs=2)
+
+
+def test_matches_brute_force(points):
+    lats, lons = points
+    index = StopIndex(lats, lons)
+    assert len(index) == len(lats) - 1
+    rng = np.random.default_rng(5)
+    queries = [(-37.5, 145.2), (-36.0, 140.0), (lats[60], lons[60])]
+    queries += list(zip(rng.uniform(-38.6, -36.4, 30), rng.uniform(143.9, 146.6, 30)))
+    for lat, lon in queries:
+        for km in [0, 0.5, 3, 40]:
+            got, expected = index.query_radius(lat, lon, km), brute_radius(lats, lons, lat, lon, km)
+            np.testing.assert_array_equal(got[0], expected[0])
+            np.testing.assert_allclose(got[1], expected[1])
+        for k in [1, 7, 60]:
+            got, expected = index.query_nearest(lat, lon, k), brute_nearest(lats, lons, lat, lon, k)
+            np.testing.assert_array_equal(got[0], expected[0])
+
+
+def test_degenerate_sets():
+    assert len(StopIndex([], []).query_nearest(0, 0, 3)[0]) == 0
+    line = StopIndex([-37.0, -37.5, -38.0], [145.0, 145.0, 145.0])
+    assert line.query_nearest(-37.4, 145.0, 2)[0].tolist() == [1, 0]
+    assert line.query_nearest(-37.4, 145.0, 10)[0].tolist() == [1, 0, 2]
+    for lat, lon, km in [(float("inf"), 145.0, 1.0), (-37.4, float("nan"), 1.0), (-37.4, 145.0, float("inf"))]:
+        with pytest.raises(ValueError):
+            line.query_radius(lat, lon, km)
+    with pytest.raises(ValueError):
+        line.query_nearest(float("-inf"), 145.0, 2)
+
+
+def test_from_shipped_frame():
+    stops = StopIndex.from_frame(pd.read_csv(CSV_PATH))
+    nearest = stops.nearest(-37.8183, 144.9671, k=3)
+    assert nearest.Stop_name.iloc[0] == "Flinders Street"
+    assert {"Pax_annual", "distance_km"} <= set(nearest.columns)
+    assert nearest.distance_km.is_monotonic_increasing
+    within = stops.within(-37.8183, 144.9671, km=1.3)
+    assert (within.distance_km <= 1.3).all() and len(within) >= 3
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+import nsw
+import vic
+from batch import BatchSession
+from store import PatronageStore
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    s = PatronageStore(str(tmp_path_factory.mktemp("db") / "patronage.sqlite"))
+    s.build(nsw_csv=nsw.CSV_PATH, vic_csv=vic.CSV_PATH, car_csv=None, report=False)
+    yield s
+    s.close()
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(nsw.CSV_PATH)
+
+
+def _expected(raw, month, min_total=200):
+    table = nsw.process_patronage(raw, month=month, min_total=min_total)
+    return table.sort_values(["Total", "Station"], ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def test_month_queries_match_pandas(store, raw):
+    for month in ["Dec-24", "Jan-25"]:
+        expected = _expected(raw, month)
+        got = store.table("nsw", month)
+        assert got["Station"].tolist() == expected["Station"].tolist()
+        assert got["Total"].tolist() == expected["Total"].tolist()
+        assert store.top("nsw", month, k=3)["Station"].tolist() == expected["Station"].head(3).tolist()
+        assert store.bottom("nsw", month, k=3)["Station"].tolist() == expected["Station"].tail(3)[::-1].tolist()
+
+        low, high = store.outliers("nsw", month)
+        exp_low, exp_high = nsw.list_outliers(expected)
+        assert set(low["Station"]) == set(exp_low["Station"])
+        assert set(high["Station"]) == set(exp_high["Station"])
+    with pytest.raises(ValueError):
+        store.table("nsw", "Feb-01")
+
+
+def test_build_skips_unchanged_sources(store):
+    assert store.build(nsw_csv=nsw.CSV_PATH, vic_csv=vic.CSV_PATH, car_csv=None, report=False) == {}
+    assert store.months("nsw") == BatchSession().months("nsw")
+
+
+def test_pax_top_and_batch_session(store):
+    top = store.pax_top(k=5)
+    assert len(top) == 5 and top.iloc[:, 1].is_monotonic_decreasing
+
+    session = BatchSession(store=store)
+    answer = session.answer({"dataset": "nsw", "op": "busiest", "month": "Dec-24"})
+    assert answer["result"]["Station"] == store.top("nsw", "Dec-24", k=1)["Station"].iloc[0]
+
+
+def test_batch_ops_on_the_store_match_the_pandas_path(store, raw):
+    sql, pandas = BatchSession(store=store), BatchSession(frames={"nsw": raw})
+    for op in ["table", "top", "bottom", "busiest", "count", "outliers"]:
+        for sort in ["desc", "asc"]:
+            for min_total in [1000, 99_999_999]:  # the second leaves no station
+                query = {"op": op, "month": "Jan-25", "min_total": min_total, "sort": sort, "n": 4}
+                assert sql.answer(query) == pandas.answer(query), query
+    empty = pandas.answer({"op": "outliers", "month": "Jan-25", "min_total": 99_999_999})
+    assert empty == {"ok": True, "result": {"high": [], "low": []}}
+    top = pandas.answer({"op": "top", "month": "Jan-25", "n": 1})["result"][0]
+    one = pandas.answer({"op": "outliers", "month": "Jan-25", "min_total": top["Total"]})  # a single station
+    assert one == sql.answer({"op": "outliers", "month": "Jan-25", "min_total": top["Total"]})
+    assert one["result"] == {"high": [], "low": []}
+    assert not sql.answer({"op": "top", "month": "Feb-01"})["ok"]
+    assert sql._rankings == {}  # nothing was ranked in Python
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from nsw import CSV_PATH, process_patronage
+from streaming import stream_cube, stream_patronage
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.mark.parametrize("chunksize", [97, 1000, 100_000])
+def test_stream_cube_matches_process_patronage(raw, chunksize):
+    cube = stream_cube(CSV_PATH, chunksize=chunksize)
+    assert len(cube.months) == 11
+    for month in cube.months:
+        pd.testing.assert_frame_equal(cube.month_table(month), process_patronage(raw, month=month))
+
+
+def test_stream_patronage_single_month(raw):
+    got = stream_patronage(CSV_PATH, month="Feb-25", min_total=1000, ascending=True, chunksize=500)
+    pd.testing.assert_frame_equal(got, process_patronage(raw, month="Feb-25", min_total=1000, ascending=True))
+
+
+def test_unknown_month():
+    with pytest.raises(ValueError):
+        stream_patronage(CSV_PATH, month="Dec-99")
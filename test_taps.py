@@ -0,0 +1,84 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from taps import (CountMinSketch, LiveTopK, SpaceSaving, connection_batches, generate, parse_events, run,
+                  tail_batches)
+
+
+def _events(n_events, n_keys, seed=0):
+    rng = np.random.default_rng(seed)
+    p = 1 / np.arange(1, n_keys + 1)
+    return pd.Series(rng.choice(n_keys, size=n_events, p=p / p.sum()).astype(str))
+
+
+def test_count_min_overestimates_within_bound():
+    exact = _events(200_000, 20_000).value_counts()
+    sketch = CountMinSketch.from_error(epsilon=1e-3, delta=1e-3)
+    for part in np.array_split(np.arange(len(exact)), 7):
+        sketch.add(list(exact.index[part]), exact.to_numpy()[part])
+    over = sketch.estimate(list(exact.index)) - exact.to_numpy()
+    assert over.min() >= 0 and over.max() <= sketch.error_bound()
+
+
+def test_space_saving_keeps_every_heavy_key():
+    events = _events(100_000, 5000, seed=1)
+    summary = SpaceSaving(capacity=50)
+    for lo in range(0, len(events), 2500):
+        counts = events[lo:lo + 2500].value_counts()
+        summary.add(list(counts.index), counts.to_numpy())
+    exact = events.value_counts()
+    kept = {key: (count, error) for key, count, error in summary.top()}
+    assert set(exact[exact > len(events) / 50].index) <= set(kept)
+    for key, (count, error) in kept.items():
+        assert count - error <= exact[key] <= count
+
+
+def test_live_table_matches_exact_counts():
+    stations, directions = generate(50_000, seed=3)
+    live = LiveTopK(capacity=400)
+    for lo in range(0, len(stations), 7_000):
+        live.update(stations[lo:lo + 7_000], directions[lo:lo + 7_000])
+    exact = pd.crosstab(stations, directions)
+    exact["Total"] = exact["Entry"] + exact["Exit"]
+    got = live.table(10)
+    assert list(got.columns) == ["Station", "Entry", "Exit", "Total"]
+    assert got["Total"].tolist() == exact["Total"].sort_values(ascending=False).head(10).tolist()
+    for row in got.itertuples():
+        assert (row.Entry, row.Exit) == (exact.loc[row.Station, "Entry"], exact.loc[row.Station, "Exit"])
+
+
+def test_tail_and_parse(tmp_path):
+    path = tmp_path / "taps.txt"
+    path.write_text("Central  Station,Entry\nCentral  Station,Exit,4\nbad line\nTown Hall  Station,Ex")
+    stations, directions, counts = parse_events(["A ,Entry\n", "B,Exit,5\n", "\n"])
+    assert stations.tolist() == ["A", "B"] and counts.tolist() == [1, 5]
+
+    batches = list(tail_batches(str(path), follow=False))
+    assert sum(len(b) for b in batches) == 4 and batches[-1] == ["Town Hall  Station,Ex"]
+    tables = []
+    live = run(iter(batches), LiveTopK(), every=0, emit=tables.append)
+    assert tables[-1].iloc[0].tolist() == ["Central  Station", 1, 4, 5]
+    assert live.events == 2 and live.skipped == 2
+
+
+def test_socket_source_survives_quiet_spells():
+    ours, theirs = socket.socketpair()
+
+    def client():
+        with theirs:
+            theirs.sendall(b"Central  Station,Entry\nTown Hall  Sta")
+            time.sleep(0.6)  # several idle ticks, with half a line pending
+            theirs.sendall("tion,Exit,3\nSt Peters  Station,Entrée\n".encode("utf-8"))
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    with ours:
+        batches = list(connection_batches(ours, timeout=0.1))
+    thread.join()
+    assert [] in batches  # idle ticks were reported
+    lines = [line for b in batches for line in b]
+    assert lines == ["Central  Station,Entry\n", "Town Hall  Station,Exit,3\n", "St Peters  Station,Entrée\n"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nsw import CSV_PATH, process_patronage
+from ranking import NO_THRESHOLD, Ranking
+from threshold import ThresholdIndex
+
+
+@pytest.fixture(scope="module")
+def table():
+    return process_patronage(pd.read_csv(CSV_PATH), month="Dec-24", min_total=0)
+
+
+@pytest.fixture(scope="module")
+def index(table):
+    return ThresholdIndex.from_table(table)
+
+
+def test_counts_and_sums_match_filtering(table, index):
+    thresholds = [-1, 0, 49, 50, 51, 200, 1000, 123456, 10**9]
+    sweep = index.sweep(thresholds)
+    for t, row in zip(thresholds, sweep.itertuples()):
+        kept = table[table.Total >= t]
+        assert row.stations == len(kept) == index.count(t)
+        assert row.trips == kept.Total.sum() == index.total(t)
+        assert row.share == pytest.approx(kept.Total.sum() / table.Total.sum())
+
+
+def test_quantile_and_histogram(table, index):
+    kept = table[table.Total >= 200].Total.to_numpy(dtype=float)
+    for q in [0, 0.1, 0.5, 0.99, 1]:
+        assert index.quantile(q, min_total=200) == pytest.approx(np.quantile(kept, q))
+    hist = index.histogram(7, min_total=200)
+    counts, edges = np.histogram(kept, bins=7)
+    assert hist.stations.tolist() == counts.tolist()
+    assert np.allclose(hist.lo, edges[:-1])
+    assert hist.trips.sum() == kept.sum()
+    with pytest.raises(ValueError):
+        index.quantile(0.5, min_total=10**12)
+
+
+def test_ranking_above_matches_reprocessing():
+    raw = pd.read_csv(CSV_PATH)
+    full = Ranking.from_table(process_patronage(raw, month="Jan-25", min_total=NO_THRESHOLD))
+    for t in [0, 200, 5000]:
+        expected = Ranking.from_table(process_patronage(raw, month="Jan-25", min_total=t))
+        for ascending in [False, True]:
+            pd.testing.assert_frame_equal(full.above(t).table(ascending), expected.table(ascending))
+    assert full.above(200) is full.above(200)
+
+
+def test_empty():
+    index = ThresholdIndex([])
+    assert index.count(0) == 0 and index.share(0) == 0
+    assert index.histogram(3).stations.sum() == 0
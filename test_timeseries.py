@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic
+from cube import PatronageCube
+from timeseries import StationSeries
+
+
+@pytest.fixture(scope="module")
+def df():
+    return synthetic.nsw_frame(30_000, n_months=26, seed=5)
+
+
+@pytest.fixture(scope="module")
+def series(df):
+    return StationSeries.from_frame(df)
+
+
+def test_totals_match_month_tables(df, series):
+    cube = PatronageCube.from_frame(df)
+    for month in ["Aug-24", "Dec-24", "Sep-26"]:
+        table = cube.month_table(month, min_total=0).set_index("Station")["Total"]
+        column = series.frame()[month].dropna()
+        assert column.sort_index().astype(int).tolist() == table.sort_index().astype(int).tolist()
+
+
+def test_changes_and_rolling_match_pandas(series):
+    wide = series.frame().T  # months × stations, what pandas' window functions expect
+    for lag in [1, 12]:
+        ref = (wide - wide.shift(lag)) / wide.shift(lag).where(wide.shift(lag) > 0) * 100
+        assert np.allclose(series.change(lag), ref.T.to_numpy(), equal_nan=True)
+    ref = wide.rolling(3).mean().T.to_numpy()
+    assert np.allclose(series.rolling_mean(3), ref, equal_nan=True)
+    assert np.allclose(series.delta(12), (wide - wide.shift(12)).T.to_numpy(), equal_nan=True)
+
+
+def test_calendar_gaps_become_nan():
+    df = pd.DataFrame({
+        "MonthYear": ["Nov-24", "Jan-25", "Jan-25", "Feb-25"],
+        "Station": ["A", "A", "B", "A"],
+        "Entry_Exit": ["Entry", "Exit", "Entry", "Entry"],
+        "Trip": ["100", "300", "50", "600"],
+    })
+    series = StationSeries.from_frame(df)
+    assert series.months == ["Nov-24", "Dec-24", "Jan-25", "Feb-25"]
+    assert np.isnan(series.totals[0, 1]) and np.isnan(series.change(1)[0, 2])
+    assert series.change(1)[0, 3] == pytest.approx(100.0)
+    assert np.isnan(series.change(2)[0, 3])  # Dec-24 has no row
+
+
+def test_movers(series):
+    growing, declining = series.movers("Jun-26", n=5, lag=12, min_base=1000)
+    pct = series.frame(series.change(12))["Jun-26"]
+    prev = series.frame()["Jun-25"]
+    eligible = pct[prev >= 1000].dropna()
+    assert growing["Change_%"].tolist() == sorted(eligible, reverse=True)[:5]
+    assert declining["Change_%"].tolist() == sorted(eligible)[:5]
+    assert (growing["From"] >= 1000).all()
+    with pytest.raises(ValueError):
+        series.movers("Jan-99")
+
+
+def test_movers_break_ties_by_name():
+    # stations arrive out of alphabetical order; every station changes by the same +100%
+    df = pd.DataFrame({
+        "MonthYear": ["Jan-25"] * 3 + ["Feb-25"] * 3,
+        "Station": ["C", "A", "B", "B", "C", "A"],
+        "Entry_Exit": ["Entry"] * 6,
+        "Trip": ["500", "500", "500", "1000", "1000", "1000"],
+    })
+    growing, declining = StationSeries.from_frame(df).movers("Feb-25", n=3, min_base=0)
+    assert growing["Station"].tolist() == declining["Station"].tolist() == ["A", "B", "C"]
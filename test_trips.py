@@ -0,0 +1,61 @@
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from trips import SCALAR_PARSERS, clean_trip_column
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "NSW_Train_patronage_per_station.csv")
+
+
+def _expected(values, style):
+    return [SCALAR_PARSERS[style](v) for v in values]
+
+
+def _fuzz_corpus(n=20000, seed=0):
+    rng = random.Random(seed)
+    alphabet = list("0123456789 ,<+-.eE\t\nlessthanLESSTHANx٣\x1c")
+    prefixes = ["Less than ", "less than", "LESS THAN ", "<", "< ", "Less  than "]
+    odd = [None, float("nan"), pd.NA, 1, 1.0, True, 2.5, -0.0, float("inf"), 10**20,
+           "", "  ", "1e3", "1_000", " 12 ", "nan", "inf", "12.7", "5-3", "+-5"]
+    out = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.3:
+            out.append("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))))
+        elif r < 0.5:
+            num = rng.randint(0, 10 ** rng.randint(0, 20))
+            out.append(rng.choice(prefixes) + str(num) + rng.choice(["", " ", " x", " abc 7"]))
+        elif r < 0.7:
+            out.append(f"{rng.randint(-10**6, 10**7):,}")
+        elif r < 0.8:
+            out.append(rng.choice(odd))
+        else:
+            out.append(str(rng.randint(0, 10 ** rng.randint(1, 19))))
+    return out
+
+
+@pytest.mark.parametrize("style", ["nsw", "vic"])
+def test_matches_scalar_on_shipped_csv(style):
+    trips = pd.read_csv(CSV_PATH)["Trip"]
+    assert clean_trip_column(trips, style).tolist() == _expected(trips, style)
+
+
+@pytest.mark.parametrize("style", ["nsw", "vic"])
+def test_matches_scalar_on_fuzzed_corpus(style):
+    values = _fuzz_corpus()
+    assert clean_trip_column(pd.Series(values, dtype=object), style).tolist() == _expected(values, style)
+
+
+def test_keeps_index_and_int_dtype():
+    s = pd.Series(["Less than 50", "1,234", None], index=[10, 20, 30], name="Trip")
+    out = clean_trip_column(s)
+    assert out.dtype == "int64"
+    assert out.index.tolist() == [10, 20, 30]
+    assert out.tolist() == [25, 1234, 0]
+
+
+def test_unknown_style():
+    with pytest.raises(ValueError):
+        clean_trip_column(pd.Series(["1"]), "qld")
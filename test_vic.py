@@ -0,0 +1,86 @@
+import re
+
+import pandas as pd
+import pytest
+
+import synthetic
+import vic
+from trips import SCALAR_PARSERS
+
+
+@pytest.fixture(scope="module")
+def long():
+    df = synthetic.vic_long_frame(3000)
+    return df.rename(columns={"Month": " MonthYear", "Entry_Exit": "Entry-Exit", "Trips": "TRIPS"})
+
+
+def _snake(name):
+    name = re.sub(r"\s+", "_", str(name).strip()).replace("-", "_").replace("/", "_")
+    return re.sub(r"_+", "_", name).lower()
+
+
+def _direction(value):
+    s = str(value).strip().lower()
+    if s in {"entry", "entries", "in"} or "ent" in s or s.startswith("in"):
+        return "Entry"
+    if s in {"exit", "exits", "out"} or "ex" in s or s.startswith("out"):
+        return "Exit"
+    return str(value)
+
+
+def _first(columns, candidates):
+    return next((c for c in candidates if c in columns), None)
+
+
+def _reference(df, month, min_total=0):
+    # frozen copy of the original pivot_table pipeline, independent of vic.py
+    d = df.copy()
+    d.columns = [_snake(c) for c in d.columns]
+    station = _first(d.columns, ["station", "stop", "stop_name"])
+    d = d[d[_first(d.columns, ["monthyear", "month", "period"])] == month].copy()
+    if "entry" in d.columns and "exit" in d.columns:
+        for col in ["entry", "exit"]:
+            d[col] = pd.to_numeric(d[col], errors="coerce").fillna(0).astype(int)
+        g = d.groupby(station, as_index=False).agg(Entry=("entry", "sum"), Exit=("exit", "sum"))
+        g = g.rename(columns={station: "Station"})
+    else:
+        trip = _first(d.columns, ["trip", "trips", "patronage", "count", "volume"])
+        d["trip_num"] = d[trip].map(SCALAR_PARSERS["vic"]).astype(int)
+        d["ee_norm"] = d[_first(d.columns, ["entry_exit", "direction"])].map(_direction)
+        pivot = d.pivot_table(index=station, columns="ee_norm", values="trip_num", aggfunc="sum", fill_value=0)
+        g = pd.DataFrame({"Station": pivot.index,
+                          "Entry": pivot["Entry"] if "Entry" in pivot.columns else 0,
+                          "Exit": pivot["Exit"] if "Exit" in pivot.columns else 0})
+    g["Total"] = g["Entry"] + g["Exit"]
+    g = g[g["Total"] >= int(min_total)]
+    g = g.sort_values("Total", ascending=False, kind="mergesort").reset_index(drop=True)
+    return g[["Station", "Entry", "Exit", "Total"]]
+
+
+def test_schema_cached_per_header(long):
+    schema = vic.detect_schema(long)
+    assert schema == {"month": "monthyear", "station": "station", "entry_exit": "entry_exit",
+                      "trip": "trips", "is_wide": False}
+    hits = vic._detect_schema.cache_info().hits
+    vic.detect_schema(long.head(10))
+    assert vic._detect_schema.cache_info().hits == hits + 1
+    # callers get their own copies
+    schema["month"] = "changed"
+    assert vic.detect_schema(long)["month"] == "monthyear"
+    assert vic.column_map(long)["trips"] == "TRIPS"
+
+
+def test_process_without_renaming_matches_renamed(long):
+    before = long.copy()
+    for month in ["Aug-24", "Jan-25"]:
+        pd.testing.assert_frame_equal(vic.process_patronage(long, month=month, min_total=0),
+                                      _reference(long, month))
+    pd.testing.assert_frame_equal(long, before)
+
+
+def test_wide_columns():
+    wide = pd.DataFrame({"Period": ["Dec-24"] * 3, "Stop Name": ["B", "A", "B"],
+                         "ENTRY": [5, "x", 7], "Exit": [1, 2, 3]})
+    out = vic.process_patronage(wide, month="Dec-24", min_total=0)
+    assert out.to_dict("list") == {"Station": ["B", "A"], "Entry": [12, 0], "Exit": [4, 2], "Total": [16, 2]}
+    pd.testing.assert_frame_equal(out, _reference(wide, "Dec-24"))
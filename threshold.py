@@ -0,0 +1,144 @@
+"""
+Threshold sweeps
+----------------
+A month's station totals held once in ascending order with prefix sums.
+Applying a ``min_total`` is then a binary search, and the surviving stations'
+count, trips and share of patronage come from the prefix sums without
+touching the raw rows or re-running ``process_patronage``:
+
+    index = ThresholdIndex.from_table(process_patronage(df, "Dec-24", min_total=0))
+    index.count(200), index.share(200)
+    index.sweep(range(0, 10_001, 500))          # one row per threshold
+    index.quantile(0.5, min_total=200)          # median of the surviving stations
+    index.histogram(10, min_total=200)
+
+    python threshold.py --month Dec-24 --sweep 0,100,200,500,1000,5000
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+class ThresholdIndex:
+    """Sorted totals plus prefix sums; ``prefix[i]`` is the sum of the ``i`` smallest totals."""
+
+    def __init__(self, totals, presorted=False):
+        totals = np.asarray(totals)
+        if totals.dtype.kind not in "iuf":
+            totals = totals.astype(np.float64)
+        self.sorted = totals if presorted else np.sort(totals, kind="stable")
+        self.prefix = np.zeros(len(self.sorted) + 1, dtype=np.result_type(self.sorted.dtype, np.int64))
+        np.cumsum(self.sorted, out=self.prefix[1:])
+
+    @classmethod
+    def from_table(cls, df: pd.DataFrame) -> "ThresholdIndex":
+        """Index the Total column of a process_patronage-style table."""
+        return cls(df["Total"].fillna(0).to_numpy(dtype=np.int64))
+
+    @classmethod
+    def from_ranking(cls, ranking) -> "ThresholdIndex":
+        """Reuse a Ranking's ascending order instead of sorting again."""
+        return cls(ranking.total[ranking.order], presorted=True)
+
+    def __len__(self):
+        return len(self.sorted)
+
+    @property
+    def grand_total(self):
+        return self.prefix[-1]
+
+    # ---------- Threshold queries ----------
+    def cut(self, min_total):
+        """Position of the first total >= ``min_total``; stations from here on survive."""
+        return np.searchsorted(self.sorted, min_total, side="left")
+
+    def count(self, min_total):
+        """Stations with Total >= ``min_total`` (scalar or array of thresholds)."""
+        return len(self) - self.cut(min_total)
+
+    def total(self, min_total):
+        """Summed Total of the surviving stations."""
+        return self.grand_total - self.prefix[self.cut(min_total)]
+
+    def share(self, min_total):
+        """Surviving stations' share of all patronage in the index (0..1)."""
+        if self.grand_total == 0:
+            return np.zeros_like(np.asarray(min_total, dtype=float))[()]
+        return self.total(min_total) / self.grand_total
+
+    def sweep(self, thresholds) -> pd.DataFrame:
+        """Count, trips and share for many thresholds at once."""
+        thresholds = np.asarray(list(thresholds))
+        return pd.DataFrame({
+            "min_total": thresholds,
+            "stations": self.count(thresholds),
+            "trips": self.total(thresholds),
+            "share": self.share(thresholds),
+        })
+
+    # ---------- Distribution of the survivors ----------
+    def surviving(self, min_total=None) -> np.ndarray:
+        """Ascending totals of the surviving stations (a view, no copy)."""
+        return self.sorted if min_total is None else self.sorted[self.cut(min_total):]
+
+    def quantile(self, q, min_total=None):
+        """Linear-interpolated quantile(s) of the surviving totals, like ``np.quantile``."""
+        values = self.surviving(min_total)
+        if len(values) == 0:
+            raise ValueError(f"No stations have Total >= {min_total}.")
+        pos = np.asarray(q, dtype=float) * (len(values) - 1)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, len(values) - 1)
+        return (values[lo] + (values[hi] - values[lo]) * (pos - lo))[()]
+
+    def histogram(self, bins=10, min_total=None) -> pd.DataFrame:
+        """
+        Stations and trips per bin of Total among the survivors. ``bins`` is a
+        bin count (equal widths over their range) or explicit edges; the last
+        bin includes its right edge, as in ``np.histogram``.
+        """
+        start = 0 if min_total is None else int(self.cut(min_total))
+        values = self.sorted[start:]
+        if np.ndim(bins) == 0:
+            lo, hi = (values[0], values[-1]) if len(values) else (0, 1)
+            edges = np.linspace(lo, hi if hi > lo else lo + 1, int(bins) + 1)
+        else:
+            edges = np.asarray(bins)
+        pos = np.searchsorted(values, edges, side="left")
+        pos[-1] = np.searchsorted(values, edges[-1], side="right")
+        pos += start
+        return pd.DataFrame({
+            "lo": edges[:-1],
+            "hi": edges[1:],
+            "stations": np.diff(pos),
+            "trips": np.diff(self.prefix[pos]),
+        })
+
+
+def main(argv=None):
+    from cube import PatronageCube
+    from nsw import CSV_PATH, load
+
+    parser = argparse.ArgumentParser(description="How many NSW stations survive each min_total.")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--month", default="Dec-24")
+    parser.add_argument("--sweep", default="0,50,100,200,500,1000,5000,10000,50000",
+                        help="comma separated thresholds")
+    parser.add_argument("--bins", type=int, default=0, help="also print a histogram with this many bins")
+    args = parser.parse_args(argv)
+
+    table = PatronageCube.from_frame(load(args.csv, report=False)).month_table(args.month, min_total=0)
+    index = ThresholdIndex.from_table(table)
+    sweep = index.sweep(int(t) for t in args.sweep.split(","))
+    sweep["share"] = (sweep["share"] * 100).round(2)
+    print(f"{args.month}: {len(index)} stations, {index.grand_total:,} trips")
+    print(sweep.rename(columns={"share": "share_%"}).to_string(index=False))
+    if args.bins:
+        print()
+        print(index.histogram(args.bins).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Station time series
+-------------------
+The NSW file is a station × month panel. ``StationSeries`` holds it as one
+(stations × months) float array of monthly totals on a gap-free calendar axis
+(months without a row are NaN), so month-over-month and year-over-year
+changes, rolling means and growth rankings are whole-array operations for
+every station at once:
+
+    series = StationSeries.from_cube(PatronageCube.from_frame(df))
+    series.change(lag=1)                       # MoM % change, stations × months
+    series.change(lag=12)                      # YoY
+    series.rolling_mean(3)
+    series.month_table("Dec-24")               # Station, Total, MoM/YoY %, 3-month mean
+    growing, declining = series.movers("Dec-24", n=10)
+
+    python timeseries.py --month Dec-24 --top 10
+    python timeseries.py --bench 10000x120
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregate import ratio
+
+
+def _calendar(labels):
+    """
+    Gap-free monthly axis covering ``labels`` ('Aug-24' style) and each label's
+    position on it. Labels that do not parse keep their own order, one per step.
+    """
+    dates = pd.to_datetime(pd.Series(labels, dtype=object), format="%b-%y", errors="coerce")
+    if len(labels) == 0 or dates.isna().any():
+        return list(labels), np.arange(len(labels))
+    axis = pd.date_range(dates.min(), dates.max(), freq="MS")
+    pos = (dates.dt.year - axis[0].year) * 12 + (dates.dt.month - axis[0].month)
+    return list(axis.strftime("%b-%y")), pos.to_numpy(dtype=np.intp)
+
+
+class StationSeries:
+    """``totals[s, t]`` is the Entry + Exit total of ``stations[s]`` in ``months[t]``, NaN when absent."""
+
+    def __init__(self, stations, months, totals):
+        self.stations = pd.Index(stations)
+        self.months = list(months)
+        self.totals = np.asarray(totals, dtype=np.float64)
+        self._month_pos = {m: i for i, m in enumerate(self.months)}
+        self._changes = {}
+        self._means = {}
+
+    @classmethod
+    def from_cube(cls, cube) -> "StationSeries":
+        """Monthly totals from a ``PatronageCube``; calendar months missing from the file become NaN columns."""
+        months, pos = _calendar(cube.months)
+        totals = np.full((len(cube.stations), len(months)), np.nan)
+        totals[:, pos] = np.where(cube.present, cube.values.sum(axis=2), np.nan)
+        return cls(cube.stations, months, totals)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "StationSeries":
+        from cube import PatronageCube
+
+        return cls.from_cube(PatronageCube.from_frame(df))
+
+    def month_index(self, month=None) -> int:
+        if month is None:
+            return len(self.months) - 1
+        try:
+            return self._month_pos[month]
+        except KeyError:
+            raise ValueError(f"No rows found for month '{month}'.") from None
+
+    # ---------- Whole-panel transforms (stations × months) ----------
+    def delta(self, lag=1) -> np.ndarray:
+        """Absolute change against ``lag`` months earlier; NaN for the first ``lag`` months."""
+        out = np.full_like(self.totals, np.nan)
+        if 0 < lag < len(self.months):
+            out[:, lag:] = self.totals[:, lag:] - self.totals[:, :-lag]
+        return out
+
+    def change(self, lag=1, window=1) -> np.ndarray:
+        """
+        Percentage change against ``lag`` months earlier (cached). With
+        ``window`` > 1 the ``window``-month rolling means are compared instead,
+        e.g. ``change(lag=3, window=3)`` is quarter on previous quarter.
+        """
+        key = (lag, window)
+        if key not in self._changes:
+            base = self.totals if window == 1 else self.rolling_mean(window)
+            out = np.full_like(base, np.nan)
+            if 0 < lag < len(self.months):
+                prev, cur = base[:, :-lag], out[:, lag:]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    np.subtract(base[:, lag:], prev, out=cur)
+                    cur /= prev
+                cur *= 100
+                cur[~(prev > 0)] = np.nan
+            self._changes[key] = out
+        return self._changes[key]
+
+    def rolling_mean(self, window=3) -> np.ndarray:
+        """Mean over the trailing ``window`` months; NaN unless all of them have data (cached)."""
+        if window not in self._means:
+            out = np.full_like(self.totals, np.nan)
+            if 0 < window <= len(self.months):
+                # sum of ``window`` shifted slices: a NaN anywhere in the window propagates
+                acc = out[:, window - 1:]
+                acc[:] = self.totals[:, window - 1:]
+                for k in range(1, window):
+                    acc += self.totals[:, window - 1 - k:len(self.months) - k]
+                acc /= window
+            self._means[window] = out
+        return self._means[window]
+
+    def frame(self, values=None) -> pd.DataFrame:
+        """A stations × months array (``totals`` by default) as a labelled DataFrame."""
+        return pd.DataFrame(self.totals if values is None else values, index=self.stations, columns=self.months)
+
+    # ---------- One month ----------
+    def month_table(self, month=None, window=3) -> pd.DataFrame:
+        """Station, Total, MoM %, YoY % and rolling mean for one month, stations with data that month only."""
+        t = self.month_index(month)
+        rows = np.flatnonzero(~np.isnan(self.totals[:, t]))
+        return pd.DataFrame({
+            "Station": self.stations[rows],
+            "Total": self.totals[rows, t],
+            "MoM_%": self.change(1)[rows, t],
+            "YoY_%": self.change(12)[rows, t],
+            f"Mean_{window}m": self.rolling_mean(window)[rows, t],
+        })
+
+    def movers(self, month=None, n=10, lag=1, window=1, min_base=200) -> tuple:
+        """
+        (fastest growing, fastest declining) stations by ``change(lag, window)``
+        in ``month``, ``n`` of each. Stations whose base period was under
+        ``min_base`` trips are left out so tiny stations do not dominate.
+        """
+        t = self.month_index(month)
+        base = self.totals if window == 1 else self.rolling_mean(window)
+        prev = base[:, t - lag] if 0 < lag <= t else np.full(len(base), np.nan)
+        # one column of change(lag, window), without computing the whole panel
+        pct = ratio(base[:, t] - prev, prev) * 100
+        rows = np.flatnonzero(~np.isnan(pct) & (prev >= min_base))
+        # ties by station name in both tables; cube stations are in first-seen order, not alphabetical
+        names = self.stations.to_numpy()[rows]
+        growing = rows[np.lexsort((names, -pct[rows]))]
+        declining = rows[np.lexsort((names, pct[rows]))]
+
+        def table(sel):
+            return pd.DataFrame({
+                "Station": self.stations[sel],
+                "From": prev[sel],
+                "To": base[sel, t],
+                "Change_%": pct[sel],
+            })
+
+        return table(growing[:max(0, n)]), table(declining[:max(0, n)])
+
+
+def benchmark(n_stations=10_000, n_months=120, seed=0, log=print) -> dict:
+    """Time every transform on a random panel of the given shape."""
+    rng = np.random.default_rng(seed)
+    totals = rng.integers(0, 100_000, size=(n_stations, n_months)).astype(float)
+    totals[rng.random(totals.shape) < 0.02] = np.nan
+    months = pd.date_range("2015-01-01", periods=n_months, freq="MS").strftime("%b-%y")
+    timings = {}
+    for name, run in [
+        ("change_mom", lambda s: s.change(1)),
+        ("change_yoy", lambda s: s.change(12)),
+        ("rolling_mean_3", lambda s: s.rolling_mean(3)),
+        ("movers", lambda s: s.movers(n=10)),
+    ]:
+        series = StationSeries(np.arange(n_stations), months, totals)  # fresh: no cached results
+        start = time.perf_counter()
+        run(series)
+        timings[name] = (time.perf_counter() - start) * 1000
+        log(f"{name:>16s} {timings[name]:8.2f} ms")
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Month-over-month growth and rolling means per NSW station.")
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--month", default=None, help="month label (default: latest)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--lag", type=int, default=1, help="months back to compare with (12 = YoY)")
+    parser.add_argument("--bench", default=None, metavar="STATIONSxMONTHS", help="time a random panel, e.g. 10000x120")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        n_stations, _, n_months = args.bench.lower().partition("x")
+        print(f"{int(n_stations):,} stations × {int(n_months)} months")
+        benchmark(int(n_stations), int(n_months))
+        return
+
+    from nsw import CSV_PATH, load
+
+    series = StationSeries.from_frame(load(args.csv or CSV_PATH, report=False))
+    month = series.months[series.month_index(args.month)]
+    growing, declining = series.movers(month, n=args.top, lag=args.lag)
+    print(f"Fastest growing stations, {month} vs {args.lag} month(s) earlier:")
+    print(growing.round(1).to_string(index=False))
+    print(f"\nFastest declining stations, {month} vs {args.lag} month(s) earlier:")
+    print(declining.round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Trip column parsing
+-------------------
+Column-level versions of the ``clean_trip_value`` helpers used by the NSW and
+VIC CLIs. Instead of calling a Python function on every row, the column is
+factorized once and only the distinct raw values are parsed:
+
+- plain integers ('2389', '12,345') go through ``pd.to_numeric`` in one call
+- 'Less than N' / '<N' is pulled out with a single regex extraction
+- anything unusual (decimals, unicode digits, junk) falls back to the scalar
+  helper, so results are always identical to the row-wise ``apply``.
+
+Missing values become 0, as they do in both scalar helpers.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def clean_trip_value_nsw(x):
+    """Convert Trip string values to numeric. Treat 'Less than 50' as 25."""
+    s = str(x).strip().replace(",", "")
+    if s.lower().startswith("less than"):
+        # e.g. 'Less than 50' → midpoint = 25
+        for p in s.split()[::-1]:
+            if p.isdigit():
+                return int(int(p) // 2)
+        return 25
+    try:
+        return int(float(s))
+    except:
+        return 0
+
+
+def clean_trip_value_vic(x):
+    """
+    Convert Trip string values to numeric.
+    Handles:
+    - 'Less than 50', 'less than 50', '<50', '< 50', etc. → midpoint of last number (50→25)
+    - '12,345' and other thousand separators
+    - blanks → 0
+    """
+    if pd.isna(x):
+        return 0
+    s = str(x).strip().replace(",", "").replace(" ", "")
+    sl = s.lower()
+
+    # Detect 'less than' or '<' patterns
+    if "lessthan" in sl or sl.startswith("<"):
+        # extract the last number
+        nums = re.findall(r"\d+", s)
+        if nums:
+            n = int(nums[-1])
+            return max(0, n // 2)  # midpoint heuristic
+        return 25  # sensible default
+
+    # General numeric extraction
+    nums = re.findall(r"[-+]?\d+", s)
+    if nums:
+        try:
+            return int(nums[-1])
+        except Exception:
+            pass
+
+    # Last resort
+    try:
+        return int(float(s))
+    except Exception:
+        return 0
+
+
+SCALAR_PARSERS = {"nsw": clean_trip_value_nsw, "vic": clean_trip_value_vic}
+
+# Integers short enough that int(float(s)) == int(s) (below 2**53).
+_PLAIN_INT = r"[+-]?[0-9]{1,15}"
+_PLAIN_DIGITS = r"[0-9]{1,15}"
+
+
+def _as_text(uniques) -> pd.Series:
+    """Distinct raw values as an object Series of Python strings (Python ``re`` semantics)."""
+    return pd.Series([str(u) for u in uniques], dtype=object)
+
+
+def _parse_nsw(uniques) -> np.ndarray:
+    s = _as_text(uniques).str.strip().str.replace(",", "", regex=False)
+    out = np.zeros(len(s), dtype=object)
+    done = np.zeros(len(s), dtype=bool)
+    ascii_ = s.map(str.isascii).to_numpy(dtype=bool)
+
+    plain = ascii_ & s.str.fullmatch(_PLAIN_INT).to_numpy(dtype=bool)
+    if plain.any():
+        out[plain] = pd.to_numeric(s[plain]).to_numpy(dtype=np.int64)
+        done |= plain
+
+    less = ascii_ & ~done & s.str.lower().str.startswith("less than").to_numpy(dtype=bool)
+    if less.any():
+        # last whitespace-separated token made only of digits, as in s.split()[::-1]
+        tok = s[less].str.extract(r"(?s)^.*(?<!\S)([0-9]+)(?!\S)", expand=False)
+        idx = np.flatnonzero(less)
+        found = tok.str.fullmatch(_PLAIN_DIGITS).fillna(False).to_numpy(dtype=bool)
+        out[idx[found]] = pd.to_numeric(tok[found]).to_numpy(dtype=np.int64) // 2
+        missing = tok.isna().to_numpy(dtype=bool)
+        out[idx[missing]] = 25
+        done[idx[found | missing]] = True
+
+    rest = np.flatnonzero(~done)
+    for i in rest:
+        out[i] = clean_trip_value_nsw(uniques[i])
+    return out
+
+
+def _parse_vic(uniques) -> np.ndarray:
+    s = (
+        _as_text(uniques)
+        .str.strip()
+        .str.replace(",", "", regex=False)
+        .str.replace(" ", "", regex=False)
+    )
+    sl = s.str.lower()
+    out = np.zeros(len(s), dtype=object)
+    done = np.zeros(len(s), dtype=bool)
+    ascii_ = s.map(str.isascii).to_numpy(dtype=bool)
+
+    less = ascii_ & (
+        sl.str.contains("lessthan", regex=False) | sl.str.startswith("<")
+    ).to_numpy(dtype=bool)
+    # last digit run (re.findall(r"\d+", s)[-1]) / last signed run for plain values
+    tok = s.str.extract(r"([0-9]+)[^0-9]*$", expand=False)
+    signed = s.str.extract(r"([-+]?[0-9]+)[^0-9]*$", expand=False)
+
+    lt_ok = less & tok.str.fullmatch(_PLAIN_DIGITS).fillna(False).to_numpy(dtype=bool)
+    if lt_ok.any():
+        out[lt_ok] = pd.to_numeric(tok[lt_ok]).to_numpy(dtype=np.int64) // 2
+        done |= lt_ok
+    lt_empty = less & tok.isna().to_numpy(dtype=bool)
+    out[lt_empty] = 25
+    done |= lt_empty
+
+    num_ok = ascii_ & ~less & signed.str.fullmatch(_PLAIN_INT).fillna(False).to_numpy(dtype=bool)
+    if num_ok.any():
+        out[num_ok] = pd.to_numeric(signed[num_ok]).to_numpy(dtype=np.int64)
+        done |= num_ok
+    # no digits at all: the float() fallback can only see inf/nan/junk → 0
+    no_digits = ascii_ & ~less & signed.isna().to_numpy(dtype=bool)
+    out[no_digits] = 0
+    done |= no_digits
+
+    rest = np.flatnonzero(~done)
+    for i in rest:
+        out[i] = clean_trip_value_vic(uniques[i])
+    return out
+
+
+_COLUMN_PARSERS = {"nsw": _parse_nsw, "vic": _parse_vic}
+_HOMOGENEOUS = {"string", "empty", "integer", "floating", "boolean"}
+
+
+def clean_trip_column(values, style: str = "nsw") -> pd.Series:
+    """
+    Parse a whole Trip column at once.
+
+    ``style`` picks the rules of the matching scalar helper: ``"nsw"`` for the
+    NSW CLI ('Less than N' only) or ``"vic"`` for the VIC CLI ('<N', embedded
+    numbers). Returns an int64 Series aligned with ``values`` (object dtype if
+    a value does not fit in int64, exactly as the scalar helper would return it).
+    """
+    if style not in _COLUMN_PARSERS:
+        raise ValueError(f"Unknown trip style '{style}'. Expected one of: {', '.join(_COLUMN_PARSERS)}")
+    index = values.index if isinstance(values, pd.Series) else None
+    raw = pd.Series(values, dtype=object)
+    if pd.api.types.infer_dtype(raw, skipna=True) not in _HOMOGENEOUS:
+        # 1, 1.0 and True hash together but print differently; key on the text
+        raw = raw.map(str, na_action="ignore")
+    codes, uniques = pd.factorize(raw, use_na_sentinel=True)
+    parsed = _COLUMN_PARSERS[style](np.asarray(uniques, dtype=object))
+    try:
+        parsed = parsed.astype(np.int64)
+        out = np.zeros(len(codes), dtype=np.int64)
+    except OverflowError:
+        out = np.zeros(len(codes), dtype=object)
+    known = codes >= 0
+    out[known] = parsed[codes[known]]
+    return pd.Series(out, index=index, name=getattr(values, "name", None))
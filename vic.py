@@ -0,0 +1,242 @@
+"""
+VIC train patronage processing
+------------------------------
+Library side of the Victoria CLI: resolve the file's column names to a known
+schema (long Entry/Exit rows or wide Entry/Exit columns), then compute Entry,
+Exit and Total per station for one month. Importing this module has no side
+effects.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from aggregate import pivot_sum
+from datacache import load_dataset
+from profiling import profiled, stage
+from trips import clean_trip_column
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "Victoria_Train_patronage_per_station.csv")
+PROCESSED_OUT = os.path.join(os.path.dirname(__file__), "vic_processed_patronage_dec24.csv")
+
+
+# ---------- Helpers ----------
+def snake_case(s: str) -> str:
+    """Normalize a column name to lower snake_case."""
+    s = re.sub(r"\s+", "_", str(s).strip())
+    s = s.replace("-", "_").replace("/", "_")
+    s = re.sub(r"_+", "_", s)
+    return s.lower()
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy with normalized snake_case columns."""
+    d = df.copy()
+    d.columns = [snake_case(c) for c in d.columns]
+    return d
+
+
+@lru_cache(maxsize=256)
+def _column_map(columns: tuple) -> dict:
+    mapping = {}
+    for c in columns:
+        mapping.setdefault(snake_case(c), c)
+    return mapping
+
+
+def column_map(df: pd.DataFrame) -> dict:
+    """
+    Normalized name → original column name, memoized per header. Use it to
+    look columns up by normalized name without renaming (copying) the frame.
+    """
+    return dict(_column_map(tuple(df.columns)))
+
+
+def find_column(d: pd.DataFrame, candidates) -> str:
+    """
+    Given a normalized DataFrame and a list of candidate column names (lower snake),
+    return the first existing one or raise a helpful error.
+    """
+    for name in candidates:
+        if name in d.columns:
+            return name
+    raise KeyError(
+        "Could not find a required column. Looked for any of: "
+        + ", ".join(candidates)
+        + f". Columns present: {list(d.columns)}"
+    )
+
+
+def normalise_entry_exit(val: str) -> str:
+    """Map variations to 'Entry' or 'Exit'."""
+    if val is None:
+        return None
+    s = str(val).strip().lower()
+    if s in {"entry", "entries", "in"}:
+        return "Entry"
+    if s in {"exit", "exits", "out"}:
+        return "Exit"
+    # fallback: try to guess
+    if "ent" in s or s.startswith("in"):
+        return "Entry"
+    if "ex" in s or s.startswith("out"):
+        return "Exit"
+    return str(val)  # leave as-is; will become its own column if pivoted
+
+
+def detect_schema(df: pd.DataFrame):
+    """
+    Detect key columns from a variety of plausible names.
+    Returns a dict with keys: month, station, entry_exit, trip (normalized names).
+    The result is cached per header, so repeated calls do not touch the data.
+    """
+    return dict(_detect_schema(tuple(df.columns)))
+
+
+@lru_cache(maxsize=256)
+def _detect_schema(columns: tuple) -> dict:
+    # only the header matters; an empty frame keeps find_column's error messages
+    d = pd.DataFrame(columns=list(_column_map(columns)))
+
+    month_col = find_column(d, ["monthyear", "month", "period"])
+    station_col = find_column(d, ["station", "stop", "stop_name"])
+    # Direction / Entry_Exit column might be missing if already wide format
+    entry_exit_col = None
+    for c in ["entry_exit", "entry_or_exit", "direction", "in_out", "entryexit", "entry__exit"]:
+        if c in d.columns:
+            entry_exit_col = c
+            break
+
+    trip_col = None
+    for c in ["trip", "trips", "patronage", "count", "volume"]:
+        if c in d.columns:
+            trip_col = c
+            break
+
+    # Check for already wide format (Entry / Exit columns present)
+    wide_entry = "entry" in d.columns
+    wide_exit = "exit" in d.columns
+
+    if not (trip_col or (wide_entry and wide_exit)):
+        raise KeyError(
+            "Could not find a trips/patronage column or separate Entry/Exit columns. "
+            "Expected one of: trip, trips, patronage, count, volume OR both 'Entry' and 'Exit' columns."
+        )
+
+    return {
+        "month": month_col,
+        "station": station_col,
+        "entry_exit": entry_exit_col,  # may be None if wide
+        "trip": trip_col,              # may be None if wide
+        "is_wide": (wide_entry and wide_exit),
+    }
+
+
+# ---------- Core processing ----------
+@profiled("vic.process_patronage")
+def process_patronage(df: pd.DataFrame, month="Dec-24", min_total=200, ascending=False) -> pd.DataFrame:
+    """
+    Processing pipeline:
+    - filter to month
+    - compute Entry, Exit, Total per Station (from long or wide formats)
+    - filter stations with Total >= min_total
+    - sort by Total
+    Returns columns: Station, Entry, Exit, Total
+    """
+    if df.empty:
+        raise ValueError("Input dataframe is empty.")
+
+    # Work on the original column names: no renamed copy of the whole frame
+    schema = detect_schema(df)
+    cols = column_map(df)
+
+    month_col = cols[schema["month"]]
+    station_col = cols[schema["station"]]
+    entry_exit_col = cols.get(schema["entry_exit"])
+    trip_col = cols.get(schema["trip"])
+    is_wide = schema["is_wide"]
+
+    # Filter by month, keeping only the columns used below
+    if is_wide:
+        needed = [station_col] + [cols[c] for c in ("entry", "exit")]
+    else:
+        needed = [station_col, entry_exit_col, trip_col]
+    with stage("vic.month_filter", len(df)) as s:
+        d = df.loc[df[month_col] == month, list(dict.fromkeys(needed))]
+        s.rows_out = len(d)
+    if d.empty:
+        raise ValueError(f"No rows found for month '{month}'. Check the exact month codes in your CSV.")
+
+    # Build Entry/Exit/Total
+    if is_wide:
+        with stage("vic.pivot", len(d)) as s:
+            # Expect 'entry' and 'exit' columns already numeric
+            d = pd.DataFrame({
+                station_col: d[station_col],
+                "entry": pd.to_numeric(d[cols["entry"]], errors="coerce").fillna(0).astype(int),
+                "exit": pd.to_numeric(d[cols["exit"]], errors="coerce").fillna(0).astype(int),
+            })
+            g = d.groupby(station_col, as_index=False).agg(Entry=("entry", "sum"),
+                                                        Exit=("exit", "sum"))
+            g["Total"] = g["Entry"] + g["Exit"]
+            s.rows_out = len(g)
+    else:
+        # Long format with entry_exit + trip
+        with stage("vic.clean_trip", len(d)) as s:
+            trips = clean_trip_column(d[trip_col], "vic").astype(int).to_numpy()
+            s.rows_out = len(trips)
+        with stage("vic.pivot", len(d)) as s:
+            # normalise each distinct Entry/Exit spelling once, not once per row
+            codes, uniques = pd.factorize(d[entry_exit_col], use_na_sentinel=False)
+            ee_norm = np.array([normalise_entry_exit(u) for u in uniques], dtype=object)[codes]
+            stations, directions, sums = pivot_sum(d[station_col], ee_norm, trips)
+            # Ensure both columns exist
+            directions = list(directions)
+            entry_vals = sums[:, directions.index("Entry")] if "Entry" in directions else 0
+            exit_vals  = sums[:, directions.index("Exit")]  if "Exit"  in directions else 0
+
+            g = pd.DataFrame({
+                "Station": stations,
+                "Entry": entry_vals,
+                "Exit": exit_vals
+            })
+            g["Total"] = g["Entry"] + g["Exit"]
+            s.rows_out = len(g)
+
+    # Ensure station column named 'Station'
+    if "Station" not in g.columns:
+        g = g.rename(columns={station_col: "Station"})
+
+    # Filter by min_total, sort
+    with stage("vic.min_total_filter", len(g)) as s:
+        g = g[g["Total"] >= int(min_total)].copy()
+        s.rows_out = len(g)
+    with stage("vic.sort", len(g)) as s:
+        g = g.sort_values("Total", ascending=ascending, kind="mergesort").reset_index(drop=True)
+        s.rows_out = len(g)
+
+    # Only requested columns in final output
+    return g[["Station", "Entry", "Exit", "Total"]]
+
+
+@profiled("vic.list_outliers")
+def list_outliers(df: pd.DataFrame):
+    """
+    Identify outliers using mean ± 2*std (same as previous).
+    Returns (low_outliers, high_outliers).
+    """
+    mean = df["Total"].mean()
+    std = df["Total"].std()
+    if len(df) < 2 or pd.isna(std):
+        return df.iloc[:0].copy(), df.iloc[:0].copy()
+    hi = df[df["Total"] > mean + 2 * std]
+    lo = df[df["Total"] < max(0, mean - 2 * std)]
+    return lo, hi
+
+
+def load(csv_path=CSV_PATH, report=True) -> pd.DataFrame:
+    """Raw VIC frame, through the binary dataset cache."""
+    return load_dataset(csv_path, trip_style="vic", report=report)